@@ -0,0 +1,150 @@
+# ================================================
+# In-Memory Asset Bundle Served Through a URL Scheme
+# ================================================
+from typing import Dict, Optional
+from PyQt6.QtWebEngineCore import (QWebEngineUrlScheme, QWebEngineUrlSchemeHandler, QWebEngineUrlRequestJob,
+                                   QWebEngineProfile)
+from PyQt6.QtCore import QCoreApplication, QBuffer, QIODevice, QUrl, QDir
+import mimetypes
+import os
+
+SCHEME_NAME = b'mqasset'
+ASSET_HOST = 'bundle'
+ASSET_ROOT = os.path.dirname(os.path.realpath(__file__))
+PROFILE_NAME = 'mathquill'
+
+# The only files the scheme serves: the pages and their scripts, and everything under
+# the asset directories. The rest of the checkout (sources, .git) is never exposed.
+PAGE_FILES = [
+    'mathquill_template2.html',
+    'mathquill_worksheet.html',
+    'mathjax_pop-out.html',
+    'typeset_scheduler.js',
+    'mathjax_loader.js',
+]
+ASSET_DIRECTORIES = ['resources']
+
+# Read into memory when the bundle is first used; other allowed files, such as MathJax
+# components loaded on demand, are read on their first request and kept
+PRELOADED_ASSETS = PAGE_FILES + [
+    'resources/jquery-3.6.0.min.js',
+    'resources/mathquill.min.js',
+    'resources/mathquill.min.css',
+    'resources/qwebchannel.js',
+    'resources/MathJax/es5/startup.js',
+    'resources/MathJax/es5/core.js',
+    'resources/MathJax/es5/input/tex-base.js',
+    'resources/MathJax/es5/input/tex/extensions/html.js',
+    'resources/MathJax/es5/output/svg.js',
+    'resources/MathJax/es5/output/svg/fonts/tex.js',
+]
+
+scheme_registered = False
+
+def register_asset_scheme() -> bool:
+    """
+    Registers the asset URL scheme. Chromium only accepts schemes registered before the
+    QApplication is created, so this runs when the module is imported; a later import
+    leaves pages on file URLs.
+    """
+    global scheme_registered
+    if not scheme_registered and QCoreApplication.instance() is None:
+        scheme = QWebEngineUrlScheme(SCHEME_NAME)
+        scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host) # A standard URL, so relative paths resolve
+        scheme.setFlags(QWebEngineUrlScheme.Flag.SecureScheme
+                        | QWebEngineUrlScheme.Flag.LocalAccessAllowed
+                        | QWebEngineUrlScheme.Flag.CorsEnabled)
+        QWebEngineUrlScheme.registerScheme(scheme)
+        scheme_registered = True
+    return scheme_registered
+
+class AssetBundle:
+    """
+    The bytes of the page assets, each read from disk once.
+
+    Attributes:
+        root (str): The directory asset paths are relative to.
+        files (Dict[str, bytes]): Loaded assets by relative path.
+        disk_reads (int): Files read from disk so far.
+    """
+    def __init__(self, root: str = ASSET_ROOT):
+        self.root = os.path.realpath(root)
+        self.files: Dict[str, bytes] = {}
+        self.disk_reads = 0
+        for path in PRELOADED_ASSETS:
+            self.get(path)
+
+    def get(self, path: str) -> Optional[bytes]:
+        if path in self.files:
+            return self.files[path]
+        full_path = self.resolve(path)
+        if full_path is None or not os.path.isfile(full_path):
+            return None
+        with open(full_path, 'rb') as f:
+            data = f.read()
+        self.disk_reads += 1
+        self.files[path] = data
+        return data
+
+    def resolve(self, path: str) -> Optional[str]:
+        """
+        Returns the real path of an allowed asset, or None if the path is outside the
+        allowlist, including through '..' or symlinks.
+        """
+        full_path = os.path.realpath(os.path.join(self.root, path))
+        allowed_files = {os.path.realpath(os.path.join(self.root, name)) for name in PAGE_FILES}
+        if full_path in allowed_files:
+            return full_path
+        for directory in ASSET_DIRECTORIES:
+            if full_path.startswith(os.path.realpath(os.path.join(self.root, directory)) + os.sep):
+                return full_path
+        return None
+
+class AssetSchemeHandler(QWebEngineUrlSchemeHandler):
+    def __init__(self, bundle: AssetBundle, parent=None):
+        super().__init__(parent)
+        self.bundle = bundle
+
+    def requestStarted(self, job: QWebEngineUrlRequestJob):
+        path = job.requestUrl().path().lstrip('/')
+        data = self.bundle.get(path)
+        if data is None:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+        mime_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        buffer = QBuffer(job) # Owned by the job, so it lives until the reply is sent
+        buffer.setData(data)
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        job.reply(mime_type.encode(), buffer)
+
+asset_profile = None
+
+def get_asset_profile() -> QWebEngineProfile:
+    """
+    Returns the profile shared by every MathQuill and MathJax page, created on first use.
+    It serves the asset bundle when the scheme is registered and keeps a persistent disk
+    cache, so pages share one set of loaded assets instead of each reading them from disk.
+    """
+    global asset_profile
+    if asset_profile is None:
+        if not scheme_registered:
+            asset_profile = QWebEngineProfile.defaultProfile()
+        else:
+            asset_profile = QWebEngineProfile(PROFILE_NAME, QCoreApplication.instance())
+            asset_profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.DiskHttpCache)
+            asset_profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.NoPersistentCookies)
+            handler = AssetSchemeHandler(AssetBundle(), asset_profile)
+            asset_profile.installUrlSchemeHandler(SCHEME_NAME, handler)
+    return asset_profile
+
+def asset_url(path: str, query: Optional[str] = None) -> QUrl:
+    # Falls back to the file on disk when the scheme could not be registered
+    if scheme_registered:
+        url = QUrl(f"{SCHEME_NAME.decode()}://{ASSET_HOST}/{path}")
+    else:
+        url = QUrl.fromLocalFile(QDir.current().absoluteFilePath(path))
+    if query:
+        url.setQuery(query)
+    return url
+
+register_asset_scheme()
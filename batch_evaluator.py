@@ -0,0 +1,146 @@
+# ================================================
+# Streaming Batch Expression Evaluator
+# ================================================
+from typing import Optional, Tuple, List, Iterator, Iterable, TextIO
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from itertools import islice
+from calculator_domain import evaluate_expression
+from compute_services import ComputeServices
+from replay_engine import NullWriter, silence_worker
+import contextlib
+import argparse
+import random
+import time
+import sys
+import os
+
+services = ComputeServices()
+
+def read_expressions(source: TextIO) -> Iterator[str]:
+    """
+    Yields one expression per line, without the line ending.
+    """
+    for line in source:
+        yield line.rstrip('\r\n')
+
+def evaluate_line(line: str) -> str:
+    """
+    Parses a line into the domain tree and evaluates it with the semantics of the Return input.
+    """
+    if line.strip() == "":
+        return ""
+    try:
+        expression_tree = services.parse_expression(line)
+        result, _memo = services.get_result(evaluate_expression(expression_tree))
+        return result
+    except Exception as e:
+        return f"ERROR: {e}"
+
+def evaluate_chunk(lines: List[str]) -> Tuple[List[str], List[float]]:
+    """
+    Evaluates a chunk of lines and returns the results with the latency of each line in seconds.
+    """
+    results = []
+    latencies = []
+    with contextlib.redirect_stdout(NullWriter()):
+        for line in lines:
+            start = time.perf_counter()
+            results.append(evaluate_line(line))
+            latencies.append(time.perf_counter() - start)
+    return (results, latencies)
+
+class LatencyStats:
+    """
+    Throughput and per-line latency statistics with bounded memory.
+    Percentiles are taken from a fixed-size reservoir sample of the latencies.
+    """
+    def __init__(self, reservoir_size: int = 10000, seed: int = 0):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.reservoir_size = reservoir_size
+        self.reservoir = []
+        self.rng = random.Random(seed)
+
+    def add(self, latency: float):
+        self.count += 1
+        self.total += latency
+        self.maximum = max(self.maximum, latency)
+        if len(self.reservoir) < self.reservoir_size:
+            self.reservoir.append(latency)
+        else:
+            index = self.rng.randrange(self.count)
+            if index < self.reservoir_size:
+                self.reservoir[index] = latency
+
+    def percentile(self, fraction: float) -> float:
+        if not self.reservoir:
+            return 0.0
+        ordered = sorted(self.reservoir)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def report(self, elapsed: float) -> str:
+        mean = self.total / self.count if self.count else 0.0
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        return (f"{self.count} lines in {elapsed:.2f}s ({rate:,.0f} lines/s)\n"
+                f"latency per line: mean {mean * 1000:.3f} ms, p50 {self.percentile(0.50) * 1000:.3f} ms, "
+                f"p95 {self.percentile(0.95) * 1000:.3f} ms, p99 {self.percentile(0.99) * 1000:.3f} ms, "
+                f"max {self.maximum * 1000:.3f} ms")
+
+def chunked(lines: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    iterator = iter(lines)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def evaluate_stream(lines: Iterable[str], output: TextIO, workers: Optional[int] = None,
+                    chunk_size: int = 500, stats: Optional[LatencyStats] = None) -> LatencyStats:
+    """
+    Evaluates lines in chunks across worker processes and writes 'expression<TAB>result'
+    lines to output in input order. At most two chunks per worker are in flight, so
+    memory stays bounded however long the input is.
+    """
+    stats = stats if stats is not None else LatencyStats()
+    workers = workers or os.cpu_count()
+    in_flight = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=silence_worker) as executor:
+        def write_oldest():
+            chunk, future = in_flight.popleft()
+            results, latencies = future.result()
+            for line, result in zip(chunk, results):
+                output.write(f"{line}\t{result}\n")
+            for latency in latencies:
+                stats.add(latency)
+
+        for chunk in chunked(lines, chunk_size):
+            in_flight.append((chunk, executor.submit(evaluate_chunk, chunk)))
+            if len(in_flight) >= 2 * workers:
+                write_oldest()
+        while in_flight:
+            write_oldest()
+    output.flush()
+    return stats
+
+# Command line entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate one expression per line with the compute engine.")
+    parser.add_argument("input", nargs="?", default="-", help="expression file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="result file, or - for stdout")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=500, help="lines per worker task")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding='utf-8')
+    output = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+    start = time.perf_counter()
+    try:
+        stats = evaluate_stream(read_expressions(source), output, workers=args.workers, chunk_size=args.chunk_size)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(stats.report(time.perf_counter() - start), file=sys.stderr)
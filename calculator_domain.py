@@ -381,9 +381,60 @@ class ExpressionStateHistoryItem:
     recent_state_data: ExpressionStateData
     current_input: CalculatorInput
     widget_ID: int
+    digit_display: str = " "
     
     def __str__(self):
         state_type_name = type(self.recent_state_data).__name__
         return f"recent state data -> {state_type_name} with current input -> {self.current_input} on mathquill widget No. {self.widget_ID}"
 
+# Per-session data of the compute services
+@dataclass
+class ComputeSession:
+    digit_display: str = " "
+    recent_history: Optional[ExpressionStateHistoryItem] = None
+
+# Compact, immutable form of a history item. Only the input and the ten-key
+# display that accompanied it are kept, which is all that is needed to replay it.
+@dataclass(frozen=True)
+class ExpressionStateHistoryRecord:
+    index: int
+    widget_ID: int
+    state_name: str
+    input_token: str
+    digit_display: str = " "
+    
+    def __str__(self):
+        return f"#{self.index} recent state data -> {self.state_name} with current input -> {self.input_token} on mathquill widget No. {self.widget_ID}"
+
+# Tokens for calculator inputs so they can be written to disk and read back
+input_value_types = {
+    'DIGIT': NonZeroDigit,
+    'MATHOP': CalculatorMathOp,
+    'FUNCTION': MathFunction
+}
+
+def input_to_token(input) -> str:
+    """
+    Returns a compact string token for a calculator input, e.g. 'ZERO' or 'DIGIT:FIVE'.
+    """
+    if input is None:
+        return "NONE"
+    elif isinstance(input, tuple):
+        input_type, input_value = input
+        return f"{input_type}:{input_value.name}"
+    elif isinstance(input, CalculatorInput):
+        return input.name
+    raise ValueError(f"Unknown calculator input: {input}")
+
+def input_from_token(token: str):
+    """
+    Returns the calculator input represented by a token from input_to_token.
+    """
+    if token == "NONE":
+        return None
+    elif ':' in token:
+        input_type, name = token.split(':', 1)
+        return (input_type, input_value_types[input_type][name])
+    return CalculatorInput[token]
+
 
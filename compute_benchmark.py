@@ -0,0 +1,213 @@
+# ================================================
+# Compute Hot Path Micro-Benchmarks
+# ================================================
+from typing import Callable, List, Tuple
+from dataclasses import dataclass, field
+from calculator_domain import (CalculatorInput, NonZeroDigit, NumberInputStateData, evaluate_expression)
+from compute_services import ComputeServices, load_sympy
+from compute_implementation import create_compute
+from replay_engine import NullWriter, FIRST_WIDGET_ID
+import contextlib
+import argparse
+import random
+import copy
+import json
+import math
+import time
+
+# ------Expression generators, one per scaling dimension---------
+def length_expression(n: int) -> str:
+    # n numbers joined by the four operators: 12+7*3-45/...
+    rng = random.Random(n)
+    return ''.join(str(rng.randint(1, 99)) + rng.choice('+-*/') for _ in range(n - 1)) + str(rng.randint(1, 99))
+
+def depth_expression(n: int) -> str:
+    # n nested parentheses: ((((1+2)+3)+4)+5)
+    return '(' * n + '1' + ''.join(f'+{i + 2})' for i in range(n))
+
+def sqrt_count_expression(n: int) -> str:
+    # n square roots side by side: sqrt(2)+sqrt(3)+...
+    return '+'.join(f'sqrt({i + 2})' for i in range(n))
+
+def sqrt_depth_expression(n: int) -> str:
+    # n nested square roots: sqrt(sqrt(sqrt(2)))
+    return 'sqrt(' * n + '2' + ')' * n
+
+def power_count_expression(n: int) -> str:
+    # n powers side by side, as the compute services write them: 2**(2)+3**(2)+...
+    return '+'.join(f'{i + 2}**(2)' for i in range(n))
+
+def power_depth_expression(n: int) -> str:
+    # n nested powers: 2**(2**(2**(2)))
+    return '2**(' * n + '2' + ')' * n
+
+GENERATORS = {
+    'length': length_expression,
+    'depth': depth_expression,
+    'sqrt_count': sqrt_count_expression,
+    'sqrt_depth': sqrt_depth_expression,
+    'power_count': power_count_expression,
+    'power_depth': power_depth_expression,
+}
+
+# ------Benchmarks---------
+services = ComputeServices()
+compute = create_compute(services)
+get_display = services.get_display_from_state("Error:")
+
+def prepare_compute(expression: str) -> Tuple[NumberInputStateData, str]:
+    # A number input state for the expression, about to receive one more digit
+    tree = services.parse_expression(expression)
+    last_value = tree.expressions[-1].value if hasattr(tree.expressions[-1], 'value') else '1'
+    return NumberInputStateData(current_value=last_value, expression_tree=tree), last_value + '5'
+
+def run_compute(prepared: Tuple[NumberInputStateData, str]):
+    # One digit transition plus the display it triggers, as handleTenKeyButtonClicked does
+    state, digit_display = prepared
+    session = services.new_session()
+    services.receive_ten_key_display(session, digit_display)
+    state = compute(CalculatorInput.DIGIT(NonZeroDigit.FIVE), state, FIRST_WIDGET_ID, session)
+    get_display(state, session)
+
+@dataclass
+class Benchmark:
+    """
+    One hot path and the dimensions it is scaled over.
+
+    Attributes:
+        name (str): The benchmark name.
+        run (Callable): The timed call, given a prepared input.
+        dimensions (List[str]): Names of the GENERATORS to scale over.
+        prepare (Callable): Turns a generated expression into the input of run; not timed.
+        mutates (bool): True if run changes its input, so each call gets a fresh copy.
+        cold_cache (bool): True if run goes through SymPy, whose cache is cleared before
+            each call so that repeated calls are not timed as cache hits.
+    """
+    name: str
+    run: Callable
+    dimensions: List[str]
+    prepare: Callable = lambda expression: expression
+    mutates: bool = False
+    cold_cache: bool = False
+
+BENCHMARKS = [
+    Benchmark('evaluate_expression', evaluate_expression, ['length', 'depth', 'sqrt_count'],
+              prepare=services.parse_expression),
+    Benchmark('preprocess_expression', services.preprocess_expression, ['length', 'depth', 'sqrt_count']),
+    Benchmark('replace_sqrt', services.replace_sqrt, ['sqrt_count', 'sqrt_depth']),
+    Benchmark('replace_power', services.replace_power, ['power_count', 'power_depth']),
+    Benchmark('get_latex_or_mixed_number', services.get_latex_or_mixed_number, ['length', 'depth', 'sqrt_count'],
+              cold_cache=True),
+    Benchmark('get_decimal_value', services.get_decimal_value, ['length', 'depth', 'sqrt_count'], cold_cache=True),
+    Benchmark('compute', run_compute, ['length', 'depth', 'sqrt_count'], prepare=prepare_compute, mutates=True,
+              cold_cache=True),
+]
+
+# ------Timing and scaling---------
+@dataclass
+class ScalingCurve:
+    """
+    Time per call of one benchmark as one dimension grows.
+
+    Attributes:
+        benchmark (str): The benchmark name.
+        dimension (str): The scaled dimension.
+        points (List[Tuple[int, float]]): (size, seconds per call).
+        slope (float): Least squares slope of log(time) over log(size); 1.0 is linear.
+    """
+    benchmark: str
+    dimension: str
+    points: List[Tuple[int, float]] = field(default_factory=list)
+    slope: float = 0.0
+
+def run_calls(benchmark: Benchmark, prepared, number: int) -> float:
+    """
+    Returns the seconds number calls took, not counting input copies and cache clears.
+    """
+    inputs = [copy.deepcopy(prepared) for _ in range(number)] if benchmark.mutates else [prepared] * number
+    if not benchmark.cold_cache:
+        start = time.perf_counter()
+        for item in inputs:
+            benchmark.run(item)
+        return time.perf_counter() - start
+    clear_cache = load_sympy().core.cache.clear_cache
+    elapsed = 0.0
+    for item in inputs:
+        clear_cache()
+        start = time.perf_counter()
+        benchmark.run(item)
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+def time_call(benchmark: Benchmark, prepared, min_time: float, repeat: int) -> float:
+    """
+    Returns the best of repeat rounds of the mean seconds per call, each round
+    running for at least min_time, after one discarded warm-up call.
+    """
+    # The first call pays for lazily loaded code, e.g. SymPy's printers, which would
+    # otherwise inflate the smallest size and flatten or invert the fitted slope
+    run_calls(benchmark, prepared, 1)
+    number = 1
+    while True:
+        elapsed = run_calls(benchmark, prepared, number)
+        if elapsed >= min_time:
+            break
+        number *= 2
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        best = min(best, run_calls(benchmark, prepared, number) / number)
+    return best
+
+def log_log_slope(points: List[Tuple[int, float]]) -> float:
+    xs = [math.log(size) for size, _ in points]
+    ys = [math.log(seconds) for _, seconds in points]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance if variance else 0.0
+
+def measure_curve(benchmark: Benchmark, dimension: str, sizes: List[int], min_time: float, repeat: int) -> ScalingCurve:
+    curve = ScalingCurve(benchmark=benchmark.name, dimension=dimension)
+    for size in sizes:
+        prepared = benchmark.prepare(GENERATORS[dimension](size))
+        curve.points.append((size, time_call(benchmark, prepared, min_time, repeat)))
+    curve.slope = log_log_slope(curve.points)
+    return curve
+
+# Benchmark entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the compute hot paths as expressions grow and flag super-linear scaling.")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[2, 4, 8, 16, 32, 64])
+    parser.add_argument("--only", nargs='+', help="benchmark names to run")
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per timing round")
+    parser.add_argument("--repeat", type=int, default=3, help="timing rounds per point, the best is kept")
+    parser.add_argument("--threshold", type=float, default=1.2, help="log-log slope above which scaling is flagged")
+    parser.add_argument("--output", help="write the curves to this JSON file")
+    args = parser.parse_args()
+
+    load_sympy()
+    curves = []
+    flagged = []
+    header = "  ".join(f"{size:>9}" for size in args.sizes)
+    cold = ", ".join(benchmark.name for benchmark in BENCHMARKS if benchmark.cold_cache)
+    print(f"Timed with SymPy's cache cleared before each call: {cold}")
+    print(f"{'benchmark':26} {'dimension':12} {header}   slope   (us per call)")
+    for benchmark in BENCHMARKS:
+        if args.only and benchmark.name not in args.only:
+            continue
+        for dimension in benchmark.dimensions:
+            with contextlib.redirect_stdout(NullWriter()): # The state machine prints every transition
+                curve = measure_curve(benchmark, dimension, args.sizes, args.min_time, args.repeat)
+            curves.append(curve)
+            flag = "SUPER-LINEAR" if curve.slope > args.threshold else ""
+            if flag:
+                flagged.append(curve)
+            times = "  ".join(f"{seconds * 1e6:9.1f}" for _, seconds in curve.points)
+            print(f"{benchmark.name:26} {dimension:12} {times}   {curve.slope:5.2f}   {flag}")
+
+    if flagged:
+        print(f"\n{len(flagged)} curves grow faster than size^{args.threshold}: "
+              + ", ".join(f"{curve.benchmark}/{curve.dimension}" for curve in flagged))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump([{'benchmark': curve.benchmark, 'dimension': curve.dimension, 'slope': curve.slope,
+                        'points': curve.points} for curve in curves], f, indent=4)
@@ -7,20 +7,20 @@ from calculator_domain import (
     CalculatorInput, CalculatorMathOp, NonZeroDigit, DigitAccumulator, PendingOp, CalculatorState,
     StartStateData,  NumberInputStateData, OperatorInputStateData, ResultStateData, evaluate_expression,
     ParenthesisOpenStateData, FunctionInputStateData, Compound, Value, Operator, Parenthesis, Function,
-    MathFunction
+    MathFunction, ComputeSession
 )
 from calculator_services import CalculatorServices
 from compute_services import ComputeServices
 from dataclasses import dataclass, field
 import re
 
-def create_compute(services: ComputeServices)-> Callable[[CalculatorState, CalculatorInput, str], CalculatorState]: 
+def create_compute(services: ComputeServices)-> Callable[[CalculatorInput, CalculatorState, int, ComputeSession], CalculatorState]: 
     
-    def handle_start_state(state_data: StartStateData, input) -> CalculatorState: 
+    def handle_start_state(state_data: StartStateData, input, session: ComputeSession) -> CalculatorState: 
         
         if input == CalculatorInput.ZERO:
             print("Zero Input - Transition to NumberInputState")
-            digits = services.get_digit_display()
+            digits = services.get_digit_display(session)
             value = Value(value=digits)            
             return NumberInputStateData(current_value = digits,
                                         expression_tree = Compound([value]),
@@ -32,7 +32,7 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
             if input_type == 'DIGIT' and input_value in range(1, 10):
                 print(f"Digit Input {input_value} - Transition to NumberInputState")
-                digits = services.get_digit_display()
+                digits = services.get_digit_display(session)
                 value = Value(value=digits)                
                 return NumberInputStateData(current_value = digits,
                                             expression_tree = Compound([value]),
@@ -63,14 +63,14 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
                 
         elif input == CalculatorInput.DECIMALSEPARATOR:
             print("Decimal Seperator Input - Transition to NumberInputState")
-            digits = services.get_digit_display()
+            digits = services.get_digit_display(session)
             value = Value(value=digits)            
             return NumberInputStateData(current_value = digits,
                                         expression_tree = Compound([value]),
                                         memory = " ")
         
         elif input == CalculatorInput.MEMORYRECALL:            
-            digits = "((sqrt(5) + 113/16)**(-1/4) + 9*(sqrt(5) + 113/16)**(1/4))" #services.get_digit_display()
+            digits = "((sqrt(5) + 113/16)**(-1/4) + 9*(sqrt(5) + 113/16)**(1/4))" #services.get_digit_display(session)
             value = Value(value=digits,result=True)
             print(f"Memory recall {digits} - Transition to NumberInputState")                 
             return NumberInputStateData(current_value = digits,
@@ -89,10 +89,10 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
         return StartStateData(memory = " ")  # Return the current state if no condition matches    
     
-    def handle_number_input_state(state_data: NumberInputStateData, input) -> CalculatorState:
+    def handle_number_input_state(state_data: NumberInputStateData, input, session: ComputeSession) -> CalculatorState:
         if input == CalculatorInput.ZERO:
             print("Zero Input - Stay in NumberInputState")
-            digits = services.get_digit_display()
+            digits = services.get_digit_display(session)
             value = Value(value=digits)
             if isinstance(state_data.expression_tree.expressions[-1], Value):
                 if state_data.expression_tree.expressions[-1].result:
@@ -110,7 +110,7 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
             if input_type == 'DIGIT' and input_value in range(1, 10):
                 print(f"Digit Input {input_value} - Stay in NumberInputState")
-                digits = services.get_digit_display()
+                digits = services.get_digit_display(session)
                 value = Value(value=digits)
                 if isinstance(state_data.expression_tree.expressions[-1], Value):
                     if state_data.expression_tree.expressions[-1].result:
@@ -204,7 +204,7 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
         elif input == CalculatorInput.DECIMALSEPARATOR:
             print("Decimal Seperator Input - Stay in NumberInputState")
-            digits = services.get_digit_display()
+            digits = services.get_digit_display(session)
             value = Value(value=digits)            
             if isinstance(state_data.expression_tree.expressions[-1], Value):
                 if state_data.expression_tree.expressions[-1].result:
@@ -222,15 +222,9 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
             if state_data.stack is not None and len(state_data.stack) > 0:
                 _state, exp = state_data.stack[0]
                 expr = evaluate_expression(exp)
-                expression = str(services.simplify_expression(expr))    
             else:
                 expr = evaluate_expression(state_data.expression_tree)
-                expression = str(services.simplify_expression(expr))
-            result = services.get_decimal_value(expression).rstrip('0').rstrip('.')
-            if '.' in expression:
-                memo = result
-            else:
-                memo = expression                
+            result, memo = services.get_result(expr)
             return ResultStateData(result = result,
                                    memory = memo)
     
@@ -262,7 +256,7 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
         elif input == CalculatorInput.BACK:
             print("Back Input - Stay in NumberInputState")
-            digits = services.get_digit_display()
+            digits = services.get_digit_display(session)
             value = Value(value=digits)
             if isinstance(state_data.expression_tree.expressions[-1], Value):
                 if state_data.expression_tree.expressions[-1].result:
@@ -276,11 +270,11 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
         return state_data  # Return the current state if no condition matches
     
-    def handle_operator_input_state(state_data: OperatorInputStateData, input) -> CalculatorState:
+    def handle_operator_input_state(state_data: OperatorInputStateData, input, session: ComputeSession) -> CalculatorState:
         
         if input == CalculatorInput.ZERO:
             print("Zero Input - Transition to NumberInputState")
-            digits = services.get_digit_display()
+            digits = services.get_digit_display(session)
             value = Value(value=digits)              
             state_data.expression_tree.expressions.append(value)
             return NumberInputStateData(current_value = digits,
@@ -294,7 +288,7 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
             if input_type == 'DIGIT' and input_value in range(1, 10):
                 print(f"Digit Input {input_value} - Transition to NumberInputState")
-                digits = services.get_digit_display()
+                digits = services.get_digit_display(session)
                 value = Value(value=digits)
                 state_data.expression_tree.expressions.append(value)
                 return NumberInputStateData(current_value = value,
@@ -334,7 +328,7 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
         elif input == CalculatorInput.DECIMALSEPARATOR:
             print("Decimal Seperator Input - Transition to NumberInputState")
-            digits = services.get_digit_display()
+            digits = services.get_digit_display(session)
             value = Value(value=digits)            
             state_data.expression_tree.expressions.append(value)
             return NumberInputStateData(current_value = digits,
@@ -371,11 +365,11 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
         return state_data  # Return the current state if no condition matches
     
-    def handle_parenthesis_open_state(state_data: ParenthesisOpenStateData, input) -> CalculatorState:
+    def handle_parenthesis_open_state(state_data: ParenthesisOpenStateData, input, session: ComputeSession) -> CalculatorState:
         
         if input == CalculatorInput.ZERO:
             print("Zero Input - Transition to NumberInputState")
-            digits = services.get_digit_display()
+            digits = services.get_digit_display(session)
             value = Value(value=digits)
             state_data.expression_tree.expressions.append(value)
             return NumberInputStateData(current_value = digits,
@@ -389,7 +383,7 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
             if input_type == 'DIGIT' and input_value in range(1, 10):
                 print(f"Digit Input {input_value} - Transition to NumberInputState")
-                digits = services.get_digit_display()
+                digits = services.get_digit_display(session)
                 value = Value(value=digits)
                 state_data.expression_tree.expressions.append(value)
                 return NumberInputStateData(current_value = digits,
@@ -490,7 +484,7 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
         elif input == CalculatorInput.DECIMALSEPARATOR:
             print("Decimal Seperator Input - Transition to NumberInputState")
-            digits = services.get_digit_display()
+            digits = services.get_digit_display(session)
             value = Value(value=digits)            
             state_data.expression_tree.expressions.append(value)
             return NumberInputStateData(current_value = digits,
@@ -558,25 +552,19 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
             if state_data.stack is not None and len(state_data.stack) > 0:
                 _state, exp = state_data.stack[0]
                 expr = evaluate_expression(exp)
-                expression = str(services.simplify_expression(expr))    
             else:
                 expr = evaluate_expression(state_data.expression_tree)
-                expression = str(services.simplify_expression(expr))
-            result = services.get_decimal_value(expression).rstrip('0').rstrip('.')
-            if '.' in expression:
-                memo = result
-            else:
-                memo = expression                
+            result, memo = services.get_result(expr)
             return ResultStateData(result = result,
                                    memory = memo)
         
         return state_data  # Return the current state if no condition matches
     
-    def handle_function_input_state(state_data: FunctionInputStateData, input) -> CalculatorState:
+    def handle_function_input_state(state_data: FunctionInputStateData, input, session: ComputeSession) -> CalculatorState:
         
         if input == CalculatorInput.ZERO:
             print("Zero Input - Transition to NumberInputState")
-            digits = services.get_digit_display() #'0'         
+            digits = services.get_digit_display(session) #'0'         
             value = Value(value=digits)
             state_data.expression_tree.expressions.append(value)
             return NumberInputStateData(current_value = digits,
@@ -590,7 +578,7 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
             if input_type == 'DIGIT' and input_value in range(1, 10):
                 print(f"Digit Input {input_value} - Transition to NumberInputState")
-                digits = str(input_value) #services.get_digit_display()                
+                digits = str(input_value) #services.get_digit_display(session)                
                 value = Value(value=digits)
                 state_data.expression_tree.expressions.append(value)
                 return NumberInputStateData(current_value = digits,
@@ -630,7 +618,7 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
         elif input == CalculatorInput.DECIMALSEPARATOR:
             print("Decimal Seperator Input - Transition to NumberInputState")
-            digits = services.get_digit_display()
+            digits = services.get_digit_display(session)
             value = Value(value=digits)            
             state_data.expression_tree.expressions.append(value)
             return NumberInputStateData(current_value = digits,
@@ -667,11 +655,11 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
         return state_data  # Return the current state if no condition matches
     
-    def handle_result_state(state_data: ResultStateData, input) -> CalculatorState: 
+    def handle_result_state(state_data: ResultStateData, input, session: ComputeSession) -> CalculatorState: 
         
         if input == CalculatorInput.ZERO:
             print("Zero Input - Transition to NumberInputState")
-            digits = services.get_digit_display()
+            digits = services.get_digit_display(session)
             value = Value(value=digits)            
             return NumberInputStateData(current_value = digits,
                                         expression_tree = Compound([value]),
@@ -683,7 +671,7 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
             if input_type == 'DIGIT' and input_value in range(1, 10):
                 print(f"Digit Input {input_value} - Transition to NumberInputState")
-                digits = services.get_digit_display()
+                digits = services.get_digit_display(session)
                 value = Value(value=digits)                
                 return NumberInputStateData(current_value = digits,
                                             expression_tree = Compound([value]),
@@ -714,7 +702,7 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
         
         elif input == CalculatorInput.DECIMALSEPARATOR:
             print("Decimal Seperator Input - Stay in NumberInputState")
-            digits = services.get_digit_display()
+            digits = services.get_digit_display(session)
             value = Value(value=digits)            
             return NumberInputStateData(current_value = digits,
                                         expression_tree = Compound([value]),
@@ -743,44 +731,48 @@ def create_compute(services: ComputeServices)-> Callable[[CalculatorState, Calcu
     
         return state_data  # Return the current state if no condition matches
     
-    def handle_error_state(state_data: ErrorStateData, input, memory) -> CalculatorState: pass
+    def handle_error_state(state_data: ErrorStateData, input, memory, session: ComputeSession) -> CalculatorState: pass
     
     def handle_undo_redo_input(state_data: CalculatorState, previous_input: CalculatorInput) -> CalculatorState: pass
         
     
-    def compute(input, state, widget_id) -> Optional[CalculatorState]: 
+    def compute(input, state, widget_id, session) -> Optional[CalculatorState]: 
         """
         Routes the input and state to the appropriate handler and returns the new calculator state.
+        The services hold no per-session data, so one services object can be shared by
+        many sessions and threads.
         
         Args:
             input (CalculatorInput): The input received by the calculator.
             state (CalculatorState): The current state of the calculator.
+            widget_id (int): The MathQuill widget the input was entered on.
+            session (ComputeSession): The ten-key display and recent history of this session.
             
         Returns:
             Optional[CalculatorState]: The new state of the calculator after processing the input,
             or None if the input is not handled by any state.
         """               
         if isinstance(state, StartStateData):
-            services.set_recent_history(state,input,widget_id)
-            return handle_start_state(StartStateData, input)
+            services.set_recent_history(session,state,input,widget_id)
+            return handle_start_state(StartStateData, input, session)
         elif isinstance(state, NumberInputStateData):
-            services.set_recent_history(state,input,widget_id)
-            return handle_number_input_state(state, input)
+            services.set_recent_history(session,state,input,widget_id)
+            return handle_number_input_state(state, input, session)
         elif isinstance(state, OperatorInputStateData):
-            services.set_recent_history(state,input,widget_id)
-            return handle_operator_input_state(state, input)        
+            services.set_recent_history(session,state,input,widget_id)
+            return handle_operator_input_state(state, input, session)        
         elif isinstance(state, ParenthesisOpenStateData):
-            services.set_recent_history(state,input,widget_id)
-            return handle_parenthesis_open_state(state, input)        
+            services.set_recent_history(session,state,input,widget_id)
+            return handle_parenthesis_open_state(state, input, session)        
         elif isinstance(state, FunctionInputStateData):
-            services.set_recent_history(state,input,widget_id)
-            return handle_function_input_state(state, input)        
+            services.set_recent_history(session,state,input,widget_id)
+            return handle_function_input_state(state, input, session)        
         elif isinstance(state, ResultStateData):
-            services.set_recent_history(state,input,widget_id)
-            return handle_result_state(state, input)        
+            services.set_recent_history(session,state,input,widget_id)
+            return handle_result_state(state, input, session)        
         elif isinstance(state, ErrorStateData):
-            services.set_recent_history(state,input,widget_id)
-            return handle_error_state(state, input, state.memory)
+            services.set_recent_history(session,state,input,widget_id)
+            return handle_error_state(state, input, state.memory, session)
         return None
 
     return compute
\ No newline at end of file
@@ -5,16 +5,60 @@ from typing import Optional, Tuple, Union, Dict, Callable, List
 from calculator_domain import (Expression, Value, Operator, Parenthesis, Function, Compound, CalculatorInput, Number,
                                CalculatorMathOp, ErrorStateData, StartStateData,  NumberInputStateData, MathFunction,
                                evaluate_expression, OperatorInputStateData, ResultStateData, ParenthesisOpenStateData,
-                               FunctionInputStateData, ExpressionStateData, ExpressionStateHistoryItem)
+                               FunctionInputStateData, ExpressionStateData, ExpressionStateHistoryItem, ComputeSession)
+import threading
 import re
 import math
-import sympy as sp
 
-class ComputeServices:    
+# ------Lazy SymPy---------
+# SymPy takes longer to import than the rest of the calculator, so it is imported on
+# first use, or ahead of time on an idle background thread by prewarm_sympy.
+sympy_module = None
+sympy_lock = threading.Lock()
+
+# Representative expressions that fill SymPy's caches before the first keystroke
+warmup_expressions = ["1+2", "12/8", "-7/3", "sqrt(2)*3", "1.5*(2-7)", "(3+sqrt(5))**(1/4)"]
+
+def load_sympy():
+    """
+    Returns the sympy module, importing it on the first call.
+    """
+    global sympy_module
+    if sympy_module is None:
+        with sympy_lock:
+            if sympy_module is None:
+                import sympy
+                sympy_module = sympy
+    return sympy_module
+
+def warm_up_sympy(services: Optional["ComputeServices"] = None):
+    services = services or ComputeServices()
+    load_sympy()
+    for expression in warmup_expressions:
+        services.get_result(expression)
+        services.get_latex_or_mixed_number(expression)
+
+def prewarm_sympy(services: Optional["ComputeServices"] = None) -> threading.Thread:
+    """
+    Imports SymPy and runs the warm-up expressions on a daemon thread.
+
+    Returns:
+        threading.Thread: The started thread.
+    """
+    thread = threading.Thread(target=warm_up_sympy, args=(services,), name="sympy-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+class ComputeServices:
+    """
+    Stateless compute services. Per-session data lives in a ComputeSession, so one
+    instance can be shared by many calculators and threads.
+    """
     def __init__(self):
         super().__init__()
-        self.digit_display = " "
-        self.recent_history = None
+    
+    def new_session(self) -> ComputeSession:
+        return ComputeSession()
     
     def handle_return(self,state) -> bool:
         def inner(state) -> bool:            
@@ -31,41 +75,64 @@ class ComputeServices:
         return self.parse_tokens(tokens)
 
     def tokenize(self, expression: str) -> List[str]:
-        import re
-        token_pattern = re.compile(r'(\d+|sqrt|[+*/()-])')
-        tokens = token_pattern.findall(expression)
+        token_pattern = re.compile(r'\s*([\d.]+|sqrt|[+*/()-])')
+        number_pattern = re.compile(r'\d+\.?\d*|\.\d+')
+        tokens = []
+        index = 0
+        expression = expression.rstrip()
+        while index < len(expression):
+            match = token_pattern.match(expression, index)
+            if match is None:
+                # Skipping the character would evaluate a different expression, e.g. 2^3 as 23
+                position = len(expression) - len(expression[index:].lstrip())
+                raise ValueError(f"Unexpected character '{expression[position]}' at position {position}")
+            token = match.group(1)
+            # Splitting 1..2 or 1.2.3 into several numbers would evaluate a different expression
+            if token[0] in '0123456789.' and not number_pattern.fullmatch(token):
+                raise ValueError(f"Malformed number '{token}' at position {match.start(1)}")
+            tokens.append(token)
+            index = match.end()
+        if not tokens:
+            raise ValueError("Empty expression")
         return tokens
 
     def parse_tokens(self, tokens: List[str]) -> Expression:
-        def parse_inner(tokens, index):
+        def parse_inner(tokens, index, depth=0):
             exprs = []
             while index < len(tokens):
                 token = tokens[index]
-                if token.isdigit():
-                    exprs.append(Number(token))
+                if token[0].isdigit() or token[0] == '.':
+                    # Adjacent values would be joined into one number, e.g. 5 5 into 55
+                    if exprs and isinstance(exprs[-1], Value):
+                        raise ValueError(f"Missing operator between '{exprs[-1].value}' and '{token}'")
+                    exprs.append(Value(token))
                     index += 1
-                elif token == 'Sqrt':
-                    sub_expr, index = parse_function(tokens, index)
+                elif token == 'sqrt':
+                    sub_expr, index = parse_function(tokens, index, depth)
                     exprs.append(sub_expr)
                 elif token in '+-*/':
                     exprs.append(Operator(token))
                     index += 1
                 elif token == '(':
-                    sub_expr, index = parse_inner(tokens, index + 1)
+                    sub_expr, index = parse_inner(tokens, index + 1, depth + 1)
                     exprs.append(Parenthesis(sub_expr))
                 elif token == ')':
+                    if depth == 0:
+                        raise ValueError("Unbalanced parentheses: ')' without a matching '('")
                     return Compound(exprs), index + 1
                 else:
                     raise ValueError(f"Unknown token: {token}")
+            if depth > 0:
+                raise ValueError("Unbalanced parentheses: missing ')'")
             return Compound(exprs), index
 
-        def parse_function(tokens, index):
+        def parse_function(tokens, index, depth):
             func_name = tokens[index]
             index += 1
-            if tokens[index] != '(':
+            if index >= len(tokens) or tokens[index] != '(':
                 raise ValueError("Expected '(' after function name")
-            sub_expr, index = parse_inner(tokens, index + 1)
-            if func_name == 'Sqrt':
+            sub_expr, index = parse_inner(tokens, index + 1, depth + 1)
+            if func_name == 'sqrt':
                 func = self.sqrt_func
             else:
                 raise ValueError(f"Unknown function: {func_name}")
@@ -80,19 +147,20 @@ class ComputeServices:
     def power_func(self, x: str) -> str:        
         return(f"**({x})")
     
-    def receive_ten_key_display(self, display: str):
-        self.digit_display = display
+    def receive_ten_key_display(self, session: ComputeSession, display: str):
+        session.digit_display = display
     
-    def set_recent_history(self,recent_state_data: ExpressionStateData, current_input: CalculatorInput, widget_id):        
-        recent_history = ExpressionStateHistoryItem(recent_state_data=recent_state_data, current_input=current_input, widget_ID=widget_id)
-        self.recent_history = recent_history
+    def set_recent_history(self, session: ComputeSession, recent_state_data: ExpressionStateData, current_input: CalculatorInput, widget_id):        
+        recent_history = ExpressionStateHistoryItem(recent_state_data=recent_state_data, current_input=current_input,
+                                                    widget_ID=widget_id, digit_display=session.digit_display)
+        session.recent_history = recent_history
         
-    def get_recent_history(self, history_list):
-        history_list.append(self.recent_history)
+    def get_recent_history(self, session: ComputeSession, history_list):
+        history_list.append(session.recent_history)
         return history_list 
     
-    def get_digit_display(self):
-        out = self.digit_display        
+    def get_digit_display(self, session: ComputeSession):
+        out = session.digit_display        
         return out
     
     def get_stack_count_from_state(self, calculator_state) -> int:        
@@ -152,26 +220,46 @@ class ComputeServices:
         
         return processed_expression
     
-    def get_decimal_value(self, expression):
+    def get_decimal_value(self, expression) -> str:
+        """
+        Returns the decimal value of an expression.
+
+        Raises:
+            ValueError: If SymPy cannot evaluate it, e.g. after a trailing operator or in empty parentheses.
+        """
         exp = self.preprocess_expression(expression)
         try:
-            expr = sp.sympify(exp)
+            expr = load_sympy().sympify(exp)
             return str(expr.evalf())
         except Exception as e:
             print(f"get_decimal_value----error: {e} ")
-            result = exp  # or str(e)
+            raise ValueError(f"Cannot evaluate '{expression}'") from e
             
     def simplify_expression(self, expression):
         try:
             exp = self.preprocess_expression(expression)
-            result = sp.sympify(exp)
+            result = load_sympy().sympify(exp)
         except Exception as e:
             print(f"simplify_expression----error: {e} ")
             result = exp  # or str(e)        
         return result
     
+    def get_result(self, expression: str) -> Tuple[str, str]:
+        """
+        Evaluates an expression the way the Return input does and returns the
+        decimal result and the value to keep in memory.
+        """
+        expression = str(self.simplify_expression(expression))
+        result = self.get_decimal_value(expression).rstrip('0').rstrip('.')
+        if '.' in expression:
+            memo = result
+        else:
+            memo = expression
+        return (result, memo)
+    
     def get_latex_or_mixed_number(self, expression: str):
         try:            
+            sp = load_sympy()
             exp = sp.sympify(expression)           
             
             # Convert the SymPy expression to LaTeX with double backslashes for keywords
@@ -212,63 +300,65 @@ class ComputeServices:
         
         return result
     
+    def replace_sqrt(self, exp: str) -> str:
+        # Turns sqrt(...) into sqrt{...}, matching parentheses, for the LaTeX display
+        def replace_all_sqrt(exp):
+            pattern = re.compile(r'sqrt\(([^()]*)\)')
+            while 'sqrt(' in exp:
+                matches = list(pattern.finditer(exp))
+                if not matches:
+                    break
+                for match in matches:
+                    start = match.start()
+                    end = match.end()
+                    inner_exp = match.group(1)
+                    exp = exp[:start] + f'sqrt{{{inner_exp}}}' + exp[end:]
+            return exp
+
+        def replace_balanced_sqrt(exp):
+            while True:
+                start_index = exp.find('sqrt(')
+                if start_index == -1:
+                    break
+                open_paren = 0
+                for i in range(start_index + 5, len(exp)):
+                    if exp[i] == '(':
+                        open_paren += 1
+                    elif exp[i] == ')':
+                        if open_paren == 0:
+                            inner_exp = exp[start_index + 5:i]
+                            replaced_inner_exp = replace_all_sqrt(inner_exp)
+                            exp = exp[:start_index] + f'sqrt{{{replaced_inner_exp}}}' + exp[i+1:]
+                            break
+                        else:
+                            open_paren -= 1
+            return exp            
+        return replace_balanced_sqrt(exp)
+    
+    def replace_power(self, exp: str) -> str:
+        # Turns x**n and x**(...) into x^{...} for the LaTeX display
+        def replace_recursive(exp):
+            pattern_nested = re.compile(r'(\S+)\*\*\((.*?)\)')
+            while pattern_nested.search(exp):
+                exp = pattern_nested.sub(lambda match: f'{match.group(1)}^{{{replace_recursive(match.group(2))}}}', exp)
+            return exp
+        
+        # Handle basic powers like `x**2`
+        exp = re.sub(r'(\S+)\*\*(\d+)', r'\1^{{{\2}}}', exp)        
+        # Handle nested exponents recursively
+        exp = replace_recursive(exp)        
+        # Final pass to handle any remaining cases
+        exp = re.sub(r'(\S+)\*\*\(([^)]+)\)', r'\1^{{{\2}}}', exp)        
+        
+        return exp
+    
     def get_display_from_state(self, error_msg: str):
         """
         Returns the display strings based on the current state of the computation.
         """
-        def replace_sqrt(exp):
-            def replace_all_sqrt(exp):
-                pattern = re.compile(r'sqrt\(([^()]*)\)')
-                while 'sqrt(' in exp:
-                    matches = list(pattern.finditer(exp))
-                    if not matches:
-                        break
-                    for match in matches:
-                        start = match.start()
-                        end = match.end()
-                        inner_exp = match.group(1)
-                        exp = exp[:start] + f'sqrt{{{inner_exp}}}' + exp[end:]
-                return exp
-
-            def replace_balanced_sqrt(exp):
-                while True:
-                    start_index = exp.find('sqrt(')
-                    if start_index == -1:
-                        break
-                    open_paren = 0
-                    for i in range(start_index + 5, len(exp)):
-                        if exp[i] == '(':
-                            open_paren += 1
-                        elif exp[i] == ')':
-                            if open_paren == 0:
-                                inner_exp = exp[start_index + 5:i]
-                                replaced_inner_exp = replace_all_sqrt(inner_exp)
-                                exp = exp[:start_index] + f'sqrt{{{replaced_inner_exp}}}' + exp[i+1:]
-                                break
-                            else:
-                                open_paren -= 1
-                return exp            
-            return replace_balanced_sqrt(exp)
-        
-        def replace_power(exp):
-            def replace_recursive(exp):
-                pattern_nested = re.compile(r'(\S+)\*\*\((.*?)\)')
-                while pattern_nested.search(exp):
-                    exp = pattern_nested.sub(lambda match: f'{match.group(1)}^{{{replace_recursive(match.group(2))}}}', exp)
-                return exp
-            
-            # Handle basic powers like `x**2`
-            exp = re.sub(r'(\S+)\*\*(\d+)', r'\1^{{{\2}}}', exp)        
-            # Handle nested exponents recursively
-            exp = replace_recursive(exp)        
-            # Final pass to handle any remaining cases
-            exp = re.sub(r'(\S+)\*\*\(([^)]+)\)', r'\1^{{{\2}}}', exp)        
-            
-            return exp
-        
         def format_(exp:str) -> str:                   
             # Handle '**' by replacing it with '^{}                       
-            exp = replace_power(exp)            
+            exp = self.replace_power(exp)            
             exp = exp.replace('.-','.0-').replace('.+','.0+').replace('.*','.0*').replace('./','.0/')
             exp = exp.replace('*','\\\\times').replace('/','\\\\div').replace('I',' I').replace('sqrt','\\\\sqrt')            
             return exp 
@@ -277,9 +367,9 @@ class ComputeServices:
             result = exp.replace('I',' I').replace('*','\\\\cdot ')
             return result
         
-        def inner(calculator_state) -> str:
+        def inner(calculator_state, session: ComputeSession) -> str:
             if isinstance(calculator_state, StartStateData):                
-                return (self.digit_display, " ")
+                return (session.digit_display, " ")
             
             elif isinstance(calculator_state, NumberInputStateData):                
                 # Expression Out
@@ -288,11 +378,11 @@ class ComputeServices:
                     expression_latex = evaluate_expression(exp_tree)                                        
                 else:                    
                     expression_latex = evaluate_expression(calculator_state.expression_tree)                               
-                expression_out_latex = replace_sqrt(expression_latex)
+                expression_out_latex = self.replace_sqrt(expression_latex)
                 # Result
                 result_latex = self.preprocess_expression(expression_latex)
                 result_latex = self.get_latex_or_mixed_number(result_latex)
-                result_latex = replace_sqrt(result_latex)
+                result_latex = self.replace_sqrt(result_latex)
                 
                 return (format_(expression_out_latex),format_result_(result_latex))
             
@@ -303,7 +393,7 @@ class ComputeServices:
                     expression_out_latex = evaluate_expression(exp_tree)                    
                 else:
                     expression_out_latex = evaluate_expression(calculator_state.expression_tree)                    
-                expression_out_latex = replace_sqrt(expression_out_latex)
+                expression_out_latex = self.replace_sqrt(expression_out_latex)
                 # Result
                 result_latex = " "                
                 return (format_(expression_out_latex),result_latex)
@@ -318,13 +408,13 @@ class ComputeServices:
                     expression_latex = evaluate_expression(exp_tree)
                 else:
                     expression_latex = evaluate_expression(calculator_state.expression_tree)                    
-                expression_out_latex = replace_sqrt(expression_latex)
+                expression_out_latex = self.replace_sqrt(expression_latex)
                 # Result
                 if expression_out_latex[-2:] == '()':
                     result_latex = " "
                 else: 
                     result_latex = self.get_latex_or_mixed_number(expression_latex)
-                    result_latex = replace_sqrt(result_latex)
+                    result_latex = self.replace_sqrt(result_latex)
                 
                 return (format_(expression_out_latex),format_result_(result_latex))
             
@@ -335,7 +425,7 @@ class ComputeServices:
                     expression_latex = evaluate_expression(exp_tree)                   
                 else:
                     expression_latex = evaluate_expression(calculator_state.expression_tree)             
-                expression_out_latex = replace_sqrt(expression_latex)
+                expression_out_latex = self.replace_sqrt(expression_latex)
                 # Result
                 result_latex = " "                
                 return (format_(expression_out_latex),result_latex)
@@ -0,0 +1,102 @@
+# ================================================
+# Load Test for the /evaluate Endpoint
+# ================================================
+from typing import List
+from urllib import request as urlrequest
+from urllib.error import URLError
+import subprocess
+import threading
+import argparse
+import random
+import json
+import time
+import sys
+
+def post_json(url: str, payload: dict, timeout: float = 30.0) -> dict:
+    data = json.dumps(payload).encode('utf-8')
+    req = urlrequest.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    with urlrequest.urlopen(req, timeout=timeout) as response:
+        return json.loads(response.read())
+
+def wait_for_server(url: str, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            post_json(url, {'expression': '1+1'}, timeout=5.0)
+            return
+        except (URLError, ConnectionError, OSError):
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+def random_expression(rng: random.Random) -> str:
+    return ''.join(str(rng.randint(1, 99)) + rng.choice('+-*/') for _ in range(rng.randint(1, 4))) + str(rng.randint(1, 9))
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+def run_load(url: str, clients: int, duration: float, batch: int) -> List[float]:
+    """
+    Sends requests from concurrent clients for the given duration and returns the latencies.
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(seed):
+        rng = random.Random(seed)
+        while time.monotonic() < deadline:
+            if batch > 1:
+                payload = {'expressions': [random_expression(rng) for _ in range(batch)]}
+            else:
+                payload = {'expression': random_expression(rng)}
+            start = time.perf_counter()
+            try:
+                post_json(url, payload)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        print(f"{len(errors)} requests failed, first error: {errors[0]}", file=sys.stderr)
+    return latencies
+
+# Load test entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure requests per second and latency of /evaluate.")
+    parser.add_argument("--port", type=int, default=5057)
+    parser.add_argument("--workers", type=int, default=None, help="server worker processes")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent client threads")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--batch", type=int, default=1, help="expressions per request")
+    parser.add_argument("--external", action="store_true", help="use an already running server")
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.port}/evaluate"
+    server = None
+    if not args.external:
+        command = [sys.executable, "web_server.py", "--port", str(args.port)]
+        if args.workers:
+            command += ["--workers", str(args.workers)]
+        server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server(url)
+        latencies = sorted(run_load(url, args.clients, args.duration, args.batch))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"{len(latencies)} requests in {args.duration:.1f}s from {args.clients} clients "
+          f"({len(latencies) / args.duration:,.1f} requests/s, {args.batch} expressions per request)")
+    print(f"latency: p50 {percentile(latencies, 0.50) * 1000:.1f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms, max {percentile(latencies, 1.0) * 1000:.1f} ms")
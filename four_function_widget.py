@@ -8,33 +8,47 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QHBoxLayout,
                              QLabel, QWidget, QStyle, QFrame, QSizePolicy,
                              QComboBox, QStyledItemDelegate)
 from PyQt6.QtGui import QFont, QIcon, QMouseEvent
-from PyQt6.QtCore import Qt, QSize, pyqtSignal, pyqtSlot
+from PyQt6.QtCore import Qt, QSize, QTimer, pyqtSignal, pyqtSlot
 from calculator_services import CalculatorServices
-from compute_services import ComputeServices
+from compute_services import ComputeServices, prewarm_sympy
 from calculator_implementation import create_calculate
 from compute_implementation import create_compute
 from ten_key_widget import TenKey
 from mathquill_widget import MathQuillStackWidget
+from mathquill_worksheet_widget import MathQuillWorksheetWidget
+from history_store import ExpressionHistoryStore
+from input_journal import open_journal, replay_journal, DEFAULT_JOURNAL_PATH, OPERATION, DIGIT
 from enum import Enum
 
+class WorksheetMode(Enum):
+    STACK = 'stack' # One QWebEngineView per line
+    SINGLE_PAGE = 'single_page' # All lines in one shared page
+
 class FourFunctionCalculator(QWidget):
     resetSignal = pyqtSignal()
     backSignal = pyqtSignal()
     
-    def __init__(self):
+    def __init__(self, journal_path=DEFAULT_JOURNAL_PATH, worksheet_mode=WorksheetMode.STACK):
         super().__init__()
 
+        # Replay the input journal left behind by a session that did not shut down cleanly.
+        # Only the calculator holding the journal replays it; one opened while another
+        # calculator holds it runs without a journal rather than mixing the two sessions.
+        self.journal = open_journal(journal_path) if journal_path else None
+        replay = replay_journal(journal_path) if self.journal is not None else None
+
         # Set up services and state        
         services = ComputeServices()
         self.services = services
         self.state = services.initial_state
         self.compute = create_compute(services)
+        self.session = services.new_session()
         self.current_input = None
-        self.history = []
+        self.history = ExpressionHistoryStore()
         self.input_mapping = ComputeServices.input_mapping
                 
-        self.send_ten_key_display = self.services.receive_ten_key_display
-        self.get_digit_display = self.services.get_digit_display
+        self.send_ten_key_display = lambda display: self.services.receive_ten_key_display(self.session, display)
+        self.get_digit_display = lambda: self.services.get_digit_display(self.session)
         
         # Dictionary to store buttons with (row, column) as key
         self.buttons = {}
@@ -117,7 +131,10 @@ class FourFunctionCalculator(QWidget):
         #self.label.hide()
         
         # Math Quill widget for math output and input
-        self.mathquill_stack_widget = MathQuillStackWidget(self)
+        if WorksheetMode(worksheet_mode) == WorksheetMode.SINGLE_PAGE:
+            self.mathquill_stack_widget = MathQuillWorksheetWidget(self)
+        else:
+            self.mathquill_stack_widget = MathQuillStackWidget(self)
         #self.mathquill_stack_widget.set_controls_visibility(True)
         self.vbox.addWidget(self.mathquill_stack_widget)
         
@@ -134,7 +151,7 @@ class FourFunctionCalculator(QWidget):
         self.hbox = QHBoxLayout()
         
         # 10-key Widget
-        self.ten_key = TenKey('digits_mr_decimal')#,BUTTON_COLOR) # set the 10-key button color or use default
+        self.ten_key = TenKey('digits_mr_decimal', journal=self.journal)#,BUTTON_COLOR) # set the 10-key button color or use default
         self.resetSignal.connect(self.ten_key.reset_input)
         self.backSignal.connect(self.ten_key.back_input)
         self.ten_key.button_color = BUTTON_COLOR
@@ -162,6 +179,9 @@ class FourFunctionCalculator(QWidget):
         self.vbox.addLayout(self.hbox)
         
         self.setLayout(self.vbox)
+        
+        if replay is not None:
+            self.restore_from_journal(replay)
 
     # ------Create Functions---------    
     def setup_function_buttons(self, button_style):        
@@ -245,8 +265,11 @@ class FourFunctionCalculator(QWidget):
             input_action = input_action(param)
         
         if input_action is not None and input_text != '←':             
-            self.state = self.compute(input_action, self.state, widget_id)            
-            self.history = self.services.get_recent_history(self.history)        
+            # Journaled before it is applied, so a crash during compute still replays it
+            if self.journal is not None:
+                self.journal.record(OPERATION, widget_id, input_action)
+            self.state = self.compute(input_action, self.state, widget_id, self.session)            
+            self.history = self.services.get_recent_history(self.session, self.history)        
             print(f"GUI history:{self.history[-1]}")
             
         self.current_input = input_text
@@ -261,7 +284,7 @@ class FourFunctionCalculator(QWidget):
         # Update mathquill output for non-digit input
         if input_text in ['Minus','Plus','Divide by','Times','(',')','Sqrt','Power']:
             # Get current display
-            output_text, result = self.services.get_display_from_state("Error:")(self.state)
+            output_text, result = self.services.get_display_from_state("Error:")(self.state, self.session)
             # Emit the reset signal
             self.resetSignal.emit()             
             # Update mathquil expression
@@ -273,7 +296,7 @@ class FourFunctionCalculator(QWidget):
             # Emit the back signal
             self.emitBackSignal()
             # Get current display
-            output_text, result = self.services.get_display_from_state("Error:")(self.state)             
+            output_text, result = self.services.get_display_from_state("Error:")(self.state, self.session)             
             # Update mathquil expression
             stack_count = self.services.get_stack_count_from_state(self.state)
             self.mathquill_stack_widget.latex_input.setText(output_text)
@@ -285,14 +308,16 @@ class FourFunctionCalculator(QWidget):
         self.query_digit_display()
         self.label.setText(f"You clicked: {text} and service state is {self.query_digit_display()}")
         widget_id = self.mathquill_stack_widget.active_widget_ID
-        self.state = self.compute(self.current_input, self.state, widget_id)
+        if self.journal is not None:
+            self.journal.record(DIGIT, widget_id, self.current_input, text)
+        self.state = self.compute(self.current_input, self.state, widget_id, self.session)
         
-        self.history = self.services.get_recent_history(self.history)            
+        self.history = self.services.get_recent_history(self.session, self.history)            
         print(f"GUI history:{self.history[-1]}")
         
         # Get latex from servies and state.         
         stack_count = self.services.get_stack_count_from_state(self.state)
-        output_text, result = self.services.get_display_from_state("Error:")(self.state)
+        output_text, result = self.services.get_display_from_state("Error:")(self.state, self.session)
         self.mathquill_stack_widget.latex_input.setText(output_text)
         self.mathquill_stack_widget.update_last_widget(stack_count)
         
@@ -301,6 +326,34 @@ class FourFunctionCalculator(QWidget):
             self.mathquill_stack_widget.result_input.setText(result)
             self.mathquill_stack_widget.update_result()
                         
+    def restore_from_journal(self, replay):
+        """
+        Restores the states recovered from the journal and renders only the final display of each line.
+        """
+        self.state = replay.compute_state
+        self.send_ten_key_display(replay.digit_display)
+        self.ten_key.state = replay.ten_key_state
+        self.ten_key.update_display()
+        for count, widget_id in enumerate(replay.displays):
+            if count > 0:
+                self.mathquill_stack_widget.add_mathquill_widget()
+            latex, result, stack_count = replay.displays[widget_id]
+            self.mathquill_stack_widget.latex_input.setText(latex)
+            self.mathquill_stack_widget.update_last_widget(stack_count)
+            if result is not None:
+                self.mathquill_stack_widget.result_input.setText(result)
+                self.mathquill_stack_widget.update_result()
+        if replay.add_new_line:
+            self.mathquill_stack_widget.add_mathquill_widget()
+        print(f"Restored {replay.record_count} journaled inputs")
+    
+    def close_journal(self):
+        # A clean shutdown leaves nothing to recover
+        if self.journal is not None:
+            self.journal.clear()
+            self.journal.close()
+            self.journal = None
+        
     def query_digit_display(self) -> str:
         return self.get_digit_display()
     
@@ -309,17 +362,33 @@ class FourFunctionCalculator(QWidget):
 
 class FourFunctionCalculator_Window(QMainWindow):
     
-    def __init__(self):
+    def __init__(self, prewarm: bool = True, journal_path=DEFAULT_JOURNAL_PATH, worksheet_mode=WorksheetMode.STACK):
         super().__init__()
         
         self.setWindowTitle("Four Function Calculator")
         self.setGeometry(100, 100, 800, 600) 
-        self.FourFunctionCalculator = FourFunctionCalculator()
+        self.FourFunctionCalculator = FourFunctionCalculator(journal_path, worksheet_mode)
         self.setCentralWidget(self.FourFunctionCalculator)
+        
+        # SymPy is imported lazily; once the event loop is idle, import and warm it
+        # on a background thread so the first Return does not pay for it
+        self.prewarm_thread = None
+        if prewarm:
+            QTimer.singleShot(0, self.start_prewarm)
+    
+    def start_prewarm(self):
+        if self.prewarm_thread is None:
+            self.prewarm_thread = prewarm_sympy(self.FourFunctionCalculator.services)
+        
+    def closeEvent(self, event):
+        self.FourFunctionCalculator.history.close()
+        self.FourFunctionCalculator.close_journal()
+        event.accept()
 
 # Standalone example entry point
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    calculator_window = FourFunctionCalculator_Window()
+    worksheet_mode = WorksheetMode.SINGLE_PAGE if '--single-page' in sys.argv else WorksheetMode.STACK
+    calculator_window = FourFunctionCalculator_Window(worksheet_mode=worksheet_mode)
     calculator_window.show()
     app.exec()
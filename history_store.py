@@ -0,0 +1,161 @@
+# ================================================
+# History Store for Expression State History
+# ================================================
+from typing import Optional, Iterator, List
+from collections import deque
+from array import array
+from calculator_domain import (ExpressionStateHistoryItem, ExpressionStateHistoryRecord, input_to_token)
+import tempfile
+import json
+import os
+
+class ExpressionHistoryStore:
+    """
+    Bounded store for the calculator history.
+
+    The most recent records are kept in a fixed-size in-memory ring. When the ring
+    is full the oldest segment is spilled to an append-only log on disk. The byte
+    offset of every spilled record is kept in a compact index so any record can be
+    read back by index without loading the whole log. Records of one widget_ID are
+    found by streaming the log, so no per-widget index grows in memory.
+
+    Attributes:
+        capacity (int): The number of records kept in memory.
+        segment_size (int): The number of records spilled to disk at a time.
+        log_path (Optional[str]): The path of the on-disk log, a temporary file if None.
+            An existing log is resumed: its records come before any new ones.
+    """
+    def __init__(self, capacity: int = 256, segment_size: int = 64, log_path: Optional[str] = None):
+        if segment_size < 1 or segment_size > capacity:
+            raise ValueError("segment_size must be between 1 and capacity")
+        self.capacity = capacity
+        self.segment_size = segment_size
+        self.log_path = log_path
+        self.owns_log = log_path is None
+        self.ring = deque()
+        self.spilled_count = 0         # Number of records on disk
+        self.offsets = array('q')      # Byte offset of each record on disk
+        self.log_file = None
+        if log_path is not None and os.path.exists(log_path):
+            self.open_log()
+
+    def __len__(self) -> int:
+        return self.spilled_count + len(self.ring)
+
+    def __getitem__(self, index: int) -> ExpressionStateHistoryRecord:
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("history index out of range")
+        if index >= self.spilled_count:
+            return self.ring[index - self.spilled_count]
+        return self.read_record(index)
+
+    def __iter__(self) -> Iterator[ExpressionStateHistoryRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, item: ExpressionStateHistoryItem) -> ExpressionStateHistoryRecord:
+        """
+        Compacts a history item into a record and appends it to the store.
+        """
+        if item is None:
+            return None
+        record = ExpressionStateHistoryRecord(index=len(self),
+                                              widget_ID=item.widget_ID,
+                                              state_name=type(item.recent_state_data).__name__,
+                                              input_token=input_to_token(item.current_input),
+                                              digit_display=item.digit_display)
+        self.ring.append(record)
+        if len(self.ring) >= self.capacity:
+            self.spill_segment()
+        return record
+
+    def for_widget(self, widget_id: int) -> List[ExpressionStateHistoryRecord]:
+        """
+        Returns all records that were entered on the given mathquill widget. Spilled
+        records are read from the log in one pass, keeping only the matching ones.
+        """
+        records = []
+        if self.spilled_count:
+            log_file = self.open_log()
+            log_file.seek(0)
+            for _ in range(self.spilled_count):
+                record = parse_record(log_file.readline())
+                if record.widget_ID == widget_id:
+                    records.append(record)
+        records.extend(record for record in self.ring if record.widget_ID == widget_id)
+        return records
+
+    def spill_segment(self):
+        """
+        Writes the oldest segment of the in-memory ring to the on-disk log.
+        """
+        log_file = self.open_log()
+        log_file.seek(0, os.SEEK_END)
+        for _ in range(min(self.segment_size, len(self.ring))):
+            record = self.ring.popleft()
+            self.offsets.append(log_file.tell())
+            line = json.dumps([record.index, record.widget_ID, record.state_name,
+                               record.input_token, record.digit_display], separators=(',', ':'))
+            log_file.write(line.encode('utf-8') + b'\n')
+            self.spilled_count += 1
+        log_file.flush()
+
+    def read_record(self, index: int) -> ExpressionStateHistoryRecord:
+        log_file = self.open_log()
+        log_file.seek(self.offsets[index])
+        return parse_record(log_file.readline())
+
+    def open_log(self):
+        if self.log_file is None:
+            if self.log_path is None:
+                handle, self.log_path = tempfile.mkstemp(prefix="calculator_history_", suffix=".log")
+                os.close(handle)
+            self.log_file = open(self.log_path, 'a+b') # Never truncates records already spilled
+            self.load_offsets()
+        return self.log_file
+
+    def load_offsets(self):
+        """
+        Rebuilds the offset index from the log. A store that holds no records yet adopts
+        the records in the log; otherwise the log must hold exactly the spilled records.
+        """
+        offsets = array('q')
+        self.log_file.seek(0)
+        offset = 0
+        for line in self.log_file:
+            if not line.endswith(b'\n'): # A record cut short by a crash is dropped
+                break
+            offsets.append(offset)
+            offset += len(line)
+        self.log_file.truncate(offset)
+        if len(self) == 0:
+            self.spilled_count = len(offsets)
+        elif len(offsets) != self.spilled_count:
+            raise ValueError(f"History log {self.log_path} holds {len(offsets)} records, expected {self.spilled_count}")
+        self.offsets = offsets
+
+    def close(self):
+        """
+        Closes the on-disk log. A temporary log created by the store is removed, and the
+        store is emptied with it; a log at a given path is kept and reopened on next use.
+        """
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+        if self.owns_log and self.log_path is not None:
+            if os.path.exists(self.log_path):
+                os.remove(self.log_path)
+            self.log_path = None
+            self.ring.clear()
+            self.offsets = array('q')
+            self.spilled_count = 0
+
+def parse_record(line: bytes) -> ExpressionStateHistoryRecord:
+    record_index, widget_id, state_name, input_token, digit_display = json.loads(line)
+    return ExpressionStateHistoryRecord(index=record_index,
+                                        widget_ID=widget_id,
+                                        state_name=state_name,
+                                        input_token=input_token,
+                                        digit_display=digit_display)
@@ -0,0 +1,210 @@
+# ================================================
+# Write-Ahead Input Journal
+# ================================================
+from typing import Optional, Tuple, Dict, List, Iterator
+from dataclasses import dataclass, field
+from calculator_domain import (CalculatorState, CalculatorInput, input_to_token, input_from_token)
+from replay_engine import HeadlessSession, NullWriter
+import contextlib
+import threading
+import json
+import os
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser("~"), ".frank_math_navigator", "calculator.journal")
+
+# Journal record kinds
+CALCULATE = "calculate" # Input passed to TenKey.calculate
+DIGIT = "digit"         # Input passed to compute after a ten-key display update
+OPERATION = "operation" # Input passed to compute from a function button
+
+@dataclass
+class JournalRecord:
+    kind: str
+    widget_id: Optional[int]
+    input_token: str
+    digit_display: str = " "
+
+class InputJournal:
+    """
+    Crash-safe journal of calculator inputs.
+
+    Records are buffered in memory and a background thread writes and fsyncs
+    them as one group every commit_interval seconds, so recording an input
+    never waits on the disk.
+
+    The journal holds an exclusive lock on <path>.lock while it is open, so a second
+    calculator cannot interleave its inputs with the first one's or clear them.
+    Opening a journal that is already held raises BlockingIOError.
+
+    Attributes:
+        path (str): The path of the journal file.
+        commit_interval (float): Seconds between group commits.
+    """
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH, commit_interval: float = 0.2):
+        self.path = path
+        self.commit_interval = commit_interval
+        self.pending: List[bytes] = []
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock_file = open(path + '.lock', 'ab')
+        if not lock_exclusive(self.lock_file):
+            self.lock_file.close()
+            raise BlockingIOError(f"Journal {path} is in use by another calculator")
+        self.file = open(path, 'ab')
+        self.truncate_torn_record()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.commit_loop, name="input-journal", daemon=True)
+        self.thread.start()
+
+    def record(self, kind: str, widget_id: Optional[int], input, digit_display: str = " "):
+        """
+        Buffers one input for the next group commit.
+        """
+        line = json.dumps([kind, widget_id, input_to_token(input), digit_display], separators=(',', ':'))
+        with self.lock:
+            self.pending.append(line.encode('utf-8') + b'\n')
+
+    def truncate_torn_record(self):
+        # Drop a partial record left by a crash so new records start on a fresh line
+        size = self.file.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        with open(self.path, 'rb') as journal_file:
+            journal_file.seek(max(0, size - 4096))
+            tail = journal_file.read()
+        if not tail.endswith(b'\n'):
+            self.file.truncate(size - len(tail) + tail.rfind(b'\n') + 1)
+
+    def commit(self):
+        """
+        Writes all buffered records and fsyncs the journal.
+        """
+        # The write holds the lock too, so clear() cannot truncate between taking the
+        # records and writing them, which would leave cleared records in the journal
+        with self.lock:
+            pending, self.pending = self.pending, []
+            if pending and self.file is not None:
+                self.file.write(b''.join(pending))
+                self.file.flush()
+                os.fsync(self.file.fileno())
+
+    def commit_loop(self):
+        while not self.stop_event.wait(self.commit_interval):
+            self.commit()
+
+    def clear(self):
+        """
+        Discards all journaled records, e.g. after a clean shutdown.
+        """
+        with self.lock:
+            self.pending = []
+            self.file.truncate(0)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        self.stop_event.set()
+        self.thread.join()
+        self.commit()
+        with self.lock:
+            self.file.close()
+            self.file = None
+        self.lock_file.close() # Releases the lock
+
+def lock_exclusive(lock_file) -> bool:
+    """
+    Takes an exclusive lock on an open file without waiting. Returns False if another
+    open journal, in this process or another, holds it. The lock ends with the file.
+    """
+    try:
+        if fcntl is not None:
+            # flock locks belong to the open file, so a second open in the same process conflicts too
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+def open_journal(path: str) -> Optional[InputJournal]:
+    """
+    Opens the journal at path, or returns None if another calculator has it open,
+    in which case this one runs without a journal.
+    """
+    try:
+        return InputJournal(path)
+    except BlockingIOError as e:
+        print(f"{e}; running without an input journal")
+        return None
+
+def read_journal(path: str) -> Iterator[JournalRecord]:
+    """
+    Yields the records of a journal file. A torn record at the end of the file,
+    left by a crash in the middle of a write, is ignored.
+    """
+    with open(path, 'rb') as journal_file:
+        for line in journal_file:
+            try:
+                kind, widget_id, input_token, digit_display = json.loads(line)
+            except ValueError:
+                break
+            yield JournalRecord(kind=kind, widget_id=widget_id, input_token=input_token, digit_display=digit_display)
+
+@dataclass
+class JournalReplay:
+    """
+    Final states and displays recovered from a journal.
+
+    Attributes:
+        compute_state (CalculatorState): The final state of the compute state machine.
+        ten_key_state (CalculatorState): The final state of the ten-key state machine.
+        digit_display (str): The last ten-key display sent to the compute services.
+        displays (Dict[int, Tuple[str, Optional[str], int]]): widget_id -> (latex, result, stack count).
+        add_new_line (bool): True if the session ended on a Return that opened a new line.
+        record_count (int): The number of records replayed.
+    """
+    compute_state: CalculatorState
+    ten_key_state: CalculatorState
+    digit_display: str = " "
+    displays: Dict[int, Tuple[str, Optional[str], int]] = field(default_factory=dict)
+    add_new_line: bool = False
+    record_count: int = 0
+
+def replay_journal(path: str) -> Optional[JournalReplay]:
+    """
+    Replays a journal through the compute and ten-key state machines without a GUI,
+    producing displays only for the last state of each line.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+
+    session = HeadlessSession()
+    record_count = 0
+    with contextlib.redirect_stdout(NullWriter()):
+        for record in read_journal(path):
+            record_count += 1
+            input = input_from_token(record.input_token)
+            if record.kind == CALCULATE:
+                session.apply_calculate(input)
+            elif record.kind == DIGIT:
+                session.apply_digit(input, record.digit_display, record.widget_id)
+            else:
+                session.apply_operation(input, record.widget_id)
+        displays = session.final_displays()
+
+    add_new_line = session.last_input == CalculatorInput.RETURN and session.services.handle_return(session.state)
+    return JournalReplay(compute_state=session.state,
+                         ten_key_state=session.ten_key_state,
+                         digit_display=session.services.get_digit_display(session.session),
+                         displays=displays,
+                         add_new_line=add_new_line,
+                         record_count=record_count)
@@ -0,0 +1,148 @@
+# ================================================
+# Batched JavaScript Commands for MathQuill Pages
+# ================================================
+from typing import Optional, Callable, Tuple
+from dataclasses import dataclass
+from PyQt6.QtCore import QTimer
+from latex_diff import diff_latex
+
+@dataclass
+class CommandQueueStats:
+    """
+    Counts shared by the command queues of a MathQuill stack.
+
+    Attributes:
+        requested (int): Commands requested, each of which used to be one runJavaScript call.
+        sent (int): Scripts actually sent to a page.
+        skipped_blurs (int): Blur commands dropped because the field was not focused.
+        patched_latex (int): Latex updates the page applied as an edit of the previous latex.
+        full_latex (int): Latex updates applied as the whole latex, including edits the page
+            fell back from.
+    """
+    requested: int = 0
+    sent: int = 0
+    skipped_blurs: int = 0
+    patched_latex: int = 0
+    full_latex: int = 0
+
+    @property
+    def saved(self) -> int:
+        return self.requested - self.sent
+
+    def report(self) -> str:
+        return (f"JavaScript round trips: {self.requested} requested, {self.sent} sent, "
+                f"{self.saved} saved ({self.skipped_blurs} blurs skipped); "
+                f"latex updates: {self.patched_latex} patched, {self.full_latex} full")
+
+class JsCommandQueue:
+    """
+    Collects the MathQuill commands issued for one page during an event-loop tick and
+    sends them as a single script when control returns to the loop. Within a tick the
+    last set-latex wins, the last cursor placement wins, and focus and blur cancel each
+    other out. Blurring a field that is not focused is dropped. Latex is sent as an edit
+    of the latex last sent to the page when possible.
+
+    run_script takes the script and an optional callback for the script's result.
+    """
+    def __init__(self, run_script: Callable[[str, Optional[Callable]], None],
+                 stats: Optional[CommandQueueStats] = None):
+        self.run_script = run_script
+        self.stats = stats if stats is not None else CommandQueueStats()
+        self.focused = False # Focus state of the field once the queued commands have run
+        self.sent_latex = '' # Latex of the field once the queued commands have run; a new page is empty
+        self.clear()
+
+    def clear(self):
+        self.latex: Optional[str] = None
+        self.cursor_count: Optional[int] = None
+        self.focus_change: Optional[bool] = None # True to focus, False to blur
+        self.scheduled = False
+
+    def schedule(self, calls: int = 1):
+        # calls: runJavaScript calls the command used to take on its own
+        self.stats.requested += calls
+        if not self.scheduled:
+            self.scheduled = True
+            QTimer.singleShot(0, self.flush)
+
+    def set_latex(self, latex: str):
+        self.latex = latex
+        self.schedule()
+
+    def set_cursor_position(self, stack_count: int):
+        # Placing the cursor focuses the field
+        self.cursor_count = stack_count
+        self.focus_change = True
+        self.focused = True
+        self.schedule(1 + stack_count) # One focus call plus one call per step left
+
+    def focus(self):
+        self.focus_change = True
+        self.focused = True
+        self.schedule()
+
+    def blur(self):
+        if not self.focused:
+            self.stats.requested += 1
+            self.stats.skipped_blurs += 1
+            return
+        self.cursor_count = None
+        self.focus_change = False
+        self.focused = False
+        self.schedule()
+
+    def reset(self):
+        # The page was released or reloaded: nothing is focused and nothing is pending
+        self.clear()
+        self.focused = False
+        self.sent_latex = ''
+
+    def flush(self):
+        """
+        Sends the pending commands as one script. Callers that need the commands to have
+        reached the page, e.g. before probing it, can flush early.
+        """
+        if not self.scheduled:
+            return
+        statements = []
+        patched = False
+        if self.latex is not None and self.latex != self.sent_latex:
+            patched, statement = self.latex_statement(self.sent_latex, self.latex)
+            statements.append(statement)
+            self.sent_latex = self.latex
+        if self.focus_change is False:
+            statements.append("window.mathField.blur();")
+        elif self.cursor_count is not None:
+            statements.append("window.mathField.focus(); "
+                              "window.mathField.__controller.cursor.insAtRightEnd(window.mathField.__controller.root);")
+            if self.cursor_count:
+                statements.append(f"for (var i = 0; i < {self.cursor_count}; i++) {{ window.focusAndMoveLeft(); }}")
+        elif self.focus_change:
+            statements.append("window.mathField.focus();")
+        self.clear()
+        if not statements:
+            return
+        self.stats.sent += 1
+        if patched:
+            # The script evaluates to whether the page kept the edit or fell back to the full latex
+            statements.append("latexPatched;")
+            self.run_script(" ".join(statements), self.count_patch)
+        else:
+            self.run_script(" ".join(statements), None)
+
+    def latex_statement(self, old: str, new: str) -> Tuple[bool, str]:
+        """
+        Returns whether the latex is sent as an edit, and the statement sending it.
+        """
+        patch = diff_latex(old, new)
+        if patch is None:
+            self.stats.full_latex += 1
+            return False, f"window.updateMathQuill('{new}');"
+        return True, (f"var latexPatched = window.patchMathQuill({patch.delete_count}, '{patch.insert_latex}', "
+                      f"{patch.left_moves}, '{new}');")
+
+    def count_patch(self, applied):
+        if applied is True:
+            self.stats.patched_latex += 1
+        else:
+            self.stats.full_latex += 1
@@ -0,0 +1,258 @@
+# ================================================
+# Managed Jupyter Server Lifecycle
+# ================================================
+from typing import Optional, List
+from dataclasses import dataclass
+from enum import Enum
+from urllib import request as urlrequest
+from urllib.error import URLError
+from PyQt6.QtCore import QObject, pyqtSignal
+import subprocess
+import threading
+import secrets
+import socket
+import json
+import glob
+import time
+import os
+
+POLL_INTERVAL = 0.1 # Seconds between readiness probes
+START_TIMEOUT = 60.0 # Seconds to wait for a started server to answer
+PROBE_TIMEOUT = 1.0 # Seconds to wait for one probe
+PORT_RETRIES = 50 # Further ports Jupyter tries if the suggested one was taken meanwhile
+
+class ServerState(Enum):
+    STOPPED = 'stopped'
+    STARTING = 'starting'
+    READY = 'ready'
+    FAILED = 'failed'
+
+@dataclass
+class ServerInfo:
+    """
+    A Jupyter server that answered its status API.
+
+    Attributes:
+        url (str): Base URL, ending in a slash.
+        token (str): The token requests are authorized with, empty if none.
+        pid (int): The server process id.
+        reused (bool): Whether the server was already running rather than started here.
+    """
+    url: str
+    token: str
+    pid: int
+    reused: bool
+
+    def lab_url(self) -> str:
+        return f"{self.url}lab" + (f"?token={self.token}" if self.token else '')
+
+def runtime_dir() -> str:
+    try:
+        from jupyter_core.paths import jupyter_runtime_dir
+    except ImportError: # Same default as jupyter_core
+        return os.environ.get('JUPYTER_RUNTIME_DIR',
+                              os.path.join(os.path.expanduser('~'), '.local', 'share', 'jupyter', 'runtime'))
+    return jupyter_runtime_dir()
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError: # Alive, but owned by another user
+        return True
+    except OSError:
+        return False
+    return True
+
+def probe_status(url: str, token: str) -> bool:
+    """
+    Returns True if the server at url answers its status API.
+    """
+    req = urlrequest.Request(url + 'api/status', headers={'Authorization': f'token {token}'} if token else {})
+    try:
+        with urlrequest.urlopen(req, timeout=PROBE_TIMEOUT) as response:
+            return response.status == 200
+    except (URLError, ConnectionError, OSError, ValueError):
+        return False
+
+def find_running_servers() -> List[ServerInfo]:
+    """
+    Reads the jpserver-<pid>.json files Jupyter writes for every running server, newest
+    first, skipping files left behind by processes that have exited and files without
+    a usable pid or URL.
+    """
+    servers = []
+    paths = glob.glob(os.path.join(runtime_dir(), 'jpserver-*.json'))
+    for path in sorted(paths, key=modified_time, reverse=True):
+        try:
+            with open(path) as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            continue
+        pid = info.get('pid') if isinstance(info, dict) else None
+        # pid 0 would signal our own process group and look alive
+        if not isinstance(pid, int) or pid <= 0 or not process_alive(pid):
+            continue
+        url = info.get('url')
+        if not isinstance(url, str) or not url:
+            continue
+        if not url.endswith('/'):
+            url += '/'
+        servers.append(ServerInfo(url, info.get('token', ''), pid, reused=True))
+    return servers
+
+def modified_time(path: str) -> float:
+    # A runtime file may be removed between listing and sorting
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+def suggested_port() -> int:
+    # Only a starting point: Jupyter moves on to the next free port if it has been taken
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+class JupyterServerManager(QObject):
+    """
+    Owns the Jupyter server used by the notebook windows. It reuses a running server found
+    through Jupyter's runtime files, or starts one and reads the port it bound from its
+    runtime file, and reports readiness once the server answers its HTTP API. The server
+    outlives the widgets showing it and is only stopped by shutdown().
+
+    Attributes:
+        state (ServerState): Where the server is in its lifecycle.
+        server (Optional[ServerInfo]): The server once it is ready.
+        process (Optional[subprocess.Popen]): The server process, if started here.
+        started_at (float): perf_counter time the last start began.
+    """
+    serverReady = pyqtSignal(str) # Lab URL, emitted from the probing thread
+    serverFailed = pyqtSignal(str) # Reason
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.state = ServerState.STOPPED
+        self.server: Optional[ServerInfo] = None
+        self.process: Optional[subprocess.Popen] = None
+        self.started_at = 0.0
+        self.lock = threading.Lock()
+
+    def ready_server(self) -> Optional[ServerInfo]:
+        """
+        Returns the ready server if it still answers its status API. A server that stopped
+        answering, e.g. because its process exited, is forgotten and None is returned, so
+        that ensure_running finds or starts another.
+        """
+        with self.lock:
+            server = self.server if self.state == ServerState.READY else None
+        if server is None:
+            return None
+        if probe_status(server.url, server.token):
+            return server
+        self.mark_stopped(server)
+        return None
+
+    def ensure_running(self):
+        """
+        Starts looking for or starting a server unless a live one is ready or one is on its
+        way. Callers show ready_server() if it returns one; otherwise serverReady follows.
+        """
+        if self.ready_server() is not None:
+            return
+        with self.lock:
+            if self.state in (ServerState.STARTING, ServerState.READY):
+                return
+            self.state = ServerState.STARTING
+        self.started_at = time.perf_counter()
+        threading.Thread(target=self.start_server, name="jupyter-server-probe", daemon=True).start()
+
+    def start_server(self):
+        for server in find_running_servers():
+            if probe_status(server.url, server.token):
+                self.mark_ready(server)
+                return
+        token = secrets.token_hex(24)
+        try:
+            process = subprocess.Popen(['jupyter', 'lab', '--no-browser', f'--port={suggested_port()}',
+                                        f'--ServerApp.port_retries={PORT_RETRIES}',
+                                        f'--IdentityProvider.token={token}'])
+        except OSError as e:
+            self.mark_failed(f"Could not start Jupyter Lab: {e}")
+            return
+        with self.lock:
+            if self.state != ServerState.STARTING: # Shut down while starting
+                process.terminate()
+                return
+            self.process = process
+        deadline = time.monotonic() + START_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                self.mark_failed(f"Jupyter Lab exited with code {process.returncode}")
+                return
+            # The server writes its runtime file, with the port it bound, once it listens.
+            # It is found by its token, since the jupyter launcher may run it in a child process.
+            server = next((server for server in find_running_servers() if server.token == token), None)
+            if server is not None and probe_status(server.url, server.token):
+                server.reused = False
+                self.mark_ready(server)
+                return
+            time.sleep(POLL_INTERVAL)
+        process.terminate()
+        self.mark_failed(f"Jupyter Lab did not answer within {START_TIMEOUT:.0f} s")
+
+    def mark_ready(self, server: ServerInfo):
+        with self.lock:
+            if self.state != ServerState.STARTING:
+                return
+            self.server = server
+            self.state = ServerState.READY
+        source = "Reusing" if server.reused else "Started"
+        print(f"{source} Jupyter server at {server.url} in {(time.perf_counter() - self.started_at) * 1000:.0f} ms")
+        self.serverReady.emit(server.lab_url())
+
+    def mark_stopped(self, server: ServerInfo):
+        with self.lock:
+            if self.server is not server: # Already replaced or shut down
+                return
+            process = self.process
+            self.process = None
+            self.server = None
+            self.state = ServerState.STOPPED
+        print(f"Jupyter server at {server.url} stopped answering")
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+    def mark_failed(self, reason: str):
+        with self.lock:
+            if self.state != ServerState.STARTING:
+                return
+            self.state = ServerState.FAILED
+        print(reason)
+        self.serverFailed.emit(reason)
+
+    def shutdown(self):
+        """
+        Stops the server if it was started here; a reused server belongs to someone else.
+        """
+        with self.lock:
+            process = self.process
+            self.process = None
+            self.server = None
+            self.state = ServerState.STOPPED
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+server_manager = None
+
+def get_server_manager() -> JupyterServerManager:
+    # One server for the whole application, kept warm between notebook windows
+    global server_manager
+    if server_manager is None:
+        server_manager = JupyterServerManager()
+    return server_manager
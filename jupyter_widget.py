@@ -1,8 +1,8 @@
-from PyQt6.QtCore import QUrl, QTimer
+from PyQt6.QtCore import QUrl
 from PyQt6.QtWidgets import QPushButton, QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QVBoxLayout
 from PyQt6.QtWebEngineWidgets import QWebEngineView
-import subprocess
-import socket
+from jupyter_server_manager import get_server_manager
+import html
 import sys
 
 class JupyterWidget(QWidget):
@@ -50,33 +50,27 @@ class JupyterWidget(QWidget):
 
         self.setLayout(layout)
 
-        self.jupyter_process = None
+        self.server_manager = get_server_manager()
+        self.server_manager.serverReady.connect(self.load_jupyter_lab)
+        self.server_manager.serverFailed.connect(self.show_server_error)
         self.check_server_and_start()
 
     def check_server_and_start(self):
-        if not self.is_server_running():
-            self.start_jupyter()
+        # A server kept warm from an earlier visit is shown at once
+        server = self.server_manager.ready_server()
+        if server is not None:
+            self.load_jupyter_lab(server.lab_url())
         else:
-            self.load_jupyter_lab()
+            self.server_manager.ensure_running()
 
-    def is_server_running(self):
-        import socket
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        result = sock.connect_ex(('localhost', 8888))
-        return result == 0
+    def load_jupyter_lab(self, url):
+        self.browser.setUrl(QUrl(url))
 
-    def start_jupyter(self):
-        import subprocess
-        self.jupyter_process = subprocess.Popen(['jupyter', 'lab', '--no-browser'])
-        QTimer.singleShot(2000, self.load_jupyter_lab)  # Adjust delay as needed
-
-    def load_jupyter_lab(self):
-        self.browser.setUrl(QUrl("http://localhost:8888/lab"))
+    def show_server_error(self, reason):
+        self.browser.setHtml(f"<h1>Jupyter Lab is unavailable</h1><p>{html.escape(reason)}</p>")
 
     def stop_jupyter(self):
-        if self.jupyter_process:
-            self.jupyter_process.terminate()
-            self.jupyter_process = None
+        self.server_manager.shutdown()
 
     def closeEvent(self, event):
         self.stop_jupyter()  # Ensure the server is stopped
@@ -113,35 +107,31 @@ class MainWindow(QMainWindow):
         container.setLayout(layout)
         self.setCentralWidget(container)
 
-        self.jupyter_process = None
+        self.server_manager = get_server_manager()
+        self.server_manager.serverReady.connect(self.load_jupyter_lab)
+        self.server_manager.serverFailed.connect(self.show_server_error)
         self.check_server_and_start()
 
     def check_server_and_start(self):
-        if not self.is_server_running():
-            self.start_jupyter()
+        # A server kept warm from an earlier visit is shown at once
+        server = self.server_manager.ready_server()
+        if server is not None:
+            self.load_jupyter_lab(server.lab_url())
         else:
-            self.load_jupyter_lab()
-
-    def is_server_running(self):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        result = sock.connect_ex(('localhost', 8888))
-        return result == 0
+            self.server_manager.ensure_running()
 
-    def start_jupyter(self):
-        self.jupyter_process = subprocess.Popen(['jupyter', 'lab', '--no-browser'])
-        QTimer.singleShot(2000, self.load_jupyter_lab)  # Adjust delay as needed
+    def load_jupyter_lab(self, url):
+        self.browser.setUrl(QUrl(url))
 
-    def load_jupyter_lab(self):
-        self.browser.setUrl(QUrl("http://localhost:8888/lab"))
+    def show_server_error(self, reason):
+        self.browser.setHtml(f"<h1>Jupyter Lab is unavailable</h1><p>{html.escape(reason)}</p>")
 
     def stop_jupyter(self):
-        if self.jupyter_process:
-            self.jupyter_process.terminate()
-            self.jupyter_process = None
+        self.server_manager.shutdown()
 
     def closeEvent(self, event):
         self.stop_jupyter()  # Ensure the server is stopped
-        event.accept()   
+        event.accept()
 
 # Standalone example entry point
 if __name__ == "__main__":
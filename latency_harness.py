@@ -0,0 +1,275 @@
+# ================================================
+# Keystroke-to-Pixels Latency Harness
+# ================================================
+from typing import Optional, Tuple, Dict, List, Callable
+from dataclasses import dataclass, field
+from PyQt6.QtWidgets import QApplication, QPushButton
+from PyQt6.QtCore import Qt
+from PyQt6.QtTest import QTest
+from four_function_widget import FourFunctionCalculator, FourFunctionCalculator_Window
+from ten_key_widget import TenKey
+from mathquill_widget import MathQuillWidget
+from compute_services import ComputeServices
+from replay_engine import generate_script, silence_worker
+from evaluate_load_test import percentile
+from typeset_cache import shared_typeset_cache
+import functools
+import argparse
+import random
+import json
+import time
+import sys
+import os
+
+# Pipeline stages in the order a ten-key digit passes through them. 'pixels' is the
+# MathJax typeset of the result, or the page running the key's scripts when no
+# result is typeset.
+STAGES = ['key_press', 'ten_key', 'input_clicked', 'ten_key_display', 'compute',
+          'display', 'set_latex', 'update_result', 'pixels']
+
+# Keys typed on the ten key; every other key is a calculator button
+TEN_KEY_CODES = {
+    '0': Qt.Key.Key_0, '1': Qt.Key.Key_1, '2': Qt.Key.Key_2, '3': Qt.Key.Key_3, '4': Qt.Key.Key_4,
+    '5': Qt.Key.Key_5, '6': Qt.Key.Key_6, '7': Qt.Key.Key_7, '8': Qt.Key.Key_8, '9': Qt.Key.Key_9,
+    '.': Qt.Key.Key_Period,
+}
+
+def input_type(key: str) -> str:
+    if key.isdigit():
+        return 'digit'
+    if key == '.':
+        return 'decimal'
+    if key == 'Return':
+        return 'return'
+    if key in ('(', ')'):
+        return 'parenthesis'
+    return 'operator'
+
+@dataclass
+class KeySample:
+    """
+    Timestamps of one key on its way through the calculator.
+
+    Attributes:
+        key (str): The key text.
+        input_type (str): digit, decimal, operator, parenthesis or return.
+        start (float): perf_counter time the key was injected.
+        stages (Dict[str, float]): Seconds from start to the first entry of each stage.
+        expected_typeset (Optional[Tuple[int, int]]): (widget id, sequence) of the result update to wait for.
+        end_stage (str): What ended the measurement: typeset, page or timeout.
+    """
+    key: str
+    input_type: str
+    start: float
+    stages: Dict[str, float] = field(default_factory=dict)
+    expected_typeset: Optional[Tuple[int, int]] = None
+    end_stage: str = ""
+
+class LatencyRecorder:
+    """
+    Records the first entry into each instrumented stage for the key in flight.
+    Stages are instrumented by wrapping methods, so the calculator code is unchanged.
+    """
+    def __init__(self):
+        self.current: Optional[KeySample] = None
+        self.samples: List[KeySample] = []
+
+    def begin(self, key: str) -> KeySample:
+        self.current = KeySample(key=key, input_type=input_type(key), start=time.perf_counter())
+        return self.current
+
+    def mark(self, stage: str):
+        if self.current is not None and stage not in self.current.stages:
+            self.current.stages[stage] = time.perf_counter() - self.current.start
+
+    def finish(self, keep: bool = True):
+        if keep:
+            self.samples.append(self.current)
+        self.current = None
+
+    def instrument(self, owner, name: str, stage: str, after: Optional[Callable] = None):
+        """
+        Replaces owner.name with a wrapper that marks the stage before calling it.
+        Classes must be instrumented before their instances connect the method to signals.
+        """
+        original = getattr(owner, name)
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            self.mark(stage)
+            result = original(*args, **kwargs)
+            if after is not None:
+                after(*args)
+            return result
+
+        setattr(owner, name, wrapper)
+
+class LatencyHarness:
+    """
+    Drives an offscreen FourFunctionCalculator_Window with QTest and measures each key
+    from injection until its result is typeset, as reported through the Bridge.
+    """
+    def __init__(self, timeout: float = 2.0):
+        self.timeout = timeout
+        self.recorder = LatencyRecorder()
+        recorder = self.recorder
+        recorder.instrument(TenKey, 'keyPressEvent', 'key_press')
+        recorder.instrument(TenKey, 'apply_input', 'ten_key')
+        recorder.instrument(FourFunctionCalculator, 'handleInputClicked', 'input_clicked')
+        recorder.instrument(FourFunctionCalculator, 'handleTenKeyButtonClicked', 'ten_key_display')
+        recorder.instrument(ComputeServices, 'get_display_from_state', 'display')
+        recorder.instrument(MathQuillWidget, 'set_latex', 'set_latex')
+        recorder.instrument(MathQuillWidget, 'update_result_content', 'update_result', after=self.expect_typeset)
+
+        self.window = FourFunctionCalculator_Window(prewarm=True, journal_path=None)
+        self.calculator = self.window.FourFunctionCalculator
+        recorder.instrument(self.calculator, 'compute', 'compute')
+        self.stack = self.calculator.mathquill_stack_widget
+        self.stack.typesetFinished.connect(self.on_typeset_finished)
+        self.typeset_timings: List[Tuple[int, int, float, float, bool]] = [] # As reported by typesetTimed
+        self.stack.typesetTimed.connect(lambda *timing: self.typeset_timings.append(timing))
+        self.buttons = {button.text(): button for button in self.calculator.findChildren(QPushButton) if button.text()}
+        self.window.show()
+
+    def expect_typeset(self, widget, *args):
+        if self.recorder.current is not None:
+            self.recorder.current.expected_typeset = (widget.widget_id, widget.typeset_sequence)
+
+    def on_typeset_finished(self, widget_id: int, sequence: int):
+        current = self.recorder.current
+        if current is not None and current.expected_typeset == (widget_id, sequence):
+            self.recorder.mark('pixels')
+
+    def active_widget(self) -> MathQuillWidget:
+        return self.stack.widgets_dict[self.stack.active_widget_ID]
+
+    def wait_for(self, condition: Callable[[], bool], timeout: Optional[float] = None) -> bool:
+        deadline = time.perf_counter() + (timeout if timeout is not None else self.timeout)
+        while not condition():
+            if time.perf_counter() > deadline:
+                return False
+            QTest.qWait(1)
+        return True
+
+    def wait_until_ready(self, timeout: float = 30.0) -> bool:
+        """
+        Waits until the active line's page has loaded and MathJax is ready. MathJax is loaded
+        now rather than with the first result, so its startup is not measured as a key.
+        Returns False if that takes longer than timeout seconds.
+        """
+        deadline = time.perf_counter() + timeout
+        widget = self.active_widget()
+        if not self.wait_for(lambda: widget.page_loaded, timeout):
+            return False
+        while time.perf_counter() < deadline:
+            answers = []
+            widget.web_view.page().runJavaScript("window.loadMathJax(); window.mathJaxLoaded();",
+                                                 resultCallback=answers.append)
+            if not self.wait_for(lambda: answers, deadline - time.perf_counter()):
+                return False
+            if answers[0]:
+                return True
+            QTest.qWait(10)
+        return False
+
+    def press(self, key: str, keep: bool = True) -> KeySample:
+        sample = self.recorder.begin(key)
+        if key in TEN_KEY_CODES:
+            QTest.keyClick(self.calculator.ten_key, TEN_KEY_CODES[key])
+        else:
+            QTest.mouseClick(self.buttons[key], Qt.MouseButton.LeftButton)
+
+        if sample.expected_typeset is not None:
+            sample.end_stage = 'typeset'
+        else:
+            # No result to typeset: wait until the page has run the scripts queued for this key
+            widget = self.active_widget()
+            sample.end_stage = 'page'
+            if self.wait_for(lambda: widget.page_loaded):
+                widget.commands.flush() # Send this tick's batched commands ahead of the probe
+                widget.web_view.page().runJavaScript("0", resultCallback=lambda _result: self.recorder.mark('pixels'))
+        if not self.wait_for(lambda: 'pixels' in sample.stages):
+            sample.end_stage = 'timeout'
+        self.recorder.finish(keep)
+        return sample
+
+def report(samples: List[KeySample]) -> Dict[str, dict]:
+    """
+    Returns p50/p95/p99 end-to-end latency per input type with the median offset of each stage, in ms.
+    """
+    results = {}
+    for kind in sorted({sample.input_type for sample in samples}):
+        measured = [sample for sample in samples if sample.input_type == kind and sample.end_stage != 'timeout']
+        totals = sorted(sample.stages['pixels'] for sample in measured)
+        stages = {}
+        for stage in STAGES:
+            offsets = sorted(sample.stages[stage] for sample in measured if stage in sample.stages)
+            if offsets:
+                stages[stage] = round(percentile(offsets, 0.5) * 1000, 2)
+        results[kind] = {
+            'count': len(measured),
+            'timeouts': sum(1 for sample in samples if sample.input_type == kind and sample.end_stage == 'timeout'),
+            'p50_ms': round(percentile(totals, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(totals, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(totals, 0.99) * 1000, 2),
+            'stage_p50_ms': stages,
+        }
+    return results
+
+def typeset_report(timings: List[Tuple[int, int, float, float, bool]]) -> dict:
+    """
+    Summarizes the typesets reported by the pages: time waiting for an animation frame,
+    time typesetting, and results skipped because they were already on screen.
+    """
+    typeset = [timing for timing in timings if not timing[4]]
+    waits = sorted(timing[2] for timing in timings)
+    times = sorted(timing[3] for timing in typeset)
+    return {
+        'typesets': len(typeset),
+        'skipped_unchanged': len(timings) - len(typeset),
+        'wait_p50_ms': round(percentile(waits, 0.50), 2),
+        'typeset_p50_ms': round(percentile(times, 0.50), 2),
+        'typeset_p95_ms': round(percentile(times, 0.95), 2),
+    }
+
+# Harness entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure keystroke-to-pixels latency of the four function calculator.")
+    parser.add_argument("--keys", type=int, default=300, help="measured keys")
+    parser.add_argument("--warmup", type=int, default=20, help="keys typed before measuring")
+    parser.add_argument("--timeout", type=float, default=2.0, help="seconds to wait for a key to reach the screen")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the report to this JSON file")
+    args = parser.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QApplication(sys.argv)
+    harness = LatencyHarness(timeout=args.timeout)
+    if not harness.wait_until_ready():
+        print("The calculator page or MathJax did not become ready")
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    stdout = sys.stdout
+    silence_worker() # The state machines print every transition
+    for key in generate_script(args.warmup, rng):
+        harness.press(key, keep=False)
+    for key in generate_script(args.keys, rng):
+        harness.press(key)
+    sys.stdout = stdout
+
+    results = report(harness.recorder.samples)
+    for kind, result in results.items():
+        print(f"{kind:12} n={result['count']:<5} p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms  "
+              f"p99 {result['p99_ms']:7.1f} ms  timeouts {result['timeouts']}")
+        print("             " + "  ".join(f"{stage} {offset:.1f}" for stage, offset in result['stage_p50_ms'].items()))
+    print(harness.stack.command_stats.report())
+    typesets = typeset_report(harness.typeset_timings)
+    print(f"MathJax: {typesets['typesets']} typesets, {typesets['skipped_unchanged']} skipped as unchanged, "
+          f"frame wait p50 {typesets['wait_p50_ms']:.1f} ms, typeset p50 {typesets['typeset_p50_ms']:.1f} ms "
+          f"p95 {typesets['typeset_p95_ms']:.1f} ms")
+    print(shared_typeset_cache.report())
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+    harness.window.close()
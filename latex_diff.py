@@ -0,0 +1,67 @@
+# ================================================
+# Incremental MathQuill Updates
+# ================================================
+from typing import Optional, List
+from dataclasses import dataclass
+import re
+
+# Latex as sent to the page is escaped for a JavaScript string literal, so a command
+# such as \times arrives here as \\times.
+TOKEN_PATTERN = re.compile(r'\\\\[a-zA-Z]+|\\\\.|.')
+
+# Tokens that are one MathQuill symbol: one Backspace deletes them, one Left crosses them
+FLAT_COMMANDS = {'\\\\times', '\\\\div', '\\\\cdot'}
+FLAT_CHARACTERS = set('0123456789.+-=')
+
+# Closing tokens that a single Left crosses, landing just inside them. A plain ) lands
+# there whether MathQuill parsed it as a symbol or as the end of a bracket block. The
+# display latex never uses \right, which tokenizes apart from its bracket; a kept tail
+# containing it is not patched.
+CLOSING_TOKENS = {'}', ')'}
+
+@dataclass
+class LatexPatch:
+    """
+    A cursor-based edit of a MathQuill field, applied from its right end by window.patchMathQuill.
+
+    Attributes:
+        left_moves (int): Left keystrokes from the right end to the end of the changed span.
+        delete_count (int): Backspace keystrokes removing the old span.
+        insert_latex (str): Latex written in place of the old span.
+    """
+    left_moves: int
+    delete_count: int
+    insert_latex: str
+
+def tokenize_latex(latex: str) -> List[str]:
+    return TOKEN_PATTERN.findall(latex)
+
+def is_flat(token: str) -> bool:
+    return token in FLAT_CHARACTERS or token in FLAT_COMMANDS
+
+def diff_latex(old: str, new: str) -> Optional[LatexPatch]:
+    """
+    Returns the edit turning old into new, or None if the change cannot be expressed with
+    keystrokes on single symbols, e.g. when a square root or parenthesis is added, and
+    the whole latex has to be replaced.
+    """
+    old_tokens = tokenize_latex(old)
+    new_tokens = tokenize_latex(new)
+    prefix = 0
+    limit = min(len(old_tokens), len(new_tokens))
+    while prefix < limit and old_tokens[prefix] == new_tokens[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < limit - prefix
+           and old_tokens[len(old_tokens) - 1 - suffix] == new_tokens[len(new_tokens) - 1 - suffix]):
+        suffix += 1
+    deleted = old_tokens[prefix:len(old_tokens) - suffix]
+    inserted = new_tokens[prefix:len(new_tokens) - suffix]
+    kept_end = old_tokens[len(old_tokens) - suffix:]
+
+    if not all(is_flat(token) for token in deleted + inserted):
+        return None
+    # Moving left may enter blocks through their closing token, but never leave one
+    if not all(is_flat(token) or token in CLOSING_TOKENS for token in kept_end):
+        return None
+    return LatexPatch(left_moves=len(kept_end), delete_count=len(deleted), insert_latex=''.join(inserted))
@@ -1,10 +1,10 @@
 from PyQt6.QtGui import QIcon
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtCore import Qt, QSize, QCoreApplication
 from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QLabel, QStackedWidget
 import sys
-from jupyter_widget import JupyterWidget
 from main_widgets import ButtonLabelWidget  
-from basic_calculator_widget import BasicCalculatorWindow
+# The feature windows are imported by their launch callbacks, so the menu does not
+# wait for QtWebEngine or the calculator modules to load
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -49,20 +49,21 @@ class MainWindow(QMainWindow):
 
     def show_jupyter(self):
         if self.jupyter_widget is None:
-            self.resize(800, 600)
+            from jupyter_widget import JupyterWidget
             self.jupyter_widget = JupyterWidget(self.show_main_menu, extra_param="Extra Info")
             self.stacked_widget.addWidget(self.jupyter_widget)
+        self.resize(800, 600)
         self.stacked_widget.setCurrentWidget(self.jupyter_widget)
 
     def show_calculator(self):
+        from basic_calculator_widget import BasicCalculatorWindow
         self.basic_calculator_window = BasicCalculatorWindow()
         self.basic_calculator_window.show()
 
     def show_main_menu(self):
+        # The Jupyter widget and its server stay alive, so returning to it is instant
         if self.jupyter_widget:
             self.resize(250, 150)
-            self.jupyter_widget.stop_jupyter()
-            self.jupyter_widget = None
         self.stacked_widget.setCurrentWidget(self.main_menu)
 
     def closeEvent(self, event):
@@ -70,7 +71,12 @@ class MainWindow(QMainWindow):
             self.jupyter_widget.stop_jupyter()
         event.accept()
 
-app = QApplication(sys.argv)
-window = MainWindow()
-window.show()
-sys.exit(app.exec())
+# Launcher entry point
+if __name__ == "__main__":
+    # QtWebEngine is imported after the application exists, which it only allows
+    # when OpenGL contexts are shared
+    QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+    app = QApplication(sys.argv)
+    window = MainWindow()
+    window.show()
+    sys.exit(app.exec())
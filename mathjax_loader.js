@@ -0,0 +1,55 @@
+// ================================================
+// Trimmed, On-Demand MathJax Loader
+// ================================================
+// Pages used to load the combined tex-mml build on every page load, including lines
+// that never show a result. loadMathJax loads only what our LaTeX needs: TeX input with
+// the base package (\frac, \sqrt, \left, \text, ...) and the html extension (\class),
+// and SVG output. It runs when the first result is typeset, or at page load when the
+// page URL has ?mathjax=eager.
+(function() {
+    var loading = null;
+
+    window.mathJaxLoaded = function() {
+        return !!(window.MathJax && window.MathJax.typesetPromise);
+    };
+
+    // Returns a promise resolved once MathJax is ready to typeset
+    window.loadMathJax = function() {
+        if (loading === null) {
+            loading = new Promise(function(resolve, reject) {
+                var started = performance.now();
+                window.MathJax = {
+                    loader: {
+                        load: ['input/tex-base', '[tex]/html', 'output/svg']
+                    },
+                    tex: {
+                        packages: {'[+]': ['html']},
+                        inlineMath: [['$', '$'], ['\\(', '\\)']],
+                        displayMath: [['$$', '$$'], ['\\[', '\\]']]
+                    },
+                    svg: { fontCache: 'local' }, // Self-contained output, so it can be cached and reused
+                    startup: {
+                        typeset: false, // Nothing on the page is typeset until a result arrives
+                        ready: function() {
+                            MathJax.startup.defaultReady();
+                            MathJax.startup.promise.then(function() {
+                                window.mathJaxLoadMs = performance.now() - started;
+                                resolve();
+                            });
+                        }
+                    }
+                };
+                var script = document.createElement('script');
+                script.src = 'resources/MathJax/es5/startup.js';
+                script.async = true;
+                script.onerror = reject;
+                document.head.appendChild(script);
+            });
+        }
+        return loading;
+    };
+
+    if (new URLSearchParams(window.location.search).get('mathjax') === 'eager') {
+        window.loadMathJax();
+    }
+})();
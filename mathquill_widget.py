@@ -3,42 +3,45 @@ from PyQt6.QtWidgets import QMainWindow, QApplication, QWidget, QVBoxLayout, QLa
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebEngineCore import QWebEnginePage, QWebEngineSettings
 from PyQt6.QtWebChannel import QWebChannel
-from PyQt6.QtCore import QUrl, QDir, pyqtSlot, pyqtSignal, QObject, Qt, QEvent
+from PyQt6.QtCore import QUrl, QDir, pyqtSlot, pyqtSignal, QObject, Qt, QEvent, QTimer
+from collections import OrderedDict, deque
+import bisect
+from mathtext_renderer import MathtextRenderer
+from js_command_queue import JsCommandQueue, CommandQueueStats
+from typeset_cache import shared_typeset_cache
+from asset_bundle import get_asset_profile, asset_url # Registers the asset scheme before the QApplication exists
 
 class MathJaxWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, page_pool=None):
         super().__init__()
         self.setWindowTitle('MathJax Pop-Out Window')
         self.setGeometry(500, 300, 500, 300) 
+        self.latex_content = ""
         
-        self.web_view = QWebEngineView(self)
-        self.web_page = CustomWebEnginePage(self)
-        self.web_view.setPage(self.web_page)
-        
-        html_file_path = QDir.current().absoluteFilePath("mathjax_pop-out.html")
-        self.web_view.load(QUrl.fromLocalFile(html_file_path))
-        
+        # A pooled page has usually finished loading, so the content shows at once
+        if page_pool is None:
+            page_pool = WebPagePool("mathjax_pop-out.html", size=0, parent=self)
+        self.web_view, self.web_page, self.channel, self.page_loaded = page_pool.take(self)
         self.setCentralWidget(self.web_view)
         
-        # Setup QWebChannel
-        self.bridge = self
-        self.channel = QWebChannel()
-        self.channel.registerObject("bridge", self.bridge)
-        self.web_view.page().loadFinished.connect(self.inject_script)
-    
-        self.latex_content = ""
+        # The page stores its typeset output through the bridge
+        self.bridge = self.web_page.bridge
+        self.web_view.loadFinished.connect(self.on_load_finished)
         
     def load_mathjax_content(self, latex_content):
         # load latex content to self                
         self.latex_content = latex_content        
+        if self.page_loaded:
+            self.inject_script()
+
+    def on_load_finished(self, ok):
+        self.page_loaded = True
+        self.inject_script()
 
     def inject_script(self):
         latex_content = self.latex_content
-        script = f"""
-        document.getElementById('math-content').innerHTML = '$$' + `{latex_content}` + '$$';
-        MathJax.typesetPromise([document.getElementById('math-content')]);
-        """
-        self.web_view.page().runJavaScript(script)
+        cached = shared_typeset_cache.script_argument(latex_content)
+        self.web_view.page().runJavaScript(f"window.showResult(`{latex_content}`, {cached});")
 
 '''
 Bridge Class: This class allows the Python side to receive updates from the
@@ -47,6 +50,8 @@ in the main application when changes occur in the MathQuill input field.
 '''
 class Bridge(QObject):
     clicked = pyqtSignal() # Signal to emit when the web view is clicked
+    typesetFinished = pyqtSignal(int) # Signal to emit when MathJax finished typesetting a result
+    typesetTimed = pyqtSignal(int, float, float, bool) # Sequence, ms waiting for a frame, ms typesetting, skipped as unchanged
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -67,7 +72,16 @@ class Bridge(QObject):
     @pyqtSlot()
     def clickedSignal(self):
         self.clicked.emit()
+    
+    @pyqtSlot(int, float, float, bool)
+    def typesetFinishedSignal(self, sequence, wait_ms, typeset_ms, skipped):
+        self.typesetFinished.emit(sequence)
+        self.typesetTimed.emit(sequence, wait_ms, typeset_ms, skipped)
         
+    @pyqtSlot(str, str)
+    def storeTypeset(self, latex, markup):
+        shared_typeset_cache.put(latex, markup)
+
     @pyqtSlot()
     def openMathJaxWindow(self):
         self.main_window.open_mathjax_window()
@@ -79,42 +93,177 @@ JavaScript side can be debugged and traced in the Python console.
 '''
 class CustomWebEnginePage(QWebEnginePage):
     def __init__(self, parent=None):
-        super().__init__(parent)
+        super().__init__(get_asset_profile(), parent) # Shared profile serving the in-memory asset bundle
         self.bridge = Bridge(parent)
 
     def javaScriptConsoleMessage(self, level, message, line, source):
         pass #print(f'Console message: {message} (line {line} in {source})')
 
+class WebPagePool(QObject):
+    """
+    Keeps web views whose page has already loaded an HTML file, so new lines and pop-outs
+    get a ready page instead of waiting for a load. A page taken from the pool is replaced
+    once the event loop is idle. Pages are created with a CustomWebEnginePage and a web
+    channel exposing its Bridge.
+
+    Attributes:
+        html_file (str): The HTML file the pages load, relative to the working directory.
+        size (int): The number of pages kept ready.
+    """
+    def __init__(self, html_file, size=2, parent=None):
+        super().__init__(parent)
+        self.html_file = html_file
+        self.size = size
+        self.pages = deque() # (view, page, channel), oldest first
+        self.loaded_pages = set() # Pages in the pool that finished loading
+        self.fill()
+
+    def create_page(self):
+        view = QWebEngineView()
+        page = CustomWebEnginePage(view)
+        view.setPage(page)
+        channel = QWebChannel(page)
+        channel.registerObject('bridge', page.bridge)
+        page.setWebChannel(channel)
+        view.loadFinished.connect(lambda ok, page=page: self.on_load_finished(page))
+        view.load(asset_url(self.html_file))
+        return view, page, channel
+
+    def on_load_finished(self, page):
+        if any(pooled_page is page for _view, pooled_page, _channel in self.pages):
+            self.loaded_pages.add(page)
+
+    def fill(self):
+        while len(self.pages) < self.size:
+            self.pages.append(self.create_page())
+
+    def take(self, owner):
+        """
+        Hands a page over to owner, preferring one that finished loading, and makes owner
+        the parent of the view and the receiver of the bridge's calls.
+
+        Returns:
+            tuple: (view, page, channel, loaded)
+        """
+        entry = next((entry for entry in self.pages if entry[1] in self.loaded_pages), None)
+        if entry is not None:
+            self.pages.remove(entry)
+        elif self.pages:
+            entry = self.pages.popleft()
+        else:
+            entry = self.create_page()
+        view, page, channel = entry
+        loaded = page in self.loaded_pages
+        self.loaded_pages.discard(page)
+        view.setParent(owner)
+        page.bridge.setParent(owner)
+        page.bridge.main_window = owner
+        QTimer.singleShot(0, self.fill)
+        return view, page, channel, loaded
+
+page_pools = {} # html_file -> WebPagePool
+
+def get_page_pool(html_file, size=2):
+    """
+    Returns the process-wide pool for an HTML file, created on first use. A QApplication must exist.
+    """
+    if html_file not in page_pools:
+        page_pools[html_file] = WebPagePool(html_file, size)
+    return page_pools[html_file]
+
+def get_popout_pool():
+    """
+    Returns the pool of MathJax pop-out pages. Lines and worksheets take it when they are
+    created rather than on the first click, so the first pop-out gets a loaded page.
+    """
+    return get_page_pool("mathjax_pop-out.html", size=1)
+
+class PageScriptRunner:
+    """
+    Runs scripts on a web page. Scripts issued before the page finished loading would be
+    dropped by runJavaScript, so they are held and run in order once it has.
+
+    Attributes:
+        page (QWebEnginePage): The page the scripts run on.
+        loaded (bool): Whether the page finished loading.
+        pending (list): (script, callback) pairs held until the page is loaded.
+    """
+    def __init__(self, page):
+        self.page = page
+        self.loaded = False
+        self.pending = []
+
+    def run(self, script, callback=None):
+        # callback, if given, receives the value the script evaluates to
+        if self.loaded:
+            self.run_now(script, callback)
+        else:
+            self.pending.append((script, callback))
+
+    def mark_loaded(self):
+        self.loaded = True
+        pending, self.pending = self.pending, []
+        for script, callback in pending:
+            self.run_now(script, callback)
+
+    def run_now(self, script, callback):
+        if callback is not None:
+            self.page.runJavaScript(script, resultCallback=callback)
+        else:
+            self.page.runJavaScript(script)
+
+'''
+SnapshotLabel Class: Shows the last rendering of a MathQuill line whose web view was
+released, and reports clicks so the line can be brought back for editing.
+'''
+class SnapshotLabel(QLabel):
+    clicked = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        self.setStyleSheet("border: 2px solid #ccc; background: #fff;")
+
+    def mousePressEvent(self, event):
+        self.clicked.emit()
+        super().mousePressEvent(event)
+
 class MathQuillWidget(QWidget):
     latexChanged = pyqtSlot(str)
     clicked = pyqtSignal(int) # Signal to be emitted when the widget is clicked
     blurSignal = pyqtSignal() # Define the blur signal
+    pageReady = pyqtSignal(int) # Emitted with the widget id once the MathQuill page has loaded
+    typesetFinished = pyqtSignal(int, int) # Emitted with the widget id and result sequence once MathJax has typeset it
+    typesetTimed = pyqtSignal(int, int, float, float, bool) # Widget id followed by Bridge.typesetTimed
     
-    def __init__(self, widget_id, parent=None):
+    def __init__(self, widget_id, parent=None, command_stats=None, page_pool=None):
         super().__init__(parent)        
         self.widget_id = widget_id
+        self.page_pool = page_pool if page_pool is not None else WebPagePool("mathquill_template2.html", size=0, parent=self)
+        self.popout_pool = get_popout_pool()
         self.parent_window = parent  # Reference to the main window
         self.id_label = QLabel(f"MathQuill Widget {widget_id}")
         self.result_latex = ''
+        self.latex = '' # Content of the line, replayed when the web view is recreated
+        self.static_pixmap = None # Mathtext rendering shown once the line is finished
+        self.typeset_sequence = 0 # Counts result updates so their typeset can be matched
+        self.scripts = None # PageScriptRunner of the live web view
+        self.commands = JsCommandQueue(self.run_script, command_stats) # Batches MathQuill commands per event-loop tick
+        self.web_view = None
+        self.web_page = None
+        self.channel = None
         self.blurSignal.connect(self.on_blur_signal) # Connect the blur signal to the blur handler
         
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)  # Set margins to 0
         layout.setSpacing(5)  # Adjust spacing as needed, e.g., 5 pixels
 
-        self.web_view = QWebEngineView(self)
-        
-        self.web_page = CustomWebEnginePage(self)
-        self.web_view.setPage(self.web_page)
-        # Set size policy to expanding for both directions
-        self.web_view.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        self.web_view.setFixedHeight(65)  # Initial and minimum height
-        self.web_view.setMinimumHeight(65)  # Set minimum height to 50 pixels
-
-        layout.addWidget(self.web_view, 0, Qt.AlignmentFlag.AlignBottom)
-        
-        # Install an event filter on the web view to capture mouse events
-        self.web_view.installEventFilter(self)
+        # Stands in for the web view while the line is off screen
+        self.snapshot_label = SnapshotLabel(self)
+        self.snapshot_label.setFixedHeight(65)
+        self.snapshot_label.setVisible(False)
+        self.snapshot_label.clicked.connect(self.handle_click)
+        layout.addWidget(self.snapshot_label, 0, Qt.AlignmentFlag.AlignBottom)
 
         self.frame = QFrame(self)
         self.frame.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Fixed)
@@ -139,35 +288,125 @@ class MathQuillWidget(QWidget):
         spacer = QSpacerItem(0, 0, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding)
         layout.addItem(spacer)
 
-        html_file_path = QDir.current().absoluteFilePath("mathquill_template2.html")
-        self.web_view.load(QUrl.fromLocalFile(html_file_path))
+        self.create_web_view()
+    
+    def create_web_view(self):
+        self.web_view, self.web_page, self.channel, loaded = self.page_pool.take(self)
+        self.scripts = PageScriptRunner(self.web_page)
+        # Set size policy to expanding for both directions
+        self.web_view.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.web_view.setFixedHeight(65)  # Initial and minimum height
+        self.web_view.setMinimumHeight(65)  # Set minimum height to 50 pixels
 
-        self.channel = QWebChannel()
-        self.channel.registerObject('bridge', self.web_page.bridge)
-        self.web_page.setWebChannel(self.channel)
+        self.layout().insertWidget(0, self.web_view, 0, Qt.AlignmentFlag.AlignBottom)
+        
+        # Install an event filter on the web view to capture mouse events
+        self.web_view.installEventFilter(self)
+
+        self.web_view.loadFinished.connect(self.on_load_finished)
+        if loaded:
+            # Signal readiness once the caller has connected to pageReady
+            web_view = self.web_view
+            QTimer.singleShot(0, lambda: self.on_load_finished(True) if self.web_view is web_view else None)
         
         # Connect the clicked signal from the bridge to the widget's clicked signal
         self.web_page.bridge.clicked.connect(self.handle_click)
+        self.web_page.bridge.typesetFinished.connect(lambda sequence: self.typesetFinished.emit(self.widget_id, sequence))
+        self.web_page.bridge.typesetTimed.connect(lambda *timing: self.typesetTimed.emit(self.widget_id, *timing))
+    
+    def is_live(self) -> bool:
+        return self.web_view is not None
+
+    @property
+    def page_loaded(self) -> bool:
+        return self.scripts is not None and self.scripts.loaded
+    
+    def dehydrate(self, snapshots):
+        """
+        Releases the web view of an off-screen line and shows a snapshot of it instead.
+        The line's content is kept and replayed by rehydrate.
+        """
+        if self.web_view is None:
+            return
+        if self.static_pixmap is not None:
+            self.show_snapshot(self.static_pixmap)
+        elif self.page_loaded:
+            snapshots.put(self, self.web_view.grab())
+        else:
+            self.show_text_snapshot()
+        self.snapshot_label.setVisible(True)
+
+        self.layout().removeWidget(self.web_view)
+        self.web_view.hide()
+        self.web_page.bridge.deleteLater()
+        self.web_view.deleteLater()
+        self.web_page.deleteLater()
+        self.channel.deleteLater()
+        self.web_view = None
+        self.web_page = None
+        self.channel = None
+        self.scripts = None
+        self.commands.reset()
+    
+    def rehydrate(self, snapshots):
+        """
+        Recreates the web view of a line scrolled back into view and restores its content.
+        """
+        if self.web_view is not None:
+            return
+        snapshots.discard(self)
+        # A finished line brought back is edited again, so its mathtext rendering no longer
+        # stands for it; it is virtualized like any other line from now on
+        self.static_pixmap = None
+        self.create_web_view()
+        self.snapshot_label.setVisible(False)
+        self.snapshot_label.clear()
+        if self.latex:
+            self.commands.set_latex(self.latex)
+        if self.result_latex:
+            self.update_result_content(self.result_latex)
+    
+    def finalize(self, pixmap, snapshots):
+        """
+        Swaps the web view of a finished line for its mathtext rendering.
+        """
+        self.static_pixmap = pixmap
+        snapshots.discard(self)
+        self.show_snapshot(pixmap)
+        self.dehydrate(snapshots)
+    
+    def show_snapshot(self, pixmap):
+        self.snapshot_label.setPixmap(pixmap)
+    
+    def show_text_snapshot(self):
+        # Plain text of the line for when no snapshot image is kept
+        text = f"{self.latex}    {self.result_latex}".replace('\\\\', '\\')
+        self.snapshot_label.setText(text)
+    
+    def run_script(self, script, callback=None):
+        # Lines without a web view drop scripts; their content is replayed on rehydrate
+        if self.scripts is not None:
+            self.scripts.run(script, callback)
+    
+    def on_load_finished(self, ok):
+        self.scripts.mark_loaded()
+        self.pageReady.emit(self.widget_id)
     
     def set_mathfield_focus(self): 
-        # Execute JavaScript to set focus in MathQuill
-        self.web_view.page().runJavaScript("window.mathField.focus();")                
+        # Set focus in MathQuill
+        self.commands.focus()
     
     def set_cursor_position(self,stack_count): 
-        # Execute JavaScript to set cursor position in MathQuill
-        self.web_view.page().runJavaScript("window.mathField.focus(); window.mathField.__controller.cursor.insAtRightEnd(window.mathField.__controller.root);")        
-        count = 0
-        while count < stack_count:
-            self.set_cursor_position_left()
-            count+=1
+        # Set cursor position in MathQuill, stack_count steps left of the right end
+        self.commands.set_cursor_position(stack_count)
         
     def remove_cursor_focus(self):
-        # Execute JavaScript to set focus to a hidden input field
-        self.web_view.page().runJavaScript("window.mathField.blur();")
+        # Blur MathQuill; dropped if it is not focused
+        self.commands.blur()
         
     def set_cursor_position_left(self): 
         # Execute JavaScript to set cursor position in MathQuill        
-        self.web_view.page().runJavaScript("window.focusAndMoveLeft();")
+        self.run_script("window.focusAndMoveLeft();")
     
     def on_blur_signal(self):
         self.remove_cursor_focus()
@@ -195,8 +434,8 @@ class MathQuillWidget(QWidget):
         return parsed_latex
 
     def set_latex(self, latex):
-        script = f"window.updateMathQuill('{latex}');"
-        self.web_view.page().runJavaScript(script)
+        self.latex = latex
+        self.commands.set_latex(latex)
 
     def get_latex_output(self):
         return self.latex_label.text()
@@ -217,18 +456,38 @@ class MathQuillWidget(QWidget):
     @pyqtSlot(str)
     def update_result_content(self, result):
         self.result_latex = result
-        script = f"""
-        document.getElementById('result-value').innerHTML ='$$' + `{result}` + '$$';
-        MathJax.typesetPromise([document.getElementById('result-value')]);
-        """
-        self.web_view.page().runJavaScript(script)
+        self.typeset_sequence += 1
+        # The page keeps only the latest result and typesets it on the next animation frame,
+        # unless the output for this latex is already cached
+        cached = shared_typeset_cache.script_argument(result)
+        self.run_script(f"window.updateResult(`{result}`, {self.typeset_sequence}, {cached});")
     
     def open_mathjax_window(self):
        latex_content = self.result_latex       
-       self.mathjax_window = MathJaxWindow()
+       self.mathjax_window = MathJaxWindow(self.popout_pool)
        self.mathjax_window.show()
        self.mathjax_window.load_mathjax_content(latex_content)       
 
+class SnapshotCache:
+    """
+    Keeps the pixmaps of the most recently released lines. When a line's snapshot is
+    evicted, the line falls back to a plain text rendering of its content.
+    """
+    def __init__(self, capacity=200):
+        self.capacity = capacity
+        self.snapshots = OrderedDict() # widget -> pixmap, least recently used first
+
+    def put(self, widget, pixmap):
+        self.snapshots[widget] = pixmap
+        self.snapshots.move_to_end(widget)
+        widget.show_snapshot(pixmap)
+        while len(self.snapshots) > self.capacity:
+            evicted, _ = self.snapshots.popitem(last=False)
+            evicted.show_text_snapshot()
+
+    def discard(self, widget):
+        self.snapshots.pop(widget, None)
+
 import sys
 from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QPushButton, QLineEdit, QScrollArea, QLabel, QSizePolicy, QSpacerItem
 from PyQt6.QtCore import Qt, QTimer
@@ -253,13 +512,30 @@ class MathQuillStackWidget(QWidget):
     resultUpdated = pyqtSignal(str)
     widgetClicked = pyqtSignal(int)
     blurAllWidgets = pyqtSignal() # Signal to blur all widgets
+    typesetFinished = pyqtSignal(int, int) # Relays MathQuillWidget.typesetFinished from every widget
+    typesetTimed = pyqtSignal(int, int, float, float, bool) # Relays MathQuillWidget.typesetTimed from every widget
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, virtualize=True, live_margin=2, snapshot_capacity=200, static_history=True):
         super().__init__(parent)
         self.setWindowTitle("MathQuillStack in PyQt6")
         self.setGeometry(100, 100, 800, 600)
         self.control_visibility = False  # Control visibility variable
         self.active_widget_ID = 0
+
+        # Virtualization: only lines near the viewport keep a web view, the others show a snapshot
+        self.virtualize = virtualize
+        self.live_margin = live_margin # Lines kept live above and below the visible ones
+        self.snapshots = SnapshotCache(snapshot_capacity)
+        self.line_widgets = [] # MathQuill widgets in layout order
+        self.live_widgets = set() # Widgets that currently hold a web view
+        self.command_stats = CommandQueueStats() # Round trips saved by the widgets' command queues
+        self.page_pool = get_page_pool("mathquill_template2.html") # Loaded pages for new and rehydrated lines
+        self.virtualize_timer = QTimer(self)
+        self.virtualize_timer.setSingleShot(True)
+        self.virtualize_timer.setInterval(30) # Coalesces the scroll events of one gesture
+        self.virtualize_timer.timeout.connect(self.update_live_lines)
+        # Finished lines are drawn with mathtext and keep no web view
+        self.renderer = MathtextRenderer() if static_history else None
         
         self.layout = QVBoxLayout(self)
 
@@ -325,6 +601,7 @@ class MathQuillStackWidget(QWidget):
         self.scroll_area.setWidgetResizable(True)
         self.scroll_area.setWidget(self.scroll_area_widget)
         self.layout.addWidget(self.scroll_area)
+        self.scroll_area.verticalScrollBar().valueChanged.connect(self.schedule_live_lines_update)
         
         self.widgets_dict = {} # Dictionary to keep track of widgets
 
@@ -372,22 +649,38 @@ class MathQuillStackWidget(QWidget):
         self.add_widget_button.setVisible(visible)
 
     def add_mathquill_widget(self):        
+        if self.line_widgets:
+            self.finalize_line(self.line_widgets[-1])
         widget_id = self.scroll_area_layout.count()
         self.active_widget_ID = widget_id
-        widget = MathQuillWidget(widget_id)
+        widget = MathQuillWidget(widget_id, command_stats=self.command_stats, page_pool=self.page_pool)
         widget.clicked.connect(self.handle_widget_click)
+        widget.typesetFinished.connect(self.typesetFinished)
+        widget.typesetTimed.connect(self.typesetTimed)
         self.blurAllWidgets.connect(widget.blurSignal) # Connect the blur signal
         self.scroll_area_layout.insertWidget(self.scroll_area_layout.count(), widget)  # Insert above the stretch label
         self.widgets_dict[widget_id] = widget # Add widget to dictionary
+        self.line_widgets.append(widget)
+        self.live_widgets.add(widget)
         QTimer.singleShot(100, self.scroll_to_bottom)  # Ensure the scrollbar updates correctly
+        self.schedule_live_lines_update()
         self.blurAllWidgets.emit()
-        QTimer.singleShot(500, lambda: widget.set_mathfield_focus())
-        QTimer.singleShot(500, lambda: widget.set_cursor_position(0))
+        # Commands wait in the widget until its page is ready, so no delay is needed
+        widget.set_mathfield_focus()
+        widget.set_cursor_position(0)
         
+    def finalize_line(self, widget):
+        # Called on Return: the line is finished, so it only needs to be drawn
+        if self.renderer is None or not widget.latex:
+            return
+        pixmap = self.renderer.render(widget.latex, widget.result_latex)
+        if pixmap is not None:
+            widget.finalize(pixmap, self.snapshots)
+            self.live_widgets.discard(widget)
+    
     def handle_widget_click(self, widget_id):
-        self.widgets_dict[widget_id].set_mathfield_focus()
-        self.widgets_dict[widget_id].handle_click        
-        print()
+        self.widgets_dict[widget_id].rehydrate(self.snapshots) # A clicked snapshot becomes an editor again
+        self.live_widgets.add(self.widgets_dict[widget_id])
         for id in self.widgets_dict:
             if id != widget_id:                
                 self.widgets_dict[id].remove_cursor_focus()
@@ -419,6 +712,41 @@ class MathQuillStackWidget(QWidget):
     def resizeEvent(self, event):
         super().resizeEvent(event)
         QTimer.singleShot(100, self.scroll_to_bottom) # Ensure the scrollbar updates correctly
+        self.schedule_live_lines_update()
+
+    def schedule_live_lines_update(self):
+        if self.virtualize:
+            self.virtualize_timer.start()
+
+    def visible_line_range(self):
+        """
+        Returns the (first, last) indices into line_widgets of the lines overlapping the viewport.
+        Lines are laid out top to bottom, so both ends are found by bisection.
+        """
+        top = self.scroll_area.verticalScrollBar().value()
+        bottom = top + self.scroll_area.viewport().height()
+        first = bisect.bisect_right(self.line_widgets, top, key=lambda widget: widget.geometry().bottom())
+        last = bisect.bisect_left(self.line_widgets, bottom, key=lambda widget: widget.geometry().top()) - 1
+        return first, last
+
+    def update_live_lines(self):
+        """
+        Keeps web views only for the visible lines, live_margin lines around them and the
+        active line; every other line releases its page and shows a snapshot.
+        """
+        if not self.line_widgets:
+            return
+        first, last = self.visible_line_range()
+        first = max(first - self.live_margin, 0)
+        last = min(last + self.live_margin, len(self.line_widgets) - 1)
+        # Finished lines keep their mathtext rendering until they are clicked
+        live_widgets = {widget for widget in self.line_widgets[first:last + 1] if widget.static_pixmap is None}
+        live_widgets.add(self.widgets_dict[self.active_widget_ID])
+        for widget in self.live_widgets - live_widgets:
+            widget.dehydrate(self.snapshots)
+        for widget in live_widgets - self.live_widgets:
+            widget.rehydrate(self.snapshots)
+        self.live_widgets = live_widgets
     
     def scroll_to_bottom(self):
         self.scroll_area.verticalScrollBar().setValue(self.scroll_area.verticalScrollBar().maximum())
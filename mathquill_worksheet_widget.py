@@ -0,0 +1,193 @@
+# ================================================
+# Single-Page MathQuill Worksheet
+# ================================================
+import sys
+import json
+from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QLineEdit, QLabel
+from PyQt6.QtWebEngineWidgets import QWebEngineView
+from PyQt6.QtWebEngineCore import QWebEnginePage
+from PyQt6.QtWebChannel import QWebChannel
+from PyQt6.QtCore import pyqtSlot, pyqtSignal, QObject
+from mathquill_widget import MathJaxWindow, PageScriptRunner, get_popout_pool
+from typeset_cache import shared_typeset_cache, page_latex
+from asset_bundle import get_asset_profile, asset_url
+
+FIRST_WIDGET_ID = 2 # Same ids as MathQuillStackWidget, whose layout holds two items before the first line
+
+'''
+WorksheetBridge Class: The one channel object of the worksheet page. Every call
+from JavaScript carries the widget id of the line it concerns.
+'''
+class WorksheetBridge(QObject):
+    clicked = pyqtSignal(int) # Signal to emit when a line is clicked
+    latexChanged = pyqtSignal(int, str) # Signal to emit when a line is edited in MathQuill
+    typesetFinished = pyqtSignal(int, int) # Signal to emit when MathJax finished typesetting a result
+    typesetTimed = pyqtSignal(int, int, float, float, bool) # Widget id, sequence, ms waiting for a frame, ms typesetting, skipped as unchanged
+    mathJaxWindowRequested = pyqtSignal(int) # Signal to emit when a result is clicked
+
+    @pyqtSlot(int)
+    def clickedSignal(self, widget_id):
+        self.clicked.emit(widget_id)
+
+    @pyqtSlot(int, str)
+    def latexUpdated(self, widget_id, latex):
+        self.latexChanged.emit(widget_id, latex)
+
+    @pyqtSlot(int, int, float, float, bool)
+    def typesetFinishedSignal(self, widget_id, sequence, wait_ms, typeset_ms, skipped):
+        self.typesetFinished.emit(widget_id, sequence)
+        self.typesetTimed.emit(widget_id, sequence, wait_ms, typeset_ms, skipped)
+
+    @pyqtSlot(str, str)
+    def storeTypeset(self, latex, markup):
+        shared_typeset_cache.put(latex, markup)
+
+    @pyqtSlot(int)
+    def openMathJaxWindow(self, widget_id):
+        self.mathJaxWindowRequested.emit(widget_id)
+
+class WorksheetPage(QWebEnginePage):
+    def __init__(self, parent=None):
+        super().__init__(get_asset_profile(), parent)
+
+    def javaScriptConsoleMessage(self, level, message, line, source):
+        pass #print(f'Console message: {message} (line {line} in {source})')
+
+class MathQuillWorksheetWidget(QWidget):
+    """
+    A worksheet whose lines are MathQuill fields in one shared page, instead of one
+    QWebEngineView per line. Offers the interface of MathQuillStackWidget used by the
+    calculator: latex_input, result_input, active_widget_ID, add_mathquill_widget,
+    update_last_widget and update_result.
+    """
+    latexUpdated = pyqtSignal(str)
+    resultUpdated = pyqtSignal(str)
+    widgetClicked = pyqtSignal(int)
+    typesetFinished = pyqtSignal(int, int) # Emitted with the widget id and result sequence once MathJax has typeset it
+    typesetTimed = pyqtSignal(int, int, float, float, bool) # Relays WorksheetBridge.typesetTimed
+    pageReady = pyqtSignal(int) # Emitted with the active widget id once the worksheet page has loaded
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("MathQuill Worksheet in PyQt6")
+        self.active_widget_ID = 0
+        self.line_ids = [] # Widget ids of the lines, in order
+        self.result_latex = {} # Last result of each line, for the MathJax pop-out
+        self.typeset_sequence = 0 # Counts result updates so their typeset can be matched
+        self.popout_pool = get_popout_pool()
+
+        self.layout = QVBoxLayout(self)
+        self.layout.setContentsMargins(0, 0, 0, 0)
+
+        self.latex_input = QLineEdit()
+        self.latex_input.setPlaceholderText("Enter LaTeX here...")
+        self.layout.addWidget(self.latex_input)
+
+        self.result_input = QLineEdit()
+        self.result_input.setPlaceholderText("Enter result here...")
+        self.layout.addWidget(self.result_input)
+
+        self.web_view = QWebEngineView(self)
+        self.web_page = WorksheetPage(self)
+        self.web_view.setPage(self.web_page)
+        self.scripts = PageScriptRunner(self.web_page)
+        self.layout.addWidget(self.web_view)
+
+        self.bridge = WorksheetBridge(self)
+        self.channel = QWebChannel()
+        self.channel.registerObject('bridge', self.bridge)
+        self.web_page.setWebChannel(self.channel)
+        self.bridge.clicked.connect(self.handle_widget_click)
+        self.bridge.latexChanged.connect(lambda widget_id, latex: self.latexUpdated.emit(latex))
+        self.bridge.typesetFinished.connect(self.typesetFinished)
+        self.bridge.typesetTimed.connect(self.typesetTimed)
+        self.bridge.mathJaxWindowRequested.connect(self.open_mathjax_window)
+
+        self.web_view.loadFinished.connect(self.on_load_finished)
+        self.web_view.load(asset_url("mathquill_worksheet.html"))
+
+        self.set_controls_visibility(False)
+        self.add_mathquill_widget()
+
+    @property
+    def page_loaded(self) -> bool:
+        return self.scripts.loaded
+
+    def run_script(self, script):
+        self.scripts.run(script)
+
+    def on_load_finished(self, ok):
+        self.scripts.mark_loaded()
+        self.pageReady.emit(self.active_widget_ID)
+
+    def set_controls_visibility(self, visible):
+        """Set the visibility of inputs."""
+        self.latex_input.setVisible(visible)
+        self.result_input.setVisible(visible)
+
+    def add_mathquill_widget(self):
+        widget_id = self.line_ids[-1] + 1 if self.line_ids else FIRST_WIDGET_ID
+        self.line_ids.append(widget_id)
+        self.active_widget_ID = widget_id
+        self.run_script(f"window.addLine({widget_id}); window.setCursorPosition({widget_id}, 0);")
+
+    def handle_widget_click(self, widget_id):
+        self.run_script(f"window.focusLine({widget_id});")
+        self.widgetClicked.emit(widget_id)
+
+    def update_last_widget(self, stack_count):
+        if self.line_ids:
+            widget_id = self.line_ids[-1]
+            # Sent as JSON string literals of the latex the page sees, so quotes, backticks
+            # and ${ in the input stay text
+            latex = json.dumps(page_latex(self.latex_input.text()))
+            self.run_script(f"window.updateMathQuill({widget_id}, {latex}); "
+                            f"window.setCursorPosition({widget_id}, {stack_count});")
+
+    def update_result(self):
+        if self.line_ids:
+            widget_id = self.line_ids[-1]
+            result = self.result_input.text()
+            self.result_latex[widget_id] = result
+            self.typeset_sequence += 1
+            cached = shared_typeset_cache.script_argument(result)
+            self.run_script(f"window.updateResult({widget_id}, {json.dumps(page_latex(result))}, "
+                            f"{self.typeset_sequence}, {cached});")
+
+    def update_main_text_input(self, latex):
+        self.latex_input.setText(latex)
+
+    def open_mathjax_window(self, widget_id):
+        self.mathjax_window = MathJaxWindow(self.popout_pool)
+        self.mathjax_window.show()
+        self.mathjax_window.load_mathjax_content(self.result_latex.get(widget_id, ''))
+
+class WorksheetWindow(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("MathQuill Worksheet")
+        self.setGeometry(100, 100, 800, 600)
+
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        layout = QVBoxLayout(central_widget)
+
+        self.worksheet = MathQuillWorksheetWidget(self)
+        self.worksheet.set_controls_visibility(True)
+        layout.addWidget(self.worksheet)
+
+        self.clicked_label = QLabel("Clicked Widget ID: None")
+        layout.addWidget(self.clicked_label)
+        self.worksheet.widgetClicked.connect(self.update_label)
+        self.worksheet.latex_input.returnPressed.connect(lambda: self.worksheet.update_last_widget(0))
+        self.worksheet.result_input.returnPressed.connect(self.worksheet.update_result)
+
+    def update_label(self, widget_id):
+        self.clicked_label.setText(f"Clicked Widget ID: {widget_id}")
+
+# Standalone example entry point
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = WorksheetWindow()
+    window.show()
+    sys.exit(app.exec())
@@ -0,0 +1,130 @@
+# ================================================
+# Mathtext Renderer for Finished Lines
+# ================================================
+from typing import Optional, Tuple
+from collections import OrderedDict
+import re
+import io
+
+RESULT_COLOR = 'green' # Same as .result-value in mathquill_template2.html
+RESULT_GAP = 24 # Points between the expression and the result
+
+# Wrappers MathJax understands but mathtext does not; their content is drawn as is
+EQUATION_PATTERN = re.compile(r'\\begin\{equation\*?\}(.*?)\\end\{equation\*?\}', re.DOTALL)
+CLASS_PREFIX = re.compile(r'\\class\{[^{}]*\}\{')
+TEXT_PREFIX = re.compile(r'\\text\{')
+
+mathtext_modules = None
+
+def load_mathtext():
+    """
+    Imports the matplotlib pieces used for rendering on first use, so windows that never
+    finish a line do not pay for matplotlib. Returns None if matplotlib is unavailable.
+    """
+    global mathtext_modules
+    if mathtext_modules is None:
+        try:
+            from matplotlib.mathtext import MathTextParser
+            from matplotlib.font_manager import FontProperties
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+        except ImportError:
+            print("matplotlib is not available, finished lines keep their web view")
+            mathtext_modules = False
+        else:
+            mathtext_modules = (MathTextParser("path"), FontProperties, Figure, FigureCanvasAgg)
+    return mathtext_modules or None
+
+def unwrap(latex: str, prefix: re.Pattern) -> str:
+    """
+    Replaces every command matched by prefix, up to and including the opening brace of its
+    last argument, with the content of that argument.
+    """
+    match = prefix.search(latex)
+    while match:
+        depth = 1
+        end = match.end()
+        while end < len(latex) and depth > 0:
+            depth += {'{': 1, '}': -1}.get(latex[end], 0)
+            end += 1
+        if depth > 0: # Unbalanced, leave the rest for mathtext to reject
+            break
+        latex = latex[:match.start()] + latex[match.end():end - 1] + latex[end:]
+        match = prefix.search(latex, match.start())
+    return latex
+
+def to_mathtext(latex: str) -> str:
+    # The display latex is escaped for JavaScript string literals, with doubled backslashes.
+    # MathJax typesets results in display style, so fractions are drawn full size.
+    latex = latex.replace('\\\\', '\\')
+    latex = EQUATION_PATTERN.sub(lambda match: match.group(1), latex)
+    latex = unwrap(unwrap(latex, CLASS_PREFIX), TEXT_PREFIX)
+    return '$' + latex.strip().replace('\\frac', '\\dfrac') + '$'
+
+def render_png(expression: str, result: str, fontsize: float = 12, dpi: float = 96) -> Optional[bytes]:
+    """
+    Draws the expression and its result with mathtext, laid out like a MathQuill line:
+    the expression on the left and the result in green on the right.
+
+    Returns:
+        Optional[bytes]: A transparent PNG, or None if matplotlib is unavailable or
+        mathtext cannot parse the latex.
+    """
+    modules = load_mathtext()
+    if modules is None:
+        return None
+    parser, FontProperties, Figure, FigureCanvasAgg = modules
+    prop = FontProperties(size=fontsize)
+    parts = [(to_mathtext(expression), 'black')]
+    if result and result != expression:
+        parts.append((to_mathtext(result), RESULT_COLOR))
+    try:
+        # Sizes in points at 72 dpi, as matplotlib.mathtext.math_to_image measures them
+        extents = [parser.parse(text, dpi=72, prop=prop)[:3] for text, _ in parts]
+    except ValueError:
+        return None
+    width = sum(extent[0] for extent in extents) + RESULT_GAP * (len(parts) - 1)
+    height = max(extent[1] for extent in extents)
+    depth = max(extent[2] for extent in extents)
+
+    figure = Figure(figsize=(width / 72, height / 72))
+    FigureCanvasAgg(figure)
+    x = 0
+    for (text, color), (part_width, _, _) in zip(parts, extents):
+        figure.text(x / width, depth / height, text, fontproperties=prop, color=color)
+        x += part_width + RESULT_GAP
+    buffer = io.BytesIO()
+    figure.savefig(buffer, dpi=dpi, format='png', transparent=True)
+    return buffer.getvalue()
+
+class MathtextRenderer:
+    """
+    Renders finished worksheet lines into pixmaps, so they can be shown without a web view.
+    Pixmaps are cached by content; recomputed lines often repeat, e.g. the same result.
+
+    Attributes:
+        capacity (int): Most pixmaps kept in the cache.
+        fontsize (float): Font size in points.
+        dpi (float): Resolution the lines are drawn at.
+    """
+    def __init__(self, capacity: int = 500, fontsize: float = 12, dpi: float = 96):
+        self.capacity = capacity
+        self.fontsize = fontsize
+        self.dpi = dpi
+        self.cache: "OrderedDict[Tuple[str, str], Optional[QPixmap]]" = OrderedDict()
+
+    def render(self, expression: str, result: str) -> Optional["QPixmap"]:
+        from PyQt6.QtGui import QPixmap # Only the pixmap cache needs Qt; render_png does not
+        key = (expression, result)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        png = render_png(expression, result, self.fontsize, self.dpi)
+        pixmap = None
+        if png is not None:
+            pixmap = QPixmap()
+            pixmap.loadFromData(png, 'PNG')
+        self.cache[key] = pixmap
+        while len(self.cache) > self.capacity:
+            self.cache.popitem(last=False)
+        return pixmap
@@ -0,0 +1,240 @@
+# ================================================
+# Headless Keystroke Replay Engine
+# ================================================
+from typing import Optional, Tuple, Dict, List, Iterable, Sequence
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from calculator_domain import (CalculatorState, CalculatorInput, ResultStateData)
+from calculator_services import CalculatorServices
+from compute_services import ComputeServices
+from calculator_implementation import create_calculate
+from compute_implementation import create_compute
+import contextlib
+import argparse
+import random
+import time
+import sys
+import os
+
+FIRST_WIDGET_ID = 2 # The stretch label and stretch come first in the MathQuill stack layout
+
+# Function button texts that update the MathQuill expression, as in FourFunctionCalculator
+expression_inputs = ['Minus','Plus','Divide by','Times','(',')','Sqrt','Power']
+
+# The compute services are stateless, so every session in the process shares them
+shared_services = ComputeServices()
+shared_compute = create_compute(shared_services)
+
+@dataclass
+class SessionResult:
+    """
+    Final states and displays of a replayed session.
+
+    Attributes:
+        state (CalculatorState): The final state of the compute state machine.
+        ten_key_state (CalculatorState): The final state of the ten-key state machine.
+        displays (Dict[int, Tuple[str, Optional[str], int]]): widget_id -> (latex, result, stack count).
+        keystrokes (int): The number of keys replayed.
+    """
+    state: CalculatorState
+    ten_key_state: CalculatorState
+    displays: Dict[int, Tuple[str, Optional[str], int]] = field(default_factory=dict)
+    keystrokes: int = 0
+
+class HeadlessSession:
+    """
+    Drives the compute and ten-key state machines the way FourFunctionCalculator
+    and TenKey do, without Qt.
+
+    Displays are produced lazily for the last state of each line. Result displays
+    are taken just before the next operation, because state data is updated in place.
+    Per-session data lives in self.session, so sessions can run on separate threads.
+    """
+    def __init__(self):
+        self.services = shared_services
+        self.session = self.services.new_session()
+        self.compute = shared_compute
+        ten_key_services = CalculatorServices.create_services()
+        self.calculate = create_calculate(ten_key_services)
+        self.get_ten_key_display = ten_key_services["get_display_from_state"]
+        self.get_display = self.services.get_display_from_state("Error:")
+
+        self.state = self.services.initial_state
+        self.ten_key_state = CalculatorServices.initial_state
+        self.current_input = None
+        self.widget_id = FIRST_WIDGET_ID
+        self.displays = {}
+        self.display_widget_id = None
+        self.latex_state = None   # State the line's expression is displayed from
+        self.result_state = None  # State the line's result is displayed from
+        self.last_input = None
+        self.keystrokes = 0
+
+    # ------Low level inputs, as recorded by the input journal---------
+    def apply_calculate(self, input):
+        self.ten_key_state = self.calculate(input, self.ten_key_state)
+
+    def apply_digit(self, input, digit_display: str, widget_id: int):
+        self.switch_widget(widget_id)
+        self.services.receive_ten_key_display(self.session, digit_display)
+        self.state = self.compute(input, self.state, widget_id, self.session)
+        if not isinstance(self.state, ResultStateData):
+            self.latex_state = self.state
+            self.result_state = self.state
+        self.last_input = input
+
+    def apply_operation(self, input, widget_id: int):
+        self.switch_widget(widget_id)
+        self.flush_result()
+        self.state = self.compute(input, self.state, widget_id, self.session)
+        if not isinstance(self.state, ResultStateData):
+            self.latex_state = self.state
+        self.last_input = input
+
+    # ------Key level inputs, as typed on the calculator---------
+    def press(self, key: str):
+        """
+        Applies one key, using the button texts of the ten-key and function buttons.
+        """
+        self.keystrokes += 1
+        if key == '←':
+            # The back button is routed through the ten key, then computed as a digit
+            self.press_ten_key(CalculatorInput.BACK)
+        elif key in CalculatorServices.ten_key_input_mapping:
+            input_action, param = CalculatorServices.ten_key_input_mapping[key]
+            if callable(input_action) and param is not None:
+                input_action = input_action(param)
+            self.press_ten_key(input_action)
+        elif key in ComputeServices.input_mapping:
+            input_action, param = ComputeServices.input_mapping[key]
+            if callable(input_action) and param is not None:
+                input_action = input_action(param)
+            self.apply_operation(input_action, self.widget_id)
+            self.current_input = key
+            if key == 'Return' and self.services.handle_return(self.state):
+                self.reset_ten_key()
+                self.widget_id += 1
+            if key in expression_inputs:
+                self.reset_ten_key()
+        else:
+            raise ValueError(f"Unknown key: {key}")
+
+    def press_ten_key(self, input_action):
+        self.apply_calculate(input_action)
+        self.current_input = input_action
+        digit_display = self.get_ten_key_display(self.ten_key_state)
+        self.apply_digit(input_action, digit_display, self.widget_id)
+
+    def reset_ten_key(self):
+        self.apply_calculate(CalculatorInput.CLEARENTRY)
+
+    # ------Displays---------
+    def switch_widget(self, widget_id: int):
+        if widget_id != self.display_widget_id:
+            self.flush_result()
+            self.flush_latex()
+            self.display_widget_id = widget_id
+
+    def flush_result(self):
+        if self.result_state is not None and self.display_widget_id is not None:
+            _latex, result = self.get_display(self.result_state, self.session)
+            latex, _result, stack_count = self.displays.get(self.display_widget_id, (" ", None, 0))
+            self.displays[self.display_widget_id] = (latex, result, stack_count)
+        self.result_state = None
+
+    def flush_latex(self):
+        if self.latex_state is not None and self.display_widget_id is not None:
+            latex, _result = self.get_display(self.latex_state, self.session)
+            _latex, result, _stack_count = self.displays.get(self.display_widget_id, (" ", None, 0))
+            stack_count = self.services.get_stack_count_from_state(self.latex_state)
+            self.displays[self.display_widget_id] = (latex, result, stack_count)
+        self.latex_state = None
+
+    def final_displays(self) -> Dict[int, Tuple[str, Optional[str], int]]:
+        self.flush_result()
+        self.flush_latex()
+        return self.displays
+
+    # ------Serialization---------
+    def __getstate__(self):
+        # The state machine closures are rebuilt from the services on restore
+        state = self.__dict__.copy()
+        for name in ('services', 'compute', 'calculate', 'get_ten_key_display', 'get_display'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.services = shared_services
+        self.compute = shared_compute
+        ten_key_services = CalculatorServices.create_services()
+        self.calculate = create_calculate(ten_key_services)
+        self.get_ten_key_display = ten_key_services["get_display_from_state"]
+        self.get_display = self.services.get_display_from_state("Error:")
+
+    def result(self) -> SessionResult:
+        return SessionResult(state=self.state,
+                             ten_key_state=self.ten_key_state,
+                             displays=self.final_displays(),
+                             keystrokes=self.keystrokes)
+
+class NullWriter:
+    # The state machines print every transition; replays discard that output
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+def run_session(keys: Sequence[str]) -> SessionResult:
+    """
+    Replays one scripted key sequence and returns its final states and displays.
+    """
+    session = HeadlessSession()
+    with contextlib.redirect_stdout(NullWriter()):
+        for key in keys:
+            session.press(key)
+        return session.result()
+
+def silence_worker():
+    sys.stdout = NullWriter()
+
+def run_sessions(scripts: Iterable[Sequence[str]], processes: Optional[int] = None, chunksize: int = 1) -> List[SessionResult]:
+    """
+    Replays independent sessions in parallel across a process pool. Results are
+    returned in the order of the scripts.
+    """
+    with ProcessPoolExecutor(max_workers=processes, initializer=silence_worker) as executor:
+        return list(executor.map(run_session, scripts, chunksize=chunksize))
+
+def generate_script(length: int, rng: random.Random) -> List[str]:
+    """
+    Returns a random but well formed key sequence of about the given length.
+    """
+    keys = []
+    while len(keys) < length:
+        keys.extend(rng.choice('123456789') for _ in range(rng.randint(1, 4)))
+        if len(keys) >= length:
+            break
+        keys.append(rng.choice(['Plus', 'Minus', 'Times', 'Divide by', 'Return']))
+    keys.extend(rng.choice('123456789') for _ in range(1))
+    keys.append('Return')
+    return keys
+
+# Load test entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay generated keystroke sessions without a GUI.")
+    parser.add_argument("--sessions", type=int, default=200, help="number of independent sessions")
+    parser.add_argument("--length", type=int, default=200, help="keys per session")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    scripts = [generate_script(args.length, rng) for _ in range(args.sessions)]
+    start = time.perf_counter()
+    results = run_sessions(scripts, processes=args.processes, chunksize=max(1, args.sessions // (4 * args.processes)))
+    elapsed = time.perf_counter() - start
+    keystrokes = sum(result.keystrokes for result in results)
+    print(f"{len(results)} sessions, {keystrokes} keystrokes in {elapsed:.2f}s "
+          f"({keystrokes / elapsed * 60:,.0f} keystrokes per minute on {args.processes} processes)")
@@ -0,0 +1,208 @@
+# ================================================
+# Multi-Session Calculator Server
+# ================================================
+from typing import Optional, Dict
+from concurrent.futures import ThreadPoolExecutor
+from replay_engine import HeadlessSession, silence_worker
+import tornado.ioloop
+import tornado.web
+import tornado.websocket
+import argparse
+import asyncio
+import pickle
+import uuid
+import json
+import time
+import zlib
+import os
+
+class SessionEntry:
+    """
+    One calculator session. While idle the session may be evicted, keeping only a
+    compressed pickle of its states and displays until the next input arrives.
+
+    Attributes:
+        session (Optional[HeadlessSession]): The live session, None while evicted.
+        frozen (Optional[bytes]): The compressed session while evicted.
+        sent (Dict[int, dict]): The displays last pushed to the client, per line.
+        last_active (float): Monotonic time of the last input or disconnect.
+        connections (int): Open sockets attached to the session.
+    """
+    def __init__(self):
+        self.session: Optional[HeadlessSession] = HeadlessSession()
+        self.frozen: Optional[bytes] = None
+        self.sent: Dict[int, dict] = {}
+        self.active_line = None
+        self.last_active = time.monotonic()
+        self.connections = 0
+        self.lock = asyncio.Lock()
+
+    def evict(self):
+        if self.session is not None:
+            self.frozen = zlib.compress(pickle.dumps(self.session, protocol=pickle.HIGHEST_PROTOCOL))
+            self.session = None
+
+    def live_session(self) -> HeadlessSession:
+        if self.session is None:
+            self.session = pickle.loads(zlib.decompress(self.frozen))
+            self.frozen = None
+        return self.session
+
+    def press_keys(self, keys) -> dict:
+        """
+        Applies keys and returns the display diff against what the client already has.
+        Runs on a worker thread because SymPy work blocks.
+        """
+        session = self.live_session()
+        for key in keys:
+            session.press(key)
+        return self.display_diff(session.final_displays(), session.widget_id)
+
+    def display_diff(self, displays, active_line) -> dict:
+        lines = {}
+        for widget_id, (latex, result, stack_count) in displays.items():
+            line = {'latex': unescape_latex(latex),
+                    'result': unescape_latex(result) if result is not None else None,
+                    'stack': stack_count}
+            previous = self.sent.get(widget_id, {})
+            changed = {name: value for name, value in line.items() if previous.get(name) != value}
+            if changed:
+                lines[str(widget_id)] = changed
+                self.sent[widget_id] = line
+        diff = {'type': 'diff', 'lines': lines}
+        if active_line != self.active_line:
+            diff['active'] = active_line
+            self.active_line = active_line
+        return diff
+
+def unescape_latex(latex: str) -> str:
+    # Display strings are escaped for JavaScript string literals in the Qt widgets
+    return latex.replace('\\\\', '\\')
+
+class SessionHost:
+    """
+    Hosts calculator sessions for many concurrent clients. Inputs of one session are
+    applied in order; blocking work runs on a thread pool so the event loop keeps
+    serving the other sessions.
+
+    Idle sessions are compressed after idle_timeout seconds. A session with no socket
+    attached is removed after session_ttl seconds, so a client can reconnect to it
+    within that time but abandoned sessions do not accumulate.
+    """
+    def __init__(self, idle_timeout: float = 300.0, workers: Optional[int] = None, session_ttl: float = 3600.0):
+        self.idle_timeout = idle_timeout
+        self.session_ttl = session_ttl
+        self.sessions: Dict[str, SessionEntry] = {}
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="session")
+
+    def open_session(self, session_id: Optional[str] = None):
+        if session_id not in self.sessions:
+            session_id = uuid.uuid4().hex
+            self.sessions[session_id] = SessionEntry()
+        return session_id, self.sessions[session_id]
+
+    async def press_keys(self, entry: SessionEntry, keys) -> dict:
+        async with entry.lock:
+            entry.last_active = time.monotonic()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, entry.press_keys, keys)
+
+    async def full_display(self, entry: SessionEntry) -> dict:
+        async with entry.lock:
+            entry.sent = {}
+            entry.active_line = None
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, entry.press_keys, [])
+
+    def attach(self, entry: SessionEntry):
+        entry.connections += 1
+
+    def detach(self, entry: SessionEntry):
+        entry.connections -= 1
+        entry.last_active = time.monotonic() # The session's time to live starts now
+
+    def prune_sessions(self):
+        """
+        Removes sessions that have had no socket attached for session_ttl seconds.
+        """
+        now = time.monotonic()
+        expired = [session_id for session_id, entry in self.sessions.items()
+                   if entry.connections == 0 and not entry.lock.locked() and now - entry.last_active > self.session_ttl]
+        for session_id in expired:
+            del self.sessions[session_id]
+
+    async def evict_idle_sessions(self):
+        """
+        Prunes expired sessions, then compresses idle ones. Pickling and compressing run on
+        the thread pool, holding the session's lock so no input can arrive meanwhile.
+        """
+        self.prune_sessions()
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        for entry in list(self.sessions.values()):
+            if entry.session is not None and not entry.lock.locked() and now - entry.last_active > self.idle_timeout:
+                async with entry.lock:
+                    await loop.run_in_executor(self.executor, entry.evict)
+
+class SessionSocketHandler(tornado.websocket.WebSocketHandler):
+    """
+    One WebSocket connection. Clients send {"key": "5"} or {"keys": [...]} and
+    receive only the lines whose displays changed.
+    """
+    def initialize(self, host: SessionHost):
+        self.host = host
+        self.entry = None
+
+    async def open(self):
+        session_id, self.entry = self.host.open_session(self.get_argument('session', None))
+        self.host.attach(self.entry)
+        self.write_message({'type': 'hello', 'session': session_id})
+        self.write_message(await self.host.full_display(self.entry))
+
+    async def on_message(self, message):
+        try:
+            payload = json.loads(message)
+            keys = payload['keys'] if 'keys' in payload else [payload['key']]
+            diff = await self.host.press_keys(self.entry, keys)
+        except Exception as e: # Any failure is reported to this client; the socket stays open
+            self.write_message({'type': 'error', 'message': f"{type(e).__name__}: {e}"})
+            return
+        if diff['lines'] or 'active' in diff:
+            self.write_message(diff)
+
+    def on_close(self):
+        if self.entry is not None:
+            self.host.detach(self.entry)
+            self.entry = None
+
+def make_app(host: SessionHost) -> tornado.web.Application:
+    root = os.path.dirname(os.path.abspath(__file__))
+    return tornado.web.Application([
+        (r"/session", SessionSocketHandler, {'host': host}),
+        (r"/()", tornado.web.StaticFileHandler, {'path': root, 'default_filename': 'mathquill_session.html'}),
+        (r"/(mathquill_session\.html)", tornado.web.StaticFileHandler, {'path': root}),
+        (r"/resources/(.*)", tornado.web.StaticFileHandler, {'path': os.path.join(root, 'resources')}),
+    ])
+
+async def serve(port: int, idle_timeout: float, workers: Optional[int], verbose: bool = False,
+                session_ttl: float = 3600.0):
+    host = SessionHost(idle_timeout=idle_timeout, workers=workers, session_ttl=session_ttl)
+    app = make_app(host)
+    app.listen(port, address='127.0.0.1')
+    print(f"Calculator sessions at http://127.0.0.1:{port}/")
+    if not verbose:
+        silence_worker() # The state machines print every transition
+    evictor = tornado.ioloop.PeriodicCallback(host.evict_idle_sessions, min(idle_timeout, 30.0) * 1000)
+    evictor.start()
+    await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve calculator sessions to browser clients over WebSockets.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--idle-timeout", type=float, default=300.0, help="seconds before an idle session is evicted")
+    parser.add_argument("--session-ttl", type=float, default=3600.0,
+                        help="seconds a session is kept after its last client disconnects")
+    parser.add_argument("--workers", type=int, default=None, help="threads for blocking SymPy work")
+    parser.add_argument("--verbose", action="store_true", help="keep the state machine transition prints")
+    args = parser.parse_args()
+    asyncio.run(serve(args.port, args.idle_timeout, args.workers, args.verbose, args.session_ttl))
@@ -0,0 +1,467 @@
+# ================================================
+# Calculator Startup Benchmark
+# ================================================
+from typing import List, Dict, Tuple, Callable, Optional
+import subprocess
+import importlib
+import os
+import argparse
+import statistics
+import json
+import time
+import sys
+
+# How SymPy is loaded in each scenario
+#   eager:   imported as soon as the calculator modules are (the old module level import)
+#   lazy:    imported by the first Return
+#   prewarm: imported and warmed on a background thread while the calculator is idle
+SCENARIOS = ['eager', 'lazy', 'prewarm']
+
+# Keys of the first calculation, ending with the Return that needs SymPy
+FIRST_CALCULATION = ['1', '2', 'Divide by', '8', 'Return']
+
+# Windows of the launcher whose time to first paint is tracked against the budget
+FIRST_PAINT_TARGETS = ['launcher', 'basic_calculator', 'jupyter']
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_budget.json')
+BUDGET_HEADROOM = 1.25 # Recorded budgets allow this much over the measured medians
+
+# Window entry points: name -> (module, class)
+ENTRY_POINTS = {
+    'main': ('main', 'MainWindow'),
+    'four_function': ('four_function_widget', 'FourFunctionCalculator_Window'),
+    'basic_calculator': ('basic_calculator_widget', 'BasicCalculatorWindow'),
+    'ten_key': ('ten_key_widget', 'TenKeyWindow'),
+    'mathquill_stack': ('mathquill_widget', 'MathQuillStackWidget'),
+}
+ENTRY_POINT_TIMEOUT = 30.0 # Seconds to wait for the first paint and the MathQuill page
+
+# When a MathQuill page loads MathJax: at page load (?mathjax=eager) or with the first result
+MATHJAX_MODES = ['eager', 'lazy']
+FIRST_RESULT = '\\\\frac{1}{2}' # Escaped for a JavaScript template literal, as the widgets send it
+TOP_IMPORTS = 10 # Slowest modules kept per entry point
+
+def measure_headless(scenario: str, idle: float) -> Dict[str, float]:
+    """
+    Times importing the calculator modules and the first calculation without Qt.
+    """
+    start = time.perf_counter()
+    import compute_services
+    from replay_engine import HeadlessSession, silence_worker
+    if scenario == 'eager':
+        compute_services.load_sympy()
+    session = HeadlessSession()
+    interactive = time.perf_counter() - start
+
+    if scenario == 'prewarm':
+        compute_services.prewarm_sympy(session.services)
+    time.sleep(idle) # The user reads the window before typing
+    stdout = sys.stdout
+    silence_worker()
+    keystroke_start = time.perf_counter()
+    for key in FIRST_CALCULATION:
+        session.press(key)
+    first_return = time.perf_counter() - keystroke_start
+    sys.stdout = stdout
+    return {'interactive': interactive, 'first_calculation': first_return}
+
+def measure_window(scenario: str, idle: float) -> Dict[str, float]:
+    """
+    Times FourFunctionCalculator_Window until its event loop first runs, then the
+    first calculation entered through the buttons.
+    """
+    start = time.perf_counter()
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QTimer
+    import compute_services
+    from four_function_widget import FourFunctionCalculator_Window
+    from calculator_services import CalculatorServices
+    from replay_engine import silence_worker
+    if scenario == 'eager':
+        compute_services.load_sympy()
+
+    app = QApplication(sys.argv)
+    window = FourFunctionCalculator_Window(prewarm=(scenario == 'prewarm'), journal_path=None)
+    window.show()
+    timings = {}
+
+    def on_interactive():
+        timings['interactive'] = time.perf_counter() - start
+        QTimer.singleShot(int(idle * 1000), type_first_calculation)
+
+    def type_first_calculation():
+        calculator = window.FourFunctionCalculator
+        stdout = sys.stdout
+        silence_worker()
+        keystroke_start = time.perf_counter()
+        for key in FIRST_CALCULATION:
+            if key in CalculatorServices.ten_key_input_mapping:
+                # The two slots a ten-key button click runs
+                calculator.ten_key.handle_input(key)
+                calculator.ten_key.handle_button_clicked()
+            else:
+                calculator.handleInputClicked(key)
+        timings['first_calculation'] = time.perf_counter() - keystroke_start
+        sys.stdout = stdout
+        window.close()
+        app.quit()
+
+    QTimer.singleShot(0, on_interactive)
+    app.exec()
+    return timings
+
+def create_first_paint_filter(start: float, on_paint: Callable[[], None]):
+    """
+    Returns an event filter that records the seconds from start to the first paint
+    of the widget it is installed on in its elapsed attribute.
+    """
+    from PyQt6.QtCore import QObject, QEvent
+
+    class FirstPaintFilter(QObject):
+        def __init__(self):
+            super().__init__()
+            self.elapsed = None
+
+        def eventFilter(self, watched, event):
+            if event.type() == QEvent.Type.Paint and self.elapsed is None:
+                self.elapsed = time.perf_counter() - start
+                on_paint()
+            return False
+
+    return FirstPaintFilter()
+
+def measure_first_paint(target: str) -> Dict[str, float]:
+    """
+    Times the launcher from process start to its first paint, or a feature window
+    from its launch button callback to the window's first paint.
+    """
+    start = time.perf_counter()
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import Qt, QCoreApplication, QTimer
+    import main
+
+    QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+    app = QApplication(sys.argv)
+    quit_soon = lambda: QTimer.singleShot(0, app.quit)
+    window = main.MainWindow()
+    launcher_paint = create_first_paint_filter(start, quit_soon)
+    window.installEventFilter(launcher_paint)
+    window.show()
+    app.exec()
+    if target == 'launcher':
+        return {'first_paint': launcher_paint.elapsed}
+
+    launch_start = time.perf_counter()
+    if target == 'basic_calculator':
+        window.show_calculator()
+        launched = window.basic_calculator_window
+    else:
+        window.show_jupyter()
+        launched = window.jupyter_widget
+    window_paint = create_first_paint_filter(launch_start, quit_soon)
+    launched.installEventFilter(window_paint)
+    app.exec()
+    if target == 'jupyter':
+        window.jupyter_widget.stop_jupyter()
+    return {'first_paint': window_paint.elapsed}
+
+def check_budget(results: Dict[str, Optional[float]], path: str = BUDGET_PATH) -> bool:
+    """
+    Prints each first paint time against its budget and returns False if any is over or
+    was not measured, or if the budget is provisional, i.e. not yet derived from a
+    measurement with --record-budget.
+    """
+    with open(path) as f:
+        budget_file = json.load(f)
+    budget = budget_file['first_paint_ms']
+    provisional = budget_file.get('provisional', False)
+    print(f"  Budget: {budget_file.get('measured', 'no measurement recorded')}")
+    within = True
+    for target, elapsed in results.items():
+        limit = budget.get(target)
+        if elapsed is None:
+            status = "NO PAINT"
+        else:
+            status = "ok" if limit is None or elapsed * 1000 <= limit else "OVER BUDGET"
+        within = within and status == "ok"
+        print(f"  {target:16} first paint {format_metric(elapsed and elapsed * 1000):>8} ms   "
+              f"budget {limit} ms   {status}")
+    if provisional:
+        print("  FAILED: the budget is provisional; record one with --record-budget on the reference machine")
+        return False
+    return within
+
+def record_budget(results: Dict[str, Optional[float]], repeat: int, platform: str, path: str = BUDGET_PATH):
+    """
+    Writes budgets of BUDGET_HEADROOM times the measured medians, with how they were measured.
+    """
+    if any(elapsed is None for elapsed in results.values()):
+        raise RuntimeError("Every target must paint before a budget can be recorded")
+    budget_file = {
+        'provisional': False,
+        'measured': (f"Median of {repeat} fresh processes on {platform or 'the default platform'}, "
+                     f"{sys.platform} with {os.cpu_count()} CPUs, Python "
+                     f"{sys.version.split()[0]}, {time.strftime('%Y-%m-%d')}, plus {BUDGET_HEADROOM - 1:.0%} headroom"),
+        'first_paint_ms': {target: round(elapsed * 1000 * BUDGET_HEADROOM) for target, elapsed in results.items()},
+    }
+    with open(path, 'w') as f:
+        json.dump(budget_file, f, indent=4)
+        f.write('\n')
+    print(f"  Recorded {path}")
+
+def measure_entry_point(name: str) -> Dict[str, Optional[float]]:
+    """
+    Times one window entry point: QApplication start, importing its module, constructing
+    the window, and from process start until its first paint and until its first
+    MathQuillWidget page signals ready.
+    """
+    start = time.perf_counter()
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import Qt, QCoreApplication, QTimer
+    QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+    app = QApplication(sys.argv)
+    app_ready = time.perf_counter()
+
+    module_name, class_name = ENTRY_POINTS[name]
+    module = importlib.import_module(module_name)
+    imported = time.perf_counter()
+    arguments = {'journal_path': None} if name == 'four_function' else {}
+    window = getattr(module, class_name)(**arguments)
+    constructed = time.perf_counter()
+
+    timings = {'qapplication': app_ready - start, 'import': imported - app_ready,
+               'construct': constructed - imported, 'first_paint': None, 'mathquill_ready': None}
+    waiting = {'first_paint'}
+
+    def done(metric):
+        if timings[metric] is None:
+            timings[metric] = time.perf_counter() - start
+        waiting.discard(metric)
+        if not waiting:
+            QTimer.singleShot(0, app.quit)
+
+    if 'mathquill_widget' in sys.modules:
+        from mathquill_widget import MathQuillWidget
+        pages = window.findChildren(MathQuillWidget)
+        if pages:
+            waiting.add('mathquill_ready')
+            first_page = min(pages, key=lambda page: page.widget_id)
+            first_page.pageReady.connect(lambda widget_id: done('mathquill_ready'))
+
+    paint_filter = create_first_paint_filter(start, lambda: done('first_paint'))
+    window.installEventFilter(paint_filter)
+    window.show()
+    QTimer.singleShot(int(ENTRY_POINT_TIMEOUT * 1000), app.quit)
+    app.exec()
+    if paint_filter.elapsed is not None:
+        timings['first_paint'] = paint_filter.elapsed
+    return timings
+
+def measure_mathjax_page(mode: str) -> Dict[str, Optional[float]]:
+    """
+    Loads one MathQuill page and times its load, then the typeset of its first result.
+    """
+    from mathquill_widget import CustomWebEnginePage # Registers the asset scheme before the QApplication
+    from asset_bundle import asset_url
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtWebEngineWidgets import QWebEngineView
+    from PyQt6.QtWebChannel import QWebChannel
+    from PyQt6.QtCore import QTimer
+
+    app = QApplication(sys.argv)
+    view = QWebEngineView()
+    page = CustomWebEnginePage(view)
+    view.setPage(page)
+    channel = QWebChannel(page)
+    channel.registerObject('bridge', page.bridge)
+    page.setWebChannel(channel)
+    timings = {'page_load': None, 'first_result': None}
+    marks = {}
+
+    def on_load_finished(ok):
+        timings['page_load'] = time.perf_counter() - marks['load']
+        marks['result'] = time.perf_counter()
+        page.runJavaScript(f"window.updateResult(`{FIRST_RESULT}`, 1, null);")
+
+    def on_typeset_finished(sequence):
+        timings['first_result'] = time.perf_counter() - marks['result']
+        QTimer.singleShot(0, app.quit)
+
+    view.loadFinished.connect(on_load_finished)
+    page.bridge.typesetFinished.connect(on_typeset_finished)
+    view.show()
+    marks['load'] = time.perf_counter()
+    view.load(asset_url("mathquill_template2.html", 'mathjax=eager' if mode == 'eager' else None))
+    QTimer.singleShot(int(ENTRY_POINT_TIMEOUT * 1000), app.quit)
+    app.exec()
+    return timings
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Parses the stderr of `python -X importtime`.
+
+    Returns:
+        List[Tuple[str, int, int, int]]: (module, self us, cumulative us, nesting depth) in import order.
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        modules.append((module.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+def measure_import_time(module_name: str, env: Dict[str, str]) -> Dict[str, object]:
+    """
+    Imports a module in a fresh interpreter under -X importtime and returns its
+    cumulative import time with the slowest modules it pulled in.
+    """
+    command = [sys.executable, '-X', 'importtime', '-c', f'import {module_name}']
+    stderr = subprocess.run(command, check=True, capture_output=True, text=True, env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stderr
+    modules = parse_importtime(stderr)
+    cumulative = next((cumulative for module, _self, cumulative, depth in modules
+                       if module == module_name and depth == 0), 0)
+    slowest = sorted(modules, key=lambda entry: entry[1], reverse=True)[:TOP_IMPORTS]
+    return {'import_us': cumulative, 'top_imports': [[module, self_us] for module, self_us, _c, _d in slowest]}
+
+def child_env(platform: Optional[str] = 'offscreen') -> Dict[str, str]:
+    env = dict(os.environ)
+    if platform:
+        env['QT_QPA_PLATFORM'] = platform
+    return env
+
+def run_child(target: str, scenario: str, idle: float, env: Optional[Dict[str, str]] = None) -> Dict[str, float]:
+    command = [sys.executable, __file__, '--child', target, '--scenario', scenario, '--idle', str(idle)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True, env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def summarize(runs: List[Dict[str, Optional[float]]]) -> Dict[str, Optional[float]]:
+    summary = {}
+    for name in runs[0]:
+        values = [run[name] for run in runs if run[name] is not None]
+        summary[name] = statistics.median(values) if values else None
+    return summary
+
+def benchmark_entry_points(repeat: int, env: Dict[str, str]) -> Dict[str, object]:
+    """
+    Measures every window entry point and returns the results in the JSON report layout.
+    """
+    report = {'python': sys.version.split()[0], 'platform': env.get('QT_QPA_PLATFORM', ''),
+              'repeat': repeat, 'entry_points': {}}
+    for name, (module_name, _class_name) in ENTRY_POINTS.items():
+        imports = measure_import_time(module_name, env)
+        timings = summarize([run_child(f'entry:{name}', 'lazy', 0, env) for _ in range(repeat)])
+        result = {'import_us': imports['import_us']}
+        result.update({f'{metric}_ms': None if value is None else round(value * 1000, 2)
+                       for metric, value in timings.items()})
+        result['top_imports'] = imports['top_imports']
+        report['entry_points'][name] = result
+        print(f"  {name:16} " + "  ".join(f"{metric} {format_metric(result[metric])}"
+                                           for metric in result if metric != 'top_imports'))
+    return report
+
+def format_metric(value) -> str:
+    return "n/a" if value is None else f"{value:,.1f}"
+
+def compare_reports(baseline: Dict[str, object], current: Dict[str, object], threshold: float) -> bool:
+    """
+    Prints every metric of two reports side by side and returns False if any metric
+    grew by more than threshold percent.
+    """
+    within = True
+    for name, result in current['entry_points'].items():
+        previous = baseline['entry_points'].get(name)
+        if previous is None:
+            print(f"  {name:16} not in the baseline")
+            continue
+        for metric, value in result.items():
+            old = previous.get(metric)
+            if metric == 'top_imports' or value is None or not old:
+                continue
+            change = (value - old) / old * 100
+            status = "REGRESSION" if change > threshold else ""
+            within = within and not status
+            print(f"  {name:16} {metric:20} {old:12,.1f} -> {value:12,.1f}  {change:+7.1f}%  {status}")
+    return within
+
+# Benchmark entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure startup of the calculator windows and compare runs.")
+    parser.add_argument("--target", choices=['headless', 'window', 'first-paint', 'entry-points', 'mathjax'],
+                        default='headless',
+                        help="time the calculator modules alone, the Qt window, the launcher windows' first paint, "
+                             "every window entry point, or a MathQuill page loading MathJax eagerly or lazily")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh processes per scenario")
+    parser.add_argument("--idle", type=float, default=1.0, help="seconds between becoming interactive and the first key")
+    parser.add_argument("--budget", default=BUDGET_PATH, help="first paint budget file")
+    parser.add_argument("--record-budget", action="store_true",
+                        help="write the budget file from this first paint run instead of checking it")
+    parser.add_argument("--platform", default='offscreen', help="QT_QPA_PLATFORM for the measured processes")
+    parser.add_argument("--output", help="write the entry point report to this JSON file")
+    parser.add_argument("--compare", nargs='+', metavar='REPORT',
+                        help="baseline report to compare the entry point run against, or two reports to compare")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent growth reported as a regression")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--scenario", choices=SCENARIOS, default='lazy', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child and args.child.startswith('entry:'):
+        print(json.dumps(measure_entry_point(args.child[len('entry:'):])))
+        sys.exit(0)
+    if args.child and args.child.startswith('mathjax:'):
+        print(json.dumps(measure_mathjax_page(args.child[len('mathjax:'):])))
+        sys.exit(0)
+    if args.child in FIRST_PAINT_TARGETS:
+        print(json.dumps(measure_first_paint(args.child)))
+        sys.exit(0)
+    if args.child:
+        measure = measure_headless if args.child == 'headless' else measure_window
+        print(json.dumps(measure(args.scenario, args.idle)))
+        sys.exit(0)
+
+    env = child_env(args.platform)
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        print(f"{args.compare[0]} -> {args.compare[1]}")
+        sys.exit(0 if compare_reports(baseline, current, args.threshold) else 1)
+
+    if args.target == 'entry-points':
+        print(f"Window entry points on {args.platform}, median of {args.repeat} fresh processes")
+        report = benchmark_entry_points(args.repeat, env)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=4)
+        if args.compare:
+            with open(args.compare[0]) as f:
+                baseline = json.load(f)
+            print(f"Compared with {args.compare[0]}")
+            sys.exit(0 if compare_reports(baseline, report, args.threshold) else 1)
+        sys.exit(0)
+
+    if args.target == 'mathjax':
+        print(f"MathQuill page with MathJax loaded eagerly or on the first result, median of {args.repeat} fresh processes")
+        for mode in MATHJAX_MODES:
+            result = summarize([run_child(f'mathjax:{mode}', 'lazy', 0, env) for _ in range(args.repeat)])
+            result = {metric: None if value is None else value * 1000 for metric, value in result.items()}
+            print(f"  {mode:6} page load {format_metric(result['page_load'])} ms   "
+                  f"first result {format_metric(result['first_result'])} ms")
+        sys.exit(0)
+
+    if args.target == 'first-paint':
+        print(f"Time to first paint, median of {args.repeat} fresh processes")
+        results = {target: summarize([run_child(target, 'lazy', 0, env) for _ in range(args.repeat)])['first_paint']
+                   for target in FIRST_PAINT_TARGETS}
+        if args.record_budget:
+            record_budget(results, args.repeat, args.platform, args.budget)
+            sys.exit(0)
+        sys.exit(0 if check_budget(results, args.budget) else 1)
+
+    print(f"{args.target} startup, median of {args.repeat} fresh processes, first key after {args.idle:.1f}s idle")
+    for scenario in SCENARIOS:
+        result = summarize([run_child(args.target, scenario, args.idle, env) for _ in range(args.repeat)])
+        print(f"  {scenario:8} interactive {result['interactive'] * 1000:8.1f} ms   "
+              f"first calculation {result['first_calculation'] * 1000:8.1f} ms")
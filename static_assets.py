@@ -0,0 +1,139 @@
+# ================================================
+# Hashed, Precompressed Static Assets for the Web Server
+# ================================================
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass
+import mimetypes
+import threading
+import hashlib
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError: # Optional: without it only gzip variants are generated
+    brotli = None
+
+STATIC_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources')
+VARIANT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.asset_cache')
+HASH_LENGTH = 12
+COMPRESSIBLE_TYPES = {'application/javascript', 'text/javascript', 'text/css', 'text/html',
+                      'application/json', 'image/svg+xml', 'text/plain'}
+MIN_COMPRESS_SIZE = 1024 # Smaller files are not worth a variant
+READ_CHUNK_SIZE = 1 << 20 # Bytes hashed at a time
+
+@dataclass
+class StaticAsset:
+    """
+    One file under the static root.
+
+    Attributes:
+        path (str): Path relative to the static root, with forward slashes.
+        full_path (str): Path of the file on disk.
+        digest (str): Content hash of the file, used as its ETag.
+        group_digest (str): Content hash of the asset's top-level directory (or of the file
+            itself at the top level), used in its URL.
+        mimetype (str): The Content-Type it is served with.
+    """
+    path: str
+    full_path: str
+    digest: str
+    group_digest: str
+    mimetype: str
+
+    @property
+    def url(self) -> str:
+        return f"/assets/{self.group_digest}/{self.path}"
+
+class StaticAssets:
+    """
+    Content-hashed URLs for everything under a static root. A URL embeds the hash of the
+    asset's top-level directory rather than of the file alone, so MathJax, which loads its
+    components relative to startup.js, resolves siblings to URLs that are just as valid.
+    Any change to a file changes the URL, so responses can be cached as immutable.
+
+    Compressed variants are written once per file content to the variant directory and
+    served as plain files from then on, including after a restart.
+
+    Attributes:
+        root (str): The directory being served.
+        variant_root (str): Where the gzip and brotli variants are kept.
+        assets (Dict[str, StaticAsset]): Assets by relative path.
+    """
+    def __init__(self, root: str = STATIC_ROOT, variant_root: str = VARIANT_ROOT):
+        self.root = root
+        self.variant_root = variant_root
+        self.assets: Dict[str, StaticAsset] = {}
+        self.lock = threading.Lock()
+        self.scan()
+
+    def scan(self):
+        groups: Dict[str, List[Tuple[str, str]]] = {}
+        for directory, dirnames, filenames in os.walk(self.root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                full_path = os.path.join(directory, filename)
+                path = os.path.relpath(full_path, self.root).replace(os.sep, '/')
+                groups.setdefault(path.split('/')[0], []).append((path, file_digest(full_path)))
+        for files in groups.values():
+            group_hash = hashlib.sha256()
+            for path, digest in files:
+                group_hash.update(f"{path}\0{digest}\0".encode())
+            group_digest = group_hash.hexdigest()[:HASH_LENGTH]
+            for path, digest in files:
+                mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+                self.assets[path] = StaticAsset(path, os.path.join(self.root, *path.split('/')),
+                                                digest, group_digest, mimetype)
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        return self.assets.get(path)
+
+    def manifest(self) -> Dict[str, str]:
+        return {path: asset.url for path, asset in self.assets.items()}
+
+    def variant(self, asset: StaticAsset, accept_encoding: str) -> Tuple[str, Optional[str]]:
+        """
+        Returns the file to send for a request and its Content-Encoding: the brotli or gzip
+        variant if the client accepts it and it is smaller, else the file itself.
+        """
+        if asset.mimetype not in COMPRESSIBLE_TYPES or os.path.getsize(asset.full_path) < MIN_COMPRESS_SIZE:
+            return asset.full_path, None
+        accepted = {token.split(';')[0].strip() for token in accept_encoding.split(',')}
+        for encoding in ('br', 'gzip'):
+            if encoding in accepted:
+                variant_path = self.compressed(asset, encoding)
+                if variant_path is not None:
+                    return variant_path, encoding
+        return asset.full_path, None
+
+    def compressed(self, asset: StaticAsset, encoding: str) -> Optional[str]:
+        if encoding == 'br' and brotli is None:
+            return None
+        variant_path = os.path.join(self.variant_root, f"{asset.digest}.{encoding}")
+        skip_marker = variant_path + '.skip' # Written when compression does not pay off
+        if os.path.exists(variant_path):
+            return variant_path
+        if os.path.exists(skip_marker):
+            return None
+        with self.lock:
+            if not os.path.exists(variant_path) and not os.path.exists(skip_marker):
+                with open(asset.full_path, 'rb') as f:
+                    data = f.read()
+                if encoding == 'br':
+                    encoded = brotli.compress(data, quality=11)
+                else:
+                    encoded = gzip.compress(data, compresslevel=9, mtime=0)
+                os.makedirs(self.variant_root, exist_ok=True)
+                target = skip_marker if len(encoded) >= len(data) else variant_path
+                temporary = f"{target}.{os.getpid()}.tmp"
+                with open(temporary, 'wb') as f:
+                    f.write(b'' if target == skip_marker else encoded)
+                os.replace(temporary, target) # Never leaves a partial variant behind
+        return variant_path if os.path.exists(variant_path) else None
+
+def file_digest(full_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(full_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
@@ -0,0 +1,129 @@
+# ================================================
+# Page Load Benchmark for the Static Asset Routes
+# ================================================
+from typing import Dict, List, Optional, Tuple
+from urllib import request as urlrequest
+from urllib.error import HTTPError, URLError
+import subprocess
+import statistics
+import argparse
+import json
+import time
+import sys
+
+# What a MathQuill page requests, as served from resources/
+PAGE_ASSETS = [
+    'jquery-3.6.0.min.js',
+    'mathquill.min.js',
+    'mathquill.min.css',
+    'qwebchannel.js',
+    'MathJax/es5/startup.js',
+    'MathJax/es5/core.js',
+    'MathJax/es5/input/tex-base.js',
+    'MathJax/es5/input/tex/extensions/html.js',
+    'MathJax/es5/output/svg.js',
+    'MathJax/es5/output/svg/fonts/tex.js',
+]
+ACCEPT_ENCODING = 'br, gzip'
+
+def fetch(url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes, Dict[str, str]]:
+    req = urlrequest.Request(url, headers=headers or {})
+    try:
+        with urlrequest.urlopen(req, timeout=30.0) as response:
+            return response.status, response.read(), dict(response.headers)
+    except HTTPError as e:
+        if e.code == 304:
+            return 304, b'', dict(e.headers)
+        raise
+
+def wait_for_server(url: str, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            fetch(url)
+            return
+        except (URLError, ConnectionError, OSError):
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+class PageLoadClient:
+    """
+    A browser stand-in that loads the page assets and keeps an HTTP cache: responses with
+    an immutable Cache-Control are reused without a request, others are revalidated.
+
+    Attributes:
+        base (str): The server URL.
+        hashed (bool): Whether assets are requested through their hashed URLs.
+        cache (Dict[str, Tuple[str, bool]]): ETag and immutability by URL.
+    """
+    def __init__(self, base: str, hashed: bool):
+        self.base = base
+        self.hashed = hashed
+        self.cache: Dict[str, Tuple[str, bool]] = {}
+
+    def load_page(self) -> Tuple[int, int, float]:
+        """
+        Loads every page asset and returns the requests made, the body bytes received and
+        the elapsed seconds.
+        """
+        requests = 0
+        received = 0
+        start = time.perf_counter()
+        if self.hashed:
+            status, body, _headers = fetch(self.base + '/assets/manifest.json')
+            requests += 1
+            received += len(body)
+            manifest = json.loads(body)
+            urls = [manifest[path] for path in PAGE_ASSETS]
+        else:
+            urls = ['/' + path for path in PAGE_ASSETS]
+        for url in urls:
+            cached = self.cache.get(url)
+            if cached is not None and cached[1]:
+                continue
+            headers = {'Accept-Encoding': ACCEPT_ENCODING}
+            if cached is not None:
+                headers['If-None-Match'] = cached[0]
+            status, body, response_headers = fetch(self.base + url, headers)
+            requests += 1
+            received += len(body)
+            if status == 200:
+                immutable = 'immutable' in response_headers.get('Cache-Control', '')
+                self.cache[url] = (response_headers.get('ETag', ''), immutable)
+        return requests, received, time.perf_counter() - start
+
+def run_scenario(base: str, hashed: bool, loads: int) -> Dict[str, List[Tuple[int, int, float]]]:
+    results = {'cold': [], 'repeat': []}
+    for _ in range(loads):
+        client = PageLoadClient(base, hashed)
+        results['cold'].append(client.load_page())
+        results['repeat'].append(client.load_page())
+    return results
+
+# Load test entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure bytes and latency per page load of the static assets.")
+    parser.add_argument("--port", type=int, default=5058)
+    parser.add_argument("--loads", type=int, default=20, help="page loads per scenario")
+    parser.add_argument("--external", action="store_true", help="use an already running server")
+    args = parser.parse_args()
+
+    base = f"http://127.0.0.1:{args.port}"
+    server = None
+    if not args.external:
+        command = [sys.executable, "web_server.py", "--port", str(args.port), "--workers", "1"]
+        server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server(base + '/assets/manifest.json')
+        scenarios = {'unhashed': run_scenario(base, False, args.loads),
+                     'hashed': run_scenario(base, True, args.loads)}
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"{len(PAGE_ASSETS)} assets per page load, median of {args.loads} loads")
+    for name, results in scenarios.items():
+        for visit, loads in results.items():
+            requests, received, elapsed = (statistics.median(values) for values in zip(*loads))
+            print(f"  {name:8} {visit:6} {requests:3.0f} requests {received / 1024:9,.1f} KiB {elapsed * 1000:8.1f} ms")
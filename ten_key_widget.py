@@ -8,6 +8,7 @@ from calculator_services import CalculatorServices
 from compute_services import ComputeServices
 from calculator_implementation import create_calculate
 from compute_implementation import create_compute
+from input_journal import CALCULATE
 from enum import Enum
 
 class TenKeyConfig(Enum):
@@ -28,10 +29,11 @@ class TenKey(QWidget):
         else:
             return color
     
-    def __init__(self, config='default',alt_button_color=None):
+    def __init__(self, config='default',alt_button_color=None, journal=None):
         super().__init__()        
         # Set the Ten Key configuration
         self.config = TenKeyConfig(config)
+        self.journal = journal # Optional InputJournal that records every input
         
         # Set up services
         services = CalculatorServices.create_services()
@@ -207,17 +209,23 @@ class TenKey(QWidget):
             input_action = input_action(param)
         
         if input_action is not None:            
-            self.state = self.calculate(input_action, self.state)            
+            self.apply_input(input_action)            
             self.inputClicked.emit(input_action)  
             
         self.update_display()
+    
+    # Function to journal an input and run it through the state machine.
+    def apply_input(self, input_action):
+        if self.journal is not None:
+            self.journal.record(CALCULATE, None, input_action)
+        self.state = self.calculate(input_action, self.state)
      
     # Function to reset ten-key widget.
     def reset_input(self):        
         input_mapping = CalculatorServices.ten_key_input_mapping   
         input_action, param = input_mapping.get('CE', (None, None))
         
-        self.state = self.calculate(input_action, self.state)         
+        self.apply_input(input_action)         
         self.update_display()
         
     # Function to set accumulator back.
@@ -226,7 +234,7 @@ class TenKey(QWidget):
         input_action, param = input_mapping.get('←', (None, None))
         
         if input_action is not None:            
-            self.state = self.calculate(input_action, self.state)            
+            self.apply_input(input_action)            
             self.inputClicked.emit(input_action)  
             
         self.update_display()
@@ -0,0 +1,38 @@
+import pytest
+from batch_evaluator import evaluate_line
+
+@pytest.mark.parametrize("line, result", [
+    ("1+2", "3"),
+    ("12/8", "1.5"),
+    (" 2 * (3 + 4) ", "14"),
+    ("sqrt(16)+1", "5"),
+    ("(1+2)*(3-1)", "6"),
+])
+def test_valid_expressions(line, result):
+    assert evaluate_line(line) == result
+
+@pytest.mark.parametrize("line, message", [
+    ("2^3", "Unexpected character '^' at position 1"),
+    ("abc", "Unexpected character 'a' at position 0"),
+    ("1 + x", "Unexpected character 'x' at position 4"),
+    ("(1+2", "missing ')'"),
+    ("1+2)", "')' without a matching '('"),
+    ("sqrt(4", "missing ')'"),
+    ("2*sqrt", "Expected '(' after function name"),
+    ("1..2", "Malformed number '1..2' at position 0"),
+    ("3+1.2.3", "Malformed number '1.2.3' at position 2"),
+    ("5 5", "Missing operator between '5' and '5'"),
+    ("1 2+3", "Missing operator between '1' and '2'"),
+    ("(2 .5)", "Missing operator between '2' and '.5'"),
+])
+def test_invalid_expressions_are_errors(line, message):
+    result = evaluate_line(line)
+    assert result.startswith("ERROR: ")
+    assert message in result
+
+@pytest.mark.parametrize("line", ["1+", "2*", "()", "sqrt()"])
+def test_incomplete_expressions_are_errors(line):
+    assert evaluate_line(line) == f"ERROR: Cannot evaluate '{line}'"
+
+def test_blank_line():
+    assert evaluate_line("   ") == ""
@@ -0,0 +1,59 @@
+import os
+from calculator_domain import ExpressionStateHistoryItem, StartStateData, CalculatorInput
+from history_store import ExpressionHistoryStore
+
+def item(widget_id, display):
+    return ExpressionStateHistoryItem(recent_state_data=StartStateData(), current_input=CalculatorInput.ZERO,
+                                      widget_ID=widget_id, digit_display=display)
+
+def fill(store, count):
+    for number in range(count):
+        store.append(item(2 + number % 3, str(number)))
+
+def test_spilled_records_read_back():
+    store = ExpressionHistoryStore(capacity=4, segment_size=2)
+    fill(store, 10)
+    assert [record.digit_display for record in store] == [str(number) for number in range(10)]
+    assert [record.index for record in store.for_widget(3)] == [1, 4, 7]
+    store.close()
+
+def test_close_then_reopen_reads_the_same_records(tmp_path):
+    path = str(tmp_path / "history.log")
+    store = ExpressionHistoryStore(capacity=4, segment_size=2, log_path=path)
+    fill(store, 10)
+    store.close()
+    assert store[0].digit_display == "0"
+    assert store[5].digit_display == "5"
+    fill(store, 4) # Spills again after the reopen, appending to the log
+    assert [record.digit_display for record in store] == [str(number) for number in range(10)] + ["0", "1", "2", "3"]
+    store.close()
+
+def test_existing_log_is_resumed(tmp_path):
+    path = str(tmp_path / "history.log")
+    store = ExpressionHistoryStore(capacity=4, segment_size=2, log_path=path)
+    fill(store, 9)
+    spilled = store.spilled_count
+    store.close()
+
+    resumed = ExpressionHistoryStore(capacity=4, segment_size=2, log_path=path)
+    assert len(resumed) == spilled
+    assert [record.digit_display for record in resumed] == [str(number) for number in range(spilled)]
+    assert [record.index for record in resumed.for_widget(2)] == list(range(0, spilled, 3))
+    resumed.close()
+
+def test_temporary_log_is_removed_on_close():
+    store = ExpressionHistoryStore(capacity=4, segment_size=2)
+    fill(store, 6)
+    path = store.log_path
+    store.close()
+    assert not os.path.exists(path)
+    assert len(store) == 0
+
+def test_widget_records_span_the_log_and_the_ring():
+    store = ExpressionHistoryStore(capacity=4, segment_size=2)
+    fill(store, 7)
+    assert store.spilled_count == 4
+    assert [record.index for record in store.for_widget(2)] == [0, 3, 6]
+    assert [record.digit_display for record in store.for_widget(4)] == ["2", "5"]
+    assert store.for_widget(9) == []
+    store.close()
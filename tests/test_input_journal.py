@@ -0,0 +1,47 @@
+import os
+from calculator_domain import CalculatorInput
+from input_journal import InputJournal, open_journal, read_journal, DIGIT, OPERATION
+
+def test_records_are_committed_in_order(tmp_path):
+    path = str(tmp_path / "calculator.journal")
+    journal = InputJournal(path, commit_interval=60.0)
+    journal.record(OPERATION, 2, CalculatorInput.ZERO)
+    journal.record(DIGIT, 2, CalculatorInput.ZERO, "10")
+    journal.commit()
+    records = list(read_journal(path))
+    assert [(record.kind, record.widget_id, record.digit_display) for record in records] == \
+        [(OPERATION, 2, " "), (DIGIT, 2, "10")]
+    journal.close()
+
+def test_clear_drops_committed_and_pending_records(tmp_path):
+    path = str(tmp_path / "calculator.journal")
+    journal = InputJournal(path, commit_interval=60.0)
+    journal.record(OPERATION, 2, CalculatorInput.ZERO)
+    journal.commit()
+    journal.record(OPERATION, 2, CalculatorInput.CLEAR)
+    journal.clear()
+    journal.close()
+    assert os.path.getsize(path) == 0
+
+def test_a_second_journal_on_the_same_path_is_refused(tmp_path):
+    path = str(tmp_path / "calculator.journal")
+    first = open_journal(path)
+    assert open_journal(path) is None
+    first.record(OPERATION, 2, CalculatorInput.ZERO)
+    first.close()
+    assert [record.kind for record in read_journal(path)] == [OPERATION]
+    # Once released, the next calculator takes the journal over
+    second = open_journal(path)
+    assert second is not None
+    second.close()
+
+def test_journals_on_different_paths_stay_separate(tmp_path):
+    first = InputJournal(str(tmp_path / "first.journal"), commit_interval=60.0)
+    second = InputJournal(str(tmp_path / "second.journal"), commit_interval=60.0)
+    first.record(OPERATION, 2, CalculatorInput.ZERO)
+    second.record(DIGIT, 3, CalculatorInput.ZERO, "7")
+    second.clear()
+    first.close()
+    second.close()
+    assert [record.kind for record in read_journal(first.path)] == [OPERATION]
+    assert list(read_journal(second.path)) == []
@@ -0,0 +1,95 @@
+# Runtime-file parsing and server lifecycle without a real Jupyter; needs PyQt6
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+pytest.importorskip("PyQt6.QtCore")
+
+import jupyter_server_manager
+from jupyter_server_manager import JupyterServerManager, ServerInfo, ServerState, find_running_servers
+
+@pytest.fixture
+def runtime(tmp_path, monkeypatch):
+    monkeypatch.setattr(jupyter_server_manager, 'runtime_dir', lambda: str(tmp_path))
+    return tmp_path
+
+def write_runtime_file(runtime, name, info):
+    with open(runtime / f"jpserver-{name}.json", 'w') as f:
+        json.dump(info, f)
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+def test_running_server_is_read_with_its_port(runtime):
+    write_runtime_file(runtime, os.getpid(), {'pid': os.getpid(), 'url': 'http://127.0.0.1:8891', 'token': 'abc'})
+    assert find_running_servers() == [ServerInfo('http://127.0.0.1:8891/', 'abc', os.getpid(), reused=True)]
+
+def test_runtime_files_without_a_pid_are_skipped(runtime):
+    write_runtime_file(runtime, 1, {'url': 'http://127.0.0.1:8891/', 'token': 'abc'})
+    write_runtime_file(runtime, 2, {'pid': 0, 'url': 'http://127.0.0.1:8892/', 'token': 'abc'})
+    write_runtime_file(runtime, 3, {'pid': 'x', 'url': 'http://127.0.0.1:8893/', 'token': 'abc'})
+    assert find_running_servers() == []
+
+def test_runtime_files_of_exited_processes_are_skipped(runtime):
+    write_runtime_file(runtime, 1, {'pid': exited_pid(), 'url': 'http://127.0.0.1:8891/', 'token': 'abc'})
+    assert find_running_servers() == []
+
+def test_malformed_runtime_files_are_skipped(runtime):
+    (runtime / "jpserver-1.json").write_text("{torn")
+    write_runtime_file(runtime, 2, [os.getpid()])
+    write_runtime_file(runtime, 3, {'pid': os.getpid(), 'token': 'abc'})
+    assert find_running_servers() == []
+
+class FakeProcess:
+    """
+    Stands in for the jupyter lab process: writes the runtime file of a server on
+    the port after the suggested one, as if that one had been taken meanwhile.
+    """
+    def __init__(self, runtime, command):
+        self.pid = os.getpid()
+        self.returncode = None
+        port = int(next(arg for arg in command if arg.startswith('--port=')).split('=')[1]) + 1
+        token = next(arg for arg in command if arg.startswith('--IdentityProvider.token=')).split('=')[1]
+        self.url = f'http://127.0.0.1:{port}/'
+        write_runtime_file(runtime, 'started', {'pid': self.pid, 'url': self.url, 'token': token})
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        self.returncode = -15
+
+def test_started_server_port_is_read_from_its_runtime_file(runtime, monkeypatch):
+    processes = []
+    def popen(command):
+        processes.append(FakeProcess(runtime, command))
+        return processes[-1]
+    monkeypatch.setattr(jupyter_server_manager.subprocess, 'Popen', popen)
+    monkeypatch.setattr(jupyter_server_manager, 'probe_status', lambda url, token: True)
+    manager = JupyterServerManager()
+    manager.state = ServerState.STARTING
+    manager.start_server()
+    assert manager.state == ServerState.READY
+    assert manager.server.url == processes[0].url
+    assert not manager.server.reused
+
+def test_ready_server_that_stopped_answering_is_forgotten(monkeypatch):
+    monkeypatch.setattr(jupyter_server_manager, 'probe_status', lambda url, token: False)
+    manager = JupyterServerManager()
+    manager.server = ServerInfo('http://127.0.0.1:8891/', 'abc', exited_pid(), reused=True)
+    manager.state = ServerState.READY
+    assert manager.ready_server() is None
+    assert manager.state == ServerState.STOPPED
+    assert manager.server is None
+
+def test_ready_server_that_answers_is_kept(monkeypatch):
+    monkeypatch.setattr(jupyter_server_manager, 'probe_status', lambda url, token: True)
+    manager = JupyterServerManager()
+    server = ServerInfo('http://127.0.0.1:8891/', 'abc', os.getpid(), reused=True)
+    manager.server = server
+    manager.state = ServerState.READY
+    assert manager.ready_server() is server
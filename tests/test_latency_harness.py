@@ -0,0 +1,26 @@
+# Smoke test of the keystroke-to-pixels harness; needs PyQt6 with QtWebEngine and pytest-qt
+import os
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+pytest.importorskip("PyQt6.QtWebEngineWidgets")
+pytest.importorskip("pytestqt")
+
+from latency_harness import LatencyHarness, report
+
+@pytest.fixture
+def harness(qtbot):
+    harness = LatencyHarness(timeout=5.0)
+    qtbot.addWidget(harness.window)
+    assert harness.wait_until_ready()
+    return harness
+
+def test_keys_reach_the_screen(harness):
+    for key in ['1', '2', 'Plus', '3', 'Return']:
+        sample = harness.press(key)
+        assert sample.end_stage != 'timeout', key
+        assert 'pixels' in sample.stages
+    results = report(harness.recorder.samples)
+    assert results['digit']['count'] == 3
+    assert results['digit']['timeouts'] == 0
+    assert set(results) == {'digit', 'operator', 'return'}
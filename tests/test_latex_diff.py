@@ -0,0 +1,39 @@
+from latex_diff import LatexPatch, diff_latex, tokenize_latex
+
+def test_commands_are_one_token():
+    # Latex arrives escaped for a JavaScript string literal
+    assert tokenize_latex('12\\\\times3') == ['1', '2', '\\\\times', '3']
+    assert tokenize_latex('\\\\sqrt{4}') == ['\\\\sqrt', '{', '4', '}']
+
+def test_appending_a_digit_is_a_write_at_the_right_end():
+    assert diff_latex('12', '123') == LatexPatch(left_moves=0, delete_count=0, insert_latex='3')
+
+def test_replacing_an_operator():
+    assert diff_latex('12+3', '12\\\\times3') == LatexPatch(left_moves=1, delete_count=1, insert_latex='\\\\times')
+
+def test_clearing_deletes_every_symbol():
+    assert diff_latex('12\\\\div3', '') == LatexPatch(left_moves=0, delete_count=4, insert_latex='')
+
+def test_typing_inside_a_square_root_crosses_its_closing_brace():
+    assert diff_latex('\\\\sqrt{4}', '\\\\sqrt{49}') == LatexPatch(left_moves=1, delete_count=0, insert_latex='9')
+
+def test_typing_inside_a_parenthesis_crosses_it():
+    assert diff_latex('2\\\\times(3)', '2\\\\times(35)') == LatexPatch(left_moves=1, delete_count=0, insert_latex='5')
+
+def test_structural_changes_are_sent_whole():
+    assert diff_latex('4', '\\\\sqrt{4}') is None
+    assert diff_latex('2+3', '2+(3') is None
+
+def test_typing_inside_a_block_before_other_symbols():
+    assert diff_latex('\\\\sqrt{4}+7', '\\\\sqrt{49}+7') == LatexPatch(left_moves=3, delete_count=0, insert_latex='9')
+
+def test_a_kept_tail_leaving_a_block_is_sent_whole():
+    # Moving left from the 4 would leave the square root through its opening brace
+    assert diff_latex('3\\\\sqrt{4}', '5\\\\sqrt{4}') is None
+
+def test_right_brackets_are_not_crossed():
+    assert tokenize_latex('\\\\right)') == ['\\\\right', ')']
+    assert diff_latex('\\\\left(3\\\\right)', '\\\\left(35\\\\right)') is None
+
+def test_unchanged_latex_is_an_empty_patch():
+    assert diff_latex('1+2', '1+2') == LatexPatch(left_moves=0, delete_count=0, insert_latex='')
@@ -0,0 +1,27 @@
+import pytest
+from compute_services import ComputeServices
+from mathtext_renderer import to_mathtext, render_png
+
+pytest.importorskip("matplotlib")
+
+services = ComputeServices()
+
+def display_result(expression):
+    # The result latex as get_display_from_state builds it
+    return services.replace_sqrt(services.get_latex_or_mixed_number(expression))
+
+@pytest.mark.parametrize("expression", ["4", "3/2", "7/3", "1.5*2.2", "sqrt(2)", "sqrt(8)/3",
+                                        "2*sqrt(3)+1", "(3+sqrt(5))**(1/4)", "sqrt(-4)"])
+def test_compute_results_render(expression):
+    assert render_png("1", display_result(expression)) is not None
+
+def test_equation_environment_is_stripped():
+    assert to_mathtext('\\\\begin{equation}\\\\frac{3}{2}\\\\end{equation}') == '$\\dfrac{3}{2}$'
+
+def test_class_and_text_wrappers_are_stripped():
+    latex = '12\\\\times\\\\class{result-box}{\\\\text{1 \\\\frac{1}{2}}}'
+    assert to_mathtext(latex) == '$12\\times1 \\dfrac{1}{2}$'
+    assert render_png(latex, display_result("18")) is not None
+
+def test_unparseable_latex_returns_none():
+    assert render_png('\\\\frac{1}{', '') is None
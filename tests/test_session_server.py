@@ -0,0 +1,37 @@
+import asyncio
+import time
+from session_server import SessionHost
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+def test_idle_session_is_compressed_off_the_loop():
+    async def scenario():
+        host = SessionHost(idle_timeout=0.0, workers=1)
+        _session_id, entry = host.open_session()
+        host.attach(entry)
+        await host.press_keys(entry, ["1", "+", "2"])
+        entry.last_active = time.monotonic() - 1
+        await host.evict_idle_sessions()
+        assert entry.session is None and entry.frozen is not None
+        diff = await host.full_display(entry) # Thawed on the next input
+        assert entry.session is not None
+        return diff
+    assert run(scenario())['type'] == 'diff'
+
+def test_detached_sessions_expire():
+    async def scenario():
+        host = SessionHost(idle_timeout=300.0, workers=1, session_ttl=10.0)
+        kept_id, kept = host.open_session()
+        host.attach(kept)
+        gone_id, gone = host.open_session()
+        host.attach(gone)
+        host.detach(gone)
+        await host.evict_idle_sessions()
+        assert gone_id in host.sessions # Still within its time to live
+        gone.last_active = time.monotonic() - 11
+        kept.last_active = time.monotonic() - 11
+        await host.evict_idle_sessions()
+        return host.sessions, kept_id, gone_id
+    sessions, kept_id, gone_id = run(scenario())
+    assert kept_id in sessions and gone_id not in sessions
@@ -0,0 +1,18 @@
+import json
+from startup_benchmark import check_budget, record_budget
+
+def write_budget(path, provisional, limits):
+    with open(path, 'w') as f:
+        json.dump({'provisional': provisional, 'measured': 'test', 'first_paint_ms': limits}, f)
+
+def test_a_provisional_budget_fails_the_check(tmp_path):
+    path = str(tmp_path / "budget.json")
+    write_budget(path, True, {'launcher': 600})
+    assert not check_budget({'launcher': 0.1}, path)
+
+def test_a_recorded_budget_is_checked(tmp_path):
+    path = str(tmp_path / "budget.json")
+    record_budget({'launcher': 0.4}, repeat=5, platform='offscreen', path=path)
+    assert check_budget({'launcher': 0.45}, path)
+    assert not check_budget({'launcher': 0.6}, path)
+    assert not check_budget({'launcher': None}, path)
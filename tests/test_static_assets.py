@@ -0,0 +1,117 @@
+import gzip
+import hashlib
+import os
+import pytest
+import static_assets
+import web_server
+from static_assets import StaticAssets
+
+SCRIPT = b"var x = 1;\n" * 500 # Compressible and over MIN_COMPRESS_SIZE
+
+def write(root, path, data):
+    full_path = os.path.join(root, *path.split('/'))
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, 'wb') as f:
+        f.write(data)
+
+@pytest.fixture
+def root(tmp_path):
+    root = str(tmp_path / "resources")
+    write(root, 'MathJax/es5/startup.js', SCRIPT)
+    write(root, 'MathJax/es5/core.js', b"core();\n")
+    write(root, 'mathquill.min.css', b".mq {}\n")
+    write(root, 'logo.png', os.urandom(4096))
+    return root
+
+@pytest.fixture
+def assets(root, tmp_path):
+    return StaticAssets(root, str(tmp_path / ".asset_cache"))
+
+def test_digest_is_the_truncated_content_hash(assets):
+    asset = assets.get('MathJax/es5/startup.js')
+    assert asset.digest == hashlib.sha256(SCRIPT).hexdigest()[:static_assets.HASH_LENGTH]
+    assert asset.mimetype in ('application/javascript', 'text/javascript')
+
+def test_url_uses_the_group_digest_of_the_top_level_directory(assets):
+    startup = assets.get('MathJax/es5/startup.js')
+    core = assets.get('MathJax/es5/core.js')
+    css = assets.get('mathquill.min.css')
+    assert startup.group_digest == core.group_digest != startup.digest
+    assert startup.url == f"/assets/{startup.group_digest}/MathJax/es5/startup.js"
+    assert css.group_digest != startup.group_digest
+    assert assets.manifest()['mathquill.min.css'] == css.url
+
+def test_changing_a_sibling_changes_the_group_digest(root, tmp_path):
+    before = StaticAssets(root, str(tmp_path / ".asset_cache"))
+    write(root, 'MathJax/es5/core.js', b"core(2);\n")
+    after = StaticAssets(root, str(tmp_path / ".asset_cache"))
+    assert after.get('MathJax/es5/startup.js').digest == before.get('MathJax/es5/startup.js').digest
+    assert after.get('MathJax/es5/startup.js').group_digest != before.get('MathJax/es5/startup.js').group_digest
+    assert after.get('mathquill.min.css').group_digest == before.get('mathquill.min.css').group_digest
+
+def test_variant_prefers_brotli_then_gzip_then_identity(assets, monkeypatch):
+    asset = assets.get('MathJax/es5/startup.js')
+    monkeypatch.setattr(static_assets, 'brotli', None)
+    path, encoding = assets.variant(asset, 'br, gzip;q=0.8')
+    assert encoding == 'gzip'
+    with open(path, 'rb') as f:
+        assert gzip.decompress(f.read()) == SCRIPT
+    assert assets.variant(asset, 'identity') == (asset.full_path, None)
+    assert assets.variant(asset, '') == (asset.full_path, None)
+
+def test_variant_uses_brotli_when_available(assets, monkeypatch):
+    class FakeBrotli:
+        @staticmethod
+        def compress(data, quality):
+            return b"br:" + gzip.compress(data)
+    monkeypatch.setattr(static_assets, 'brotli', FakeBrotli)
+    asset = assets.get('MathJax/es5/startup.js')
+    path, encoding = assets.variant(asset, 'gzip, br')
+    assert encoding == 'br'
+    assert path.endswith(f"{asset.digest}.br")
+
+def test_small_and_binary_files_are_sent_as_is(assets):
+    for path in ('MathJax/es5/core.js', 'logo.png'):
+        asset = assets.get(path)
+        assert assets.variant(asset, 'gzip') == (asset.full_path, None)
+
+def test_incompressible_content_is_remembered_as_skipped(root, tmp_path):
+    write(root, 'noise.txt', os.urandom(4096))
+    assets = StaticAssets(root, str(tmp_path / ".asset_cache"))
+    asset = assets.get('noise.txt')
+    assert assets.variant(asset, 'gzip') == (asset.full_path, None)
+    assert os.path.exists(os.path.join(assets.variant_root, f"{asset.digest}.gzip.skip"))
+
+def test_variant_cache_is_reused_and_rebuilt(assets, monkeypatch):
+    monkeypatch.setattr(static_assets, 'brotli', None)
+    asset = assets.get('MathJax/es5/startup.js')
+    path, _encoding = assets.variant(asset, 'gzip')
+    modified = os.path.getmtime(path)
+    restarted = StaticAssets(assets.root, assets.variant_root)
+    assert restarted.variant(asset, 'gzip')[0] == path
+    assert os.path.getmtime(path) == modified
+    os.remove(path)
+    os.rmdir(assets.variant_root)
+    rebuilt, encoding = restarted.variant(asset, 'gzip')
+    assert (rebuilt, encoding) == (path, 'gzip')
+    with open(rebuilt, 'rb') as f:
+        assert gzip.decompress(f.read()) == SCRIPT
+
+def test_send_asset_suffixes_the_etag_with_the_encoding(assets, monkeypatch):
+    monkeypatch.setattr(static_assets, 'brotli', None)
+    monkeypatch.setattr(web_server, 'static_assets', assets)
+    asset = assets.get('MathJax/es5/startup.js')
+    client = web_server.app.test_client()
+    compressed = client.get(asset.url, headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['ETag'] == f'"{asset.digest}-gzip"'
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in compressed.headers['Cache-Control']
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    plain = client.get(asset.url)
+    assert plain.headers['ETag'] == f'"{asset.digest}"'
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.data == SCRIPT
+    revalidated = client.get(asset.url, headers={'If-None-Match': f'"{asset.digest}"'})
+    assert revalidated.status_code == 304
+    stale = client.get(f"/assets/000000000000/{asset.path}")
+    assert 'no-cache' in stale.headers['Cache-Control']
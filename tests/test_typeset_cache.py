@@ -0,0 +1,51 @@
+import json
+from typeset_cache import TypesetCache, page_latex
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = TypesetCache(capacity=2)
+    cache.put('a', '<svg>a</svg>')
+    cache.put('b', '<svg>b</svg>')
+    assert cache.get('a') == '<svg>a</svg>' # a is now the most recently used
+    cache.put('c', '<svg>c</svg>')
+    assert cache.get('b') is None
+    assert cache.get('a') == '<svg>a</svg>'
+    assert cache.get('c') == '<svg>c</svg>'
+
+def test_capacity_bounds_the_entries():
+    cache = TypesetCache(capacity=3)
+    for number in range(10):
+        cache.put(str(number), f'<svg>{number}</svg>')
+    assert list(cache.entries) == ['7', '8', '9']
+
+def test_putting_an_existing_latex_refreshes_it():
+    cache = TypesetCache(capacity=2)
+    cache.put('a', 'old')
+    cache.put('b', 'b')
+    cache.put('a', 'new')
+    cache.put('c', 'c')
+    assert cache.get('a') == 'new'
+    assert cache.get('b') is None
+
+def test_hits_and_misses_are_counted():
+    cache = TypesetCache()
+    cache.put('1', '<svg/>')
+    cache.get('1')
+    cache.get('2')
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.report() == "Typeset cache: 1 entries, 1 hits, 1 misses"
+
+def test_entries_are_keyed_by_the_unescaped_latex():
+    # Results reach the cache escaped for a template literal, as the page stores them unescaped
+    assert page_latex('\\\\frac{1}{2}') == '\\frac{1}{2}'
+    cache = TypesetCache()
+    cache.put('\\frac{1}{2}', '<svg>half</svg>')
+    assert cache.script_argument('\\\\frac{1}{2}') == json.dumps('<svg>half</svg>')
+
+def test_script_argument_is_a_javascript_literal():
+    cache = TypesetCache()
+    assert cache.script_argument('3') == 'null'
+    markup = '<svg data-x="`${a}`">\'\u2028\\</svg>'
+    cache.put('3', markup)
+    literal = cache.script_argument('3')
+    assert json.loads(literal) == markup
+    assert '\u2028' not in literal # A raw line separator would end a JavaScript string literal
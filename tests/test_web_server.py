@@ -0,0 +1,43 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+import web_server
+from web_server import MicroBatcher
+
+class FlakyExecutor:
+    """
+    Runs evaluate_chunk in the calling thread; the first executor created is broken.
+    """
+    created = 0
+
+    def __init__(self):
+        FlakyExecutor.created += 1
+        self.broken = FlakyExecutor.created == 1
+
+    def submit(self, function, lines):
+        task = Future()
+        if self.broken:
+            task.set_exception(BrokenProcessPool("a worker died"))
+        else:
+            task.set_result(function(lines))
+        return task
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+def test_broken_pool_fails_its_batch_and_is_replaced():
+    FlakyExecutor.created = 0
+    batcher = MicroBatcher(FlakyExecutor)
+    failed = batcher.submit(["1+2"])
+    assert isinstance(failed.exception(timeout=5), BrokenProcessPool)
+    assert batcher.submit(["1+2", "2*3"]).result(timeout=5) == ["3", "6"]
+    assert FlakyExecutor.created == 2
+
+def test_evaluate_rejects_oversized_requests():
+    client = web_server.app.test_client()
+    response = client.post('/evaluate', json={'expressions': ["1"] * (web_server.MAX_EXPRESSIONS + 1)})
+    assert response.status_code == 413
+
+def test_evaluate_rejects_malformed_payloads():
+    client = web_server.app.test_client()
+    assert client.post('/evaluate', json=[1, 2]).status_code == 400
+    assert client.post('/evaluate', json={'expressions': [1, 2]}).status_code == 400
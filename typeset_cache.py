@@ -0,0 +1,58 @@
+# ================================================
+# Typeset Output Cache for MathJax Results
+# ================================================
+from typing import Optional
+from collections import OrderedDict
+import json
+
+class TypesetCache:
+    """
+    LRU cache of MathJax SVG output keyed by the LaTeX it was typeset from. Pages send
+    their output here through their bridge after typesetting, and receive it back with
+    later updates of the same LaTeX so they can insert it without running MathJax.
+    Pages render SVG with fontCache 'local', so every entry is self-contained.
+
+    Attributes:
+        capacity (int): The number of entries kept.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that had to be typeset.
+    """
+    def __init__(self, capacity: int = 500):
+        self.capacity = capacity
+        self.entries = OrderedDict() # latex -> mjx-container markup, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, latex: str) -> Optional[str]:
+        markup = self.entries.get(latex)
+        if markup is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(latex)
+        self.hits += 1
+        return markup
+
+    def put(self, latex: str, markup: str):
+        self.entries[latex] = markup
+        self.entries.move_to_end(latex)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def script_argument(self, result: str) -> str:
+        """
+        Returns the cached markup for a result, as a JavaScript literal to pass to a page:
+        a string on a hit, null on a miss.
+        """
+        markup = self.get(page_latex(result))
+        return json.dumps(markup) if markup is not None else 'null'
+
+    def report(self) -> str:
+        return f"Typeset cache: {len(self.entries)} entries, {self.hits} hits, {self.misses} misses"
+
+def page_latex(result: str) -> str:
+    # Results are escaped for JavaScript template literals, with doubled backslashes;
+    # the cache is keyed by the latex the page sees
+    return result.replace('\\\\', '\\')
+
+# One cache for every page in the process
+shared_typeset_cache = TypesetCache()
@@ -0,0 +1,122 @@
+// ================================================
+// Coalesced, Frame-Aligned MathJax Typesetting
+// ================================================
+// Results used to be typeset once per update, so fast typing queued many typesets
+// that were stale before they finished. scheduleTypeset keeps only the latest latex
+// per element and typesets everything pending at most once per animation frame,
+// never while a typeset is still running. Latex already on screen is not typeset again,
+// and output cached by the Python side is inserted without running MathJax. MathJax is
+// loaded through loadMathJax (mathjax_loader.js) when the first result needs it.
+(function() {
+    var pending = {};   // element id -> latest {latex, sequence, queued, done, cached}
+    var shown = {};     // element id -> latex currently typeset in the element
+    var frameRequested = false;
+    var typesetting = false;
+
+    function requestFrame() {
+        if (!frameRequested && !typesetting) {
+            frameRequested = true;
+            if (document.hidden) {
+                setTimeout(runFrame, 16); // Hidden pages get no animation frames
+            } else {
+                requestAnimationFrame(runFrame);
+            }
+        }
+    }
+
+    function failureMessage(error) {
+        return String((error && error.message) || error || 'MathJax failed');
+    }
+
+    function runFrame() {
+        frameRequested = false;
+        var jobs = pending;
+        pending = {};
+        var started = performance.now();
+        var elements = [];
+        var typesetJobs = [];
+        var waitingForMathJax = false;
+        Object.keys(jobs).forEach(function(id) {
+            var job = jobs[id];
+            if (shown[id] === job.latex) {
+                job.done(job.sequence, started - job.queued, 0, true, null, null);
+                return;
+            }
+            if (!job.cached && !mathJaxLoaded()) {
+                pending[id] = job; // Typeset once MathJax has loaded
+                waitingForMathJax = true;
+                return;
+            }
+            var element = document.getElementById(id);
+            if (mathJaxLoaded()) {
+                MathJax.typesetClear([element]);
+            }
+            shown[id] = job.latex;
+            if (job.cached) {
+                element.innerHTML = job.cached;
+                job.done(job.sequence, started - job.queued, performance.now() - started, false, null, null);
+                return;
+            }
+            element.innerHTML = '$$' + job.latex + '$$';
+            elements.push(element);
+            typesetJobs.push(job);
+        });
+        if (waitingForMathJax) {
+            typesetting = true;
+            loadMathJax().then(function() {
+                typesetting = false;
+                requestFrame();
+            }, function(error) {
+                // The load is not retried: every job waiting for MathJax fails once, and
+                // later jobs fail as soon as they reach a frame
+                typesetting = false;
+                var waiting = pending;
+                pending = {};
+                Object.keys(waiting).forEach(function(id) {
+                    var job = waiting[id];
+                    if (job.cached) {
+                        pending[id] = job;
+                    } else {
+                        job.done(job.sequence, performance.now() - job.queued, 0, false, null, failureMessage(error));
+                    }
+                });
+                if (Object.keys(pending).length > 0) {
+                    requestFrame();
+                }
+            });
+            return;
+        }
+        if (elements.length === 0) {
+            return;
+        }
+        typesetting = true;
+        MathJax.typesetPromise(elements).then(function() {
+            var typesetMs = performance.now() - started;
+            typesetJobs.forEach(function(job, index) {
+                var container = elements[index].querySelector('mjx-container');
+                job.done(job.sequence, started - job.queued, typesetMs, false, container ? container.outerHTML : null, null);
+            });
+        }, function(error) {
+            var typesetMs = performance.now() - started;
+            typesetJobs.forEach(function(job, index) {
+                delete shown[elements[index].id]; // Typeset again if the same latex comes back
+                job.done(job.sequence, started - job.queued, typesetMs, false, null, failureMessage(error));
+            });
+        }).finally(function() {
+            typesetting = false;
+            if (Object.keys(pending).length > 0) {
+                requestFrame();
+            }
+        });
+    }
+
+    // Queues latex for the element with the given id, with its cached output markup if any.
+    // done(sequence, waitMs, typesetMs, skipped, markup, error) is called once the latest
+    // latex is on screen, with the new output markup if MathJax produced it, or with an
+    // error message if MathJax failed to load or typeset; superseded updates are never
+    // typeset.
+    window.scheduleTypeset = function(id, latex, sequence, done, cached) {
+        pending[id] = {latex: latex, sequence: sequence, queued: performance.now(), done: done, cached: cached};
+        requestFrame();
+    };
+})();
@@ -1,11 +1,207 @@
 import os
-from flask import Flask, send_file, send_from_directory
+import queue
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from flask import Flask, send_file, send_from_directory, request, jsonify, abort
+from batch_evaluator import evaluate_chunk
+from static_assets import StaticAssets
 
 app = Flask(__name__)
 
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600 # Hashed asset URLs never change content
+NOTEBOOK_ROOT = os.path.dirname(os.path.abspath(__file__))
+REQUEST_TIMEOUT = 30.0 # Seconds a request waits for its results
+MAX_EXPRESSIONS = 1000 # Expressions accepted in one request
+
+def warm_worker():
+    # Silence the compute prints and pay the SymPy import and cache costs before the first request
+    from replay_engine import silence_worker
+    silence_worker()
+    evaluate_chunk(["1+2", "12/8", "sqrt(2)*3", "1.5*(2-7)"])
+
+def worker_ready():
+    return os.getpid()
+
+def create_executor(workers: int) -> ProcessPoolExecutor:
+    """
+    Starts a process pool and waits until every worker has imported and warmed SymPy.
+    """
+    executor = ProcessPoolExecutor(max_workers=workers,
+                                   mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=warm_worker)
+    for future in [executor.submit(worker_ready) for _ in range(workers)]:
+        future.result()
+    return executor
+
+class MicroBatcher:
+    """
+    Coalesces concurrent evaluation requests into micro-batches for the process pool.
+
+    Requests that arrive within max_delay seconds of each other are sent to a worker
+    as one task, up to max_batch expressions per task. A failed batch fails only its own
+    requests; if a worker died and broke the pool, a new pool is started before the
+    next batch.
+    """
+    def __init__(self, executor_factory, max_batch: int = 64, max_delay: float = 0.002):
+        self.executor_factory = executor_factory
+        self.executor = executor_factory()
+        self.pool_broken = False
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="evaluate-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, expressions) -> Future:
+        future = Future()
+        self.requests.put((list(expressions), future))
+        return future
+
+    def run(self):
+        while True:
+            batch = [self.requests.get()]
+            size = len(batch[0][0])
+            while size < self.max_batch:
+                try:
+                    item = self.requests.get(timeout=self.max_delay)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            lines = [line for expressions, _future in batch for line in expressions]
+            try:
+                if self.pool_broken:
+                    self.restart_pool()
+                task = self.executor.submit(evaluate_chunk, lines)
+            except Exception as e:
+                self.fail(batch, e)
+                continue
+            task.add_done_callback(lambda task, batch=batch: self.resolve(task, batch))
+
+    def restart_pool(self):
+        print("Evaluation pool is broken, starting a new one")
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = self.executor_factory()
+        self.pool_broken = False
+
+    def fail(self, batch, error: Exception):
+        if isinstance(error, BrokenProcessPool):
+            self.pool_broken = True
+        for _expressions, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def resolve(self, task, batch):
+        try:
+            results, _latencies = task.result()
+        except Exception as e:
+            self.fail(batch, e)
+            return
+        start = 0
+        for expressions, future in batch:
+            future.set_result(results[start:start + len(expressions)])
+            start += len(expressions)
+
+batcher = None
+batcher_lock = threading.Lock()
+
+def start_evaluation_pool(workers=None):
+    """
+    Starts the process pool and waits until every worker has imported and warmed SymPy.
+    """
+    global batcher
+    with batcher_lock:
+        if batcher is None:
+            workers = workers or os.cpu_count()
+            batcher = MicroBatcher(lambda: create_executor(workers))
+    return batcher
+
+def evaluate_expressions(expressions):
+    """
+    Returns the results for a list of expressions, or raises if they could not be
+    evaluated within REQUEST_TIMEOUT.
+    """
+    return start_evaluation_pool().submit(expressions).result(timeout=REQUEST_TIMEOUT)
+
+@app.route('/evaluate', methods=['POST'])
+def evaluate():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify(error="Expected a JSON object"), 400
+    expression = payload.get('expression')
+    expressions = payload.get('expressions')
+    if isinstance(expression, str):
+        expressions = [expression]
+    elif not (isinstance(expressions, list) and all(isinstance(e, str) for e in expressions)):
+        return jsonify(error="Expected 'expression' (string) or 'expressions' (list of strings)"), 400
+    if len(expressions) > MAX_EXPRESSIONS:
+        return jsonify(error=f"At most {MAX_EXPRESSIONS} expressions per request"), 413
+    try:
+        results = evaluate_expressions(expressions)
+    except FutureTimeoutError:
+        return jsonify(error=f"Evaluation did not finish within {REQUEST_TIMEOUT:.0f} s"), 504
+    except Exception as e:
+        return jsonify(error=f"Evaluation failed: {e}"), 500
+    if isinstance(expression, str):
+        return jsonify(result=results[0])
+    return jsonify(results=results)
+
+static_assets = None
+static_assets_lock = threading.Lock()
+
+def get_static_assets():
+    """
+    Hashes the static files on first use.
+    """
+    global static_assets
+    with static_assets_lock:
+        if static_assets is None:
+            static_assets = StaticAssets()
+    return static_assets
+
+def send_asset(asset, immutable: bool):
+    # send_file answers If-None-Match and Range requests and passes the open file to
+    # wsgi.file_wrapper. Only a production WSGI server such as gunicorn sends it with
+    # sendfile(2); the Flask development server started below reads it in chunks.
+    path, encoding = get_static_assets().variant(asset, request.headers.get('Accept-Encoding', ''))
+    response = send_file(path, mimetype=asset.mimetype, conditional=True,
+                         etag=asset.digest + (f"-{encoding}" if encoding else ''),
+                         max_age=IMMUTABLE_MAX_AGE if immutable else 0)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    if immutable:
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True # Revalidate with the ETag on every use
+    return response
+
+@app.route('/assets/<digest>/<path:filename>')
+def serve_hashed_asset(digest, filename):
+    asset = get_static_assets().get(filename)
+    if asset is None:
+        abort(404)
+    if digest != asset.group_digest:
+        # Stale or mistyped hash: serve the current file, but do not let it be cached forever
+        return send_asset(asset, immutable=False)
+    return send_asset(asset, immutable=True)
+
+@app.route('/assets/manifest.json')
+def serve_asset_manifest():
+    response = jsonify(get_static_assets().manifest())
+    response.cache_control.no_cache = True
+    return response
+
 @app.route('/<path:filename>')
 def serve_mathjax(filename):
-    return send_from_directory('mathjax', filename)
+    # Unhashed URLs, kept for existing pages; cached only until revalidated
+    asset = get_static_assets().get(filename)
+    if asset is None:
+        abort(404)
+    return send_asset(asset, immutable=False)
 
 @app.route('/')
 def home():
@@ -23,7 +219,22 @@ def home():
     '''
 @app.route('/notebooks/<path:filename>')
 def serve_notebook(filename):
-    return send_file(filename)
+    # Served with Range and If-None-Match support, as in send_asset; notebooks change, so
+    # clients revalidate instead of caching
+    response = send_from_directory(NOTEBOOK_ROOT, filename, conditional=True, max_age=0)
+    response.cache_control.no_cache = True
+    return response
 
 if __name__ == '__main__':
-    app.run(port=5000, debug=False)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Local MathJax, notebook and evaluation server.")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="evaluation worker processes")
+    parser.add_argument("--x-sendfile", action="store_true",
+                        help="let a fronting proxy send files through the X-Sendfile header")
+    args = parser.parse_args()
+    app.config['USE_X_SENDFILE'] = args.x_sendfile
+    get_static_assets()
+    start_evaluation_pool(args.workers)
+    # The development server has no wsgi.file_wrapper, so files are copied through Python.
+    # For zero-copy sendfile, serve web_server:app with a WSGI server such as gunicorn.
+    app.run(port=args.port, debug=False, threaded=True)
@@ -0,0 +1,168 @@
+# ================================================
+# Worksheet Scalability Load Test
+# ================================================
+from typing import List, Callable
+from dataclasses import dataclass, asdict
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QCoreApplication
+from PyQt6.QtTest import QTest
+from mathquill_widget import MathQuillStackWidget
+from evaluate_load_test import percentile
+import statistics
+import argparse
+import psutil
+import json
+import time
+import sys
+import os
+
+RENDERER_PROCESS = 'QtWebEngineProcess'
+
+@dataclass
+class Checkpoint:
+    """
+    Measurements of the worksheet once it has grown to a number of lines.
+
+    Attributes:
+        lines (int): MathQuill lines in the worksheet.
+        rss_mb (float): Resident memory of this process.
+        renderer_rss_mb (float): Resident memory of all QtWebEngine renderer processes.
+        renderers (int): Number of QtWebEngine renderer processes.
+        create_ms (float): Median add_mathquill_widget call time since the last checkpoint.
+        ready_ms (float): Median time from add_mathquill_widget until the new page was ready.
+        update_ms (float): Median update_last_widget time until the page ran the update.
+        scroll_p50_ms (float): Median time to scroll one step and process the resulting events.
+        scroll_p95_ms (float): 95th percentile of the scroll step time.
+    """
+    lines: int
+    rss_mb: float
+    renderer_rss_mb: float
+    renderers: int
+    create_ms: float
+    ready_ms: float
+    update_ms: float
+    scroll_p50_ms: float
+    scroll_p95_ms: float
+
+def renderer_processes() -> List[psutil.Process]:
+    renderers = []
+    for child in psutil.Process().children(recursive=True):
+        try:
+            if RENDERER_PROCESS in child.name():
+                renderers.append(child)
+        except psutil.NoSuchProcess:
+            pass
+    return renderers
+
+def rss_mb(processes: List[psutil.Process]) -> float:
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return total / 2**20
+
+def wait_for(condition: Callable[[], bool], timeout: float) -> bool:
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        QTest.qWait(1)
+    return True
+
+class WorksheetLoadTest:
+    """
+    Grows a MathQuillStackWidget to many lines and measures how it scales.
+    """
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+        self.stack = MathQuillStackWidget()
+        self.stack.resize(800, 600)
+        self.stack.show()
+        self.create_times: List[float] = []
+        self.ready_times: List[float] = []
+        self.update_times: List[float] = []
+
+    def last_widget(self):
+        return self.stack.widgets_dict[self.stack.active_widget_ID]
+
+    def add_line(self):
+        start = time.perf_counter()
+        self.stack.add_mathquill_widget()
+        self.create_times.append(time.perf_counter() - start)
+        widget = self.last_widget()
+        if wait_for(lambda: widget.page_loaded, self.timeout):
+            self.ready_times.append(time.perf_counter() - start)
+        self.update_line(widget)
+
+    def update_line(self, widget):
+        # update_last_widget until the page has run the scripts it queued
+        applied = []
+        self.stack.latex_input.setText(f"{widget.widget_id}\\\\times 7+\\\\sqrt{{2}}")
+        start = time.perf_counter()
+        self.stack.update_last_widget(0)
+        widget.commands.flush() # Send this tick's batched commands ahead of the probe
+        widget.web_view.page().runJavaScript("0", resultCallback=lambda _result: applied.append(time.perf_counter()))
+        if wait_for(lambda: applied, self.timeout):
+            self.update_times.append(applied[0] - start)
+
+    def scroll_frames(self, steps: int) -> List[float]:
+        # Scroll from top to bottom, timing each step and the events it causes
+        scrollbar = self.stack.scroll_area.verticalScrollBar()
+        frames = []
+        for step in range(steps + 1):
+            start = time.perf_counter()
+            scrollbar.setValue(scrollbar.maximum() * step // steps)
+            self.stack.scroll_area.viewport().repaint()
+            QCoreApplication.processEvents()
+            frames.append(time.perf_counter() - start)
+        return frames
+
+    def checkpoint(self, scroll_steps: int) -> Checkpoint:
+        QTest.qWait(200) # Let the latest pages settle before measuring memory
+        frames = sorted(self.scroll_frames(scroll_steps))
+        renderers = renderer_processes()
+        median_ms = lambda times: round(statistics.median(times) * 1000, 2) if times else 0.0
+        checkpoint = Checkpoint(lines=len(self.stack.widgets_dict),
+                                rss_mb=round(rss_mb([psutil.Process()]), 1),
+                                renderer_rss_mb=round(rss_mb(renderers), 1),
+                                renderers=len(renderers),
+                                create_ms=median_ms(self.create_times),
+                                ready_ms=median_ms(self.ready_times),
+                                update_ms=median_ms(self.update_times),
+                                scroll_p50_ms=round(percentile(frames, 0.50) * 1000, 2),
+                                scroll_p95_ms=round(percentile(frames, 0.95) * 1000, 2))
+        self.create_times, self.ready_times, self.update_times = [], [], []
+        return checkpoint
+
+# Load test entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grow a MathQuill worksheet offscreen and record how it scales.")
+    parser.add_argument("--lines", type=int, default=1000, help="lines to grow the worksheet to")
+    parser.add_argument("--step", type=int, default=50, help="lines between checkpoints")
+    parser.add_argument("--scroll-steps", type=int, default=30, help="scroll positions timed per checkpoint")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for a page")
+    parser.add_argument("--output", help="write the checkpoints to this JSON file")
+    args = parser.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QApplication(sys.argv)
+    load_test = WorksheetLoadTest(timeout=args.timeout)
+    wait_for(lambda: load_test.last_widget().page_loaded, args.timeout)
+
+    checkpoints = []
+    print(f"{'lines':>6} {'rss MB':>8} {'renderer MB':>12} {'renderers':>10} {'create ms':>10} {'ready ms':>9} "
+          f"{'update ms':>10} {'scroll p50':>11} {'scroll p95':>11}")
+    while len(load_test.stack.widgets_dict) < args.lines:
+        for _ in range(min(args.step, args.lines - len(load_test.stack.widgets_dict))):
+            load_test.add_line()
+        checkpoint = load_test.checkpoint(args.scroll_steps)
+        checkpoints.append(checkpoint)
+        print(f"{checkpoint.lines:>6} {checkpoint.rss_mb:>8.1f} {checkpoint.renderer_rss_mb:>12.1f} "
+              f"{checkpoint.renderers:>10} {checkpoint.create_ms:>10.2f} {checkpoint.ready_ms:>9.2f} "
+              f"{checkpoint.update_ms:>10.2f} {checkpoint.scroll_p50_ms:>11.2f} {checkpoint.scroll_p95_ms:>11.2f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump([asdict(checkpoint) for checkpoint in checkpoints], f, indent=4)
+    print(load_test.stack.command_stats.report())